@@ -1,16 +1,22 @@
+import os
 from flask import Flask, jsonify
 from model.graph.graph import Graph
 from view.actor_views import construct_actor_blueprint
+from view.graph_views import construct_graph_blueprint
 from view.movie_views import construct_movie_blueprint
 
 
-# initialize graph data
-graph_data = Graph('model/data/data.json').to_json()
+# initialize graph data, from a prebuilt binary snapshot when one is given
+snapshot_file = os.environ.get('GRAPH_SNAPSHOT')
+graph = Graph.from_snapshot(snapshot_file) if snapshot_file else Graph('model/data/data.json')
 # initialize flask app
 app = Flask(__name__)
-# registers routes for movie and actor
-app.register_blueprint(construct_actor_blueprint(graph_data[0]))
-app.register_blueprint(construct_movie_blueprint(graph_data[1]))
+# registers routes for movie and actor, their records are built from the graph's nodes and writes are applied to
+# the graph too
+app.register_blueprint(construct_actor_blueprint(graph.actors_to_json(), graph))
+app.register_blueprint(construct_movie_blueprint(graph.movies_to_json(), graph))
+# graph questions are answered from the Graph itself
+app.register_blueprint(construct_graph_blueprint(graph))
 
 
 @app.errorhandler(400)
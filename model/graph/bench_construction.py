@@ -0,0 +1,59 @@
+import argparse
+import time
+from graph import Graph
+from synthetic_data import generate_data
+
+
+def edge_map(graph):
+	""" collect every edge of the graph with its weight in both directions
+
+	:param graph: graph to read edges from
+	:return: dictionary mapping (from name, to name) to edge weight
+	"""
+	edges = {}
+	for node in list(graph.actor_vertices) + list(graph.movie_vertices):
+		for neighbor_node, weight in node.neighbors.iteritems():
+			edges[(node.name, neighbor_node.name)] = weight
+	return edges
+
+
+def time_construction(d, indexed):
+	""" time building the nodes and edges of a graph
+
+	:param d: synthetic data to build the graph from
+	:param indexed: use the indexed edge construction
+	:return: the graph and the number of seconds taken
+	"""
+	start = time.time()
+	graph = Graph.from_data(d, indexed)
+	return graph, time.time() - start
+
+
+def run_benchmark(sizes, max_all_pairs):
+	""" compare indexed and all-pairs edge construction on synthetic graphs
+
+	:param sizes: total number of vertices for each run
+	:param max_all_pairs: largest size to also run the all-pairs construction on
+	"""
+	print '%10s %10s %12s %12s %10s' % ('vertices', 'edges', 'indexed (s)', 'all-pairs (s)', 'same')
+	for size in sizes:
+		d = generate_data(size / 2, size / 2)
+		indexed_graph, indexed_time = time_construction(d, True)
+		edges = edge_map(indexed_graph)
+		all_pairs_time = '-'
+		same = '-'
+		if size <= max_all_pairs:
+			all_pairs_graph, seconds = time_construction(d, False)
+			all_pairs_time = '%.2f' % seconds
+			same = str(edges == edge_map(all_pairs_graph))
+		print '%10d %10d %12.2f %12s %10s' % (size, len(edges) / 2, indexed_time, all_pairs_time, same)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark graph edge construction.')
+	parser.add_argument('sizes', nargs='*', type=int, default=[10000, 100000, 1000000],
+						help='number of vertices in each synthetic graph')
+	parser.add_argument('--max-all-pairs', type=int, default=10000,
+						help='skip the all-pairs construction above this many vertices')
+	args = parser.parse_args()
+	run_benchmark(args.sizes, args.max_all_pairs)
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from graph import Graph
+from loader import write_json_records, write_ndjson_records
+from synthetic_data import iter_records
+
+
+def load(mode, filename):
+	""" load a graph the given way
+
+	:param mode: 'json.load' to parse the whole file first (the old path), 'stream', or 'snapshot'
+	:param filename: file to load
+	:return: the graph
+	"""
+	if mode == 'json.load':
+		with open(filename) as f:
+			return Graph.from_data(json.load(f))
+	if mode == 'snapshot':
+		return Graph.from_snapshot(filename)
+	return Graph(filename)
+
+
+def run_child(mode, filename):
+	""" load a graph and print the time taken and peak memory, run in a fresh process
+
+	:param mode: how to load the graph
+	:param filename: file to load
+	"""
+	start = time.time()
+	load(mode, filename)
+	seconds = time.time() - start
+	# ru_maxrss is in kilobytes on Linux
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	print json.dumps({'seconds': seconds, 'peak_kb': peak})
+
+
+def measure(mode, filename):
+	""" load a graph in a separate process, so peak memory is not shared between runs
+
+	:param mode: how to load the graph
+	:param filename: file to load
+	:return: dictionary with seconds and peak_kb
+	"""
+	output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', mode, filename])
+	return json.loads(output)
+
+
+def run_benchmark(actor_counts):
+	""" compare loading data.json and synthetic datasets whole vs streamed vs from a snapshot
+
+	:param actor_counts: number of actors (and movies) in each synthetic dataset
+	"""
+	tmpdir = tempfile.mkdtemp()
+	try:
+		files = [('data.json', 'model/data/data.json')]
+		for count in actor_counts:
+			for extension, write in (('json', write_json_records), ('ndjson', write_ndjson_records)):
+				filename = os.path.join(tmpdir, 'synthetic_%d.%s' % (count, extension))
+				with open(filename, 'w') as f:
+					write(iter_records(count, count), f)
+				files.append(('%d actors' % count, filename))
+			# snapshot of the last file written, built in another process since children inherit peak RSS
+			snapshot_file = os.path.join(tmpdir, 'synthetic_%d.snapshot' % count)
+			subprocess.check_call([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+																 'snapshot.py'), filename, snapshot_file])
+			files.append(('%d actors' % count, snapshot_file))
+		print '%-16s %-8s %10s %-10s %10s %12s' % ('dataset', 'format', 'size (MB)', 'loader', 'time (s)', 'peak RSS (MB)')
+		for label, filename in files:
+			size = os.path.getsize(filename) / float(1 << 20)
+			extension = filename.rsplit('.', 1)[1]
+			modes = {'ndjson': ['stream'], 'snapshot': ['snapshot']}.get(extension, ['json.load', 'stream'])
+			for mode in modes:
+				result = measure(mode, filename)
+				print '%-16s %-8s %10.1f %-10s %10.2f %12.1f' % (label, extension, size, mode, result['seconds'],
+																   result['peak_kb'] / 1024.0)
+	finally:
+		shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark wall time and peak RSS of loading a graph.')
+	parser.add_argument('actors', nargs='*', type=int, default=[10000, 100000, 1000000],
+						help='number of actors (and movies) in each synthetic dataset')
+	parser.add_argument('--child', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.child:
+		run_child(*args.child)
+	else:
+		run_benchmark(args.actors)
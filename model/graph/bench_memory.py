@@ -0,0 +1,114 @@
+import argparse
+import json
+import sys
+from csr_graph import CSRGraph
+from graph import Graph
+from synthetic_data import generate_data
+
+
+class DictActorNode(object):
+	""" Actor node laid out the way it was before __slots__: a __dict__ and a neighbor dict of weights
+
+	"""
+
+	def __init__(self, actor):
+		self.name = actor['name']
+		self.neighbors = {}
+		self.age = actor['age']
+		self.movies = actor['movies']
+		self.total_gross = actor['total_gross']
+
+
+class DictMovieNode(object):
+	""" Movie node laid out the way it was before __slots__: a __dict__ and a neighbor dict of weights
+
+	"""
+
+	def __init__(self, movie):
+		self.name = movie['name']
+		self.neighbors = {}
+		self.year = movie['year']
+		self.gross = movie['box_office']
+		self.actors = movie['actors']
+		self.wiki_page = movie['wiki_page']
+
+
+def build_dict_nodes(d):
+	""" build the old node layout, linking nodes through name indexes
+
+	:param d: actor and movie data
+	:return: list of all nodes
+	"""
+	actors = dict((name, DictActorNode(actor)) for name, actor in d[0].iteritems())
+	movies = dict((name, DictMovieNode(movie)) for name, movie in d[1].iteritems())
+	for movie_node in movies.itervalues():
+		for actor_name in movie_node.actors:
+			if actor_name in actors:
+				actor_node = actors[actor_name]
+				actor_node.neighbors[movie_node] = movie_node.gross * actor_node.age
+				movie_node.neighbors[actor_node] = actor_node.age * movie_node.gross
+	for actor_node in actors.itervalues():
+		for movie_name in actor_node.movies:
+			if movie_name in movies:
+				movie_node = movies[movie_name]
+				actor_node.neighbors[movie_node] = movie_node.gross * actor_node.age
+				movie_node.neighbors[actor_node] = actor_node.age * movie_node.gross
+	return [actors, movies]
+
+
+def deep_size(root):
+	""" add up the size of every object reachable from root, counting shared objects once
+
+	:param root: object to measure
+	:return: size in bytes
+	"""
+	seen = set()
+	stack = [root]
+	total = 0
+	while len(stack) > 0:
+		obj = stack.pop()
+		if id(obj) in seen:
+			continue
+		seen.add(id(obj))
+		total += sys.getsizeof(obj)
+		if isinstance(obj, dict):
+			stack.extend(obj.keys())
+			stack.extend(obj.values())
+		elif isinstance(obj, (list, tuple, set, frozenset)):
+			stack.extend(obj)
+		if hasattr(obj, '__dict__'):
+			stack.append(obj.__dict__)
+		for cls in type(obj).__mro__:
+			for slot in getattr(cls, '__slots__', ()):
+				if hasattr(obj, slot):
+					stack.append(getattr(obj, slot))
+	return total
+
+
+def measure(label, d):
+	""" print bytes per node for each graph layout built from d
+
+	:param label: name of the dataset
+	:param d: actor and movie data
+	"""
+	num_nodes = len(d[0]) + len(d[1])
+	layouts = [('dict nodes (before)', build_dict_nodes),
+			   # the Graph's string table is reached through it, so the shared names and the table are both counted
+			   ('slotted nodes (Graph)', lambda data: Graph.from_data(data)),
+			   ('CSRGraph', CSRGraph.from_data)]
+	for name, build in layouts:
+		# decode again so each layout starts from its own strings, as when loading from disk
+		data = json.loads(json.dumps(d))
+		size = deep_size(build(data))
+		print '%-12s %-24s %12d nodes %10.1f bytes/node' % (label, name, num_nodes, float(size) / num_nodes)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Report memory used per graph node.')
+	parser.add_argument('--data', default='model/data/data.json', help='JSON file to measure')
+	parser.add_argument('--synthetic', type=int, default=1000000, help='vertices in the synthetic graph, 0 to skip')
+	args = parser.parse_args()
+	with open(args.data) as f:
+		measure('data.json', json.load(f))
+	if args.synthetic > 0:
+		measure('synthetic', generate_data(args.synthetic / 2, args.synthetic / 2))
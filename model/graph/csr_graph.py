@@ -0,0 +1,330 @@
+import json
+from array import array
+
+
+class CSRGraph(object):
+	""" Compact graph of actors and movies stored in flat arrays
+
+	Names are interned into a string table, one UTF-8 blob with an array of offsets, and nodes are integer ids:
+	actors are 0..num_actors-1 and movies follow them. Adjacency is stored in compressed sparse row (CSR) form: the neighbors of node v are
+	indices[offsets[v]:offsets[v + 1]] with matching edge weights in weights. Node attributes are columns.
+
+	This is the storage and adjacency layer only, snapshots are written from and loaded through it. Queries are answered
+	by Graph, which keeps its derived indexes up to date as the graph changes.
+	"""
+
+	def __init__(self, actors_and_movies_json=None):
+		""" Constructor.
+
+		:param actors_and_movies_json: JSON file of actor and wikipedia data from scraper, None for an empty graph.
+
+		"""
+		# string table shared by names, movie/actor lists and wiki pages, string i is the UTF-8 encoded
+		# string_data[string_offsets[i]:string_offsets[i + 1]]
+		self.string_data = ''
+		self.string_offsets = array('l', [0])
+		# actor and movie ids sorted by name, names are looked up by binary search, actors and movies may share a name
+		self.actor_order = array('i')
+		self.movie_order = array('i')
+		self.num_actors = 0
+		self.num_movies = 0
+		# node id to string id of its name
+		self.node_names = array('i')
+		# actor columns, indexed by actor id
+		self.ages = array('l')
+		self.total_gross = array('l')
+		# movie columns, indexed by movie id - num_actors
+		self.years = array('l')
+		self.box_office = array('l')
+		self.wiki_pages = array('i')
+		# the movies/actors list each node was loaded with (string ids), also in CSR form
+		self.list_offsets = array('l', [0])
+		self.list_items = array('i')
+		# adjacency
+		self.offsets = array('l', [0])
+		self.indices = array('i')
+		self.weights = array('l')
+		# mmap of the snapshot the string table and arrays are views over, None if they were built in memory
+		self.mapping = None
+		if actors_and_movies_json is None:
+			return
+		with open(actors_and_movies_json) as f:
+			d = json.load(f)
+		self.build(d)
+
+	@classmethod
+	def from_data(cls, d):
+		""" build a graph from data that has already been loaded
+
+		:param d: list of actor and movie dictionaries, same format as the JSON file.
+
+		:return: the new graph
+
+		"""
+		graph = cls()
+		graph.build(d)
+		return graph
+
+	@classmethod
+	def from_nodes(cls, actor_nodes, movie_nodes):
+		""" build a graph from the nodes of a Graph, using their links instead of matching names
+
+		:param actor_nodes: ActorNodes, in the order of their ids
+
+		:param movie_nodes: MovieNodes, in the order of their ids
+
+		:return: the new graph
+
+		"""
+		graph = cls()
+		graph.build_from_nodes(actor_nodes, movie_nodes)
+		return graph
+
+	def string_table(self):
+		""" start filling the string table
+
+		:return: function giving the string id of a string, adding it if needed, and the list of encoded strings to
+		join into string_data once they are all added
+
+		"""
+		string_ids = {}
+		pieces = []
+
+		def intern(s):
+			string_id = string_ids.get(s)
+			if string_id is None:
+				string_id = string_ids[s] = len(pieces)
+				pieces.append(encode(s))
+				self.string_offsets.append(self.string_offsets[-1] + len(pieces[-1]))
+			return string_id
+
+		return intern, pieces
+
+	def sort_names(self):
+		""" fill actor_order and movie_order once the names are stored
+
+		"""
+		self.actor_order = array('i', sorted(xrange(self.num_actors), key=self.get_name_bytes))
+		self.movie_order = array('i', sorted(xrange(self.num_actors, self.num_nodes()), key=self.get_name_bytes))
+
+	def build(self, d):
+		""" fill the arrays from actor and movie data
+
+		:param d: list of actor and movie dictionaries, same format as the JSON file.
+
+		"""
+		actors = d[0].values()
+		movies = d[1].values()
+		self.num_actors = len(actors)
+		self.num_movies = len(movies)
+		# string ids and name lookups are only kept in dictionaries while building
+		intern, pieces = self.string_table()
+		actor_ids = {}
+		movie_ids = {}
+		for actor_id, actor in enumerate(actors):
+			actor_ids[actor['name']] = actor_id
+			self.node_names.append(intern(actor['name']))
+			self.ages.append(actor['age'])
+			self.total_gross.append(actor['total_gross'])
+			self.add_list(intern, actor['movies'])
+		for movie_id, movie in enumerate(movies):
+			movie_ids[movie['name']] = self.num_actors + movie_id
+			self.node_names.append(intern(movie['name']))
+			self.years.append(movie['year'])
+			self.box_office.append(movie['box_office'])
+			self.wiki_pages.append(intern(movie['wiki_page']))
+			self.add_list(intern, movie['actors'])
+		self.string_data = ''.join(pieces)
+		self.sort_names()
+		# an actor and a movie are linked if either one lists the other
+		movies_of_actor = [set() for _ in xrange(self.num_actors)]
+		for actor_id, actor in enumerate(actors):
+			for movie_name in actor['movies']:
+				if movie_name in movie_ids:
+					movies_of_actor[actor_id].add(movie_ids[movie_name])
+		actors_of_movie = [[] for _ in xrange(self.num_movies)]
+		for movie_id, movie in enumerate(movies):
+			for actor_name in movie['actors']:
+				if actor_name in actor_ids:
+					movies_of_actor[actor_ids[actor_name]].add(self.num_actors + movie_id)
+		for actor_id, movie_ids in enumerate(movies_of_actor):
+			for movie_id in movie_ids:
+				actors_of_movie[movie_id - self.num_actors].append(actor_id)
+		for node_id, neighbor_ids in enumerate(movies_of_actor + actors_of_movie):
+			for neighbor_id in sorted(neighbor_ids):
+				self.indices.append(neighbor_id)
+				self.weights.append(self.edge_weight(node_id, neighbor_id))
+			self.offsets.append(len(self.indices))
+
+	def build_from_nodes(self, actor_nodes, movie_nodes):
+		""" fill the arrays from the attributes and links of actor and movie nodes
+
+		:param actor_nodes: ActorNodes
+
+		:param movie_nodes: MovieNodes
+
+		"""
+		self.num_actors = len(actor_nodes)
+		self.num_movies = len(movie_nodes)
+		intern, pieces = self.string_table()
+		for actor_node in actor_nodes:
+			self.node_names.append(intern(actor_node.name))
+			self.ages.append(actor_node.age)
+			self.total_gross.append(actor_node.total_gross)
+			self.add_list(intern, actor_node.movies)
+		for movie_node in movie_nodes:
+			self.node_names.append(intern(movie_node.name))
+			self.years.append(movie_node.year)
+			self.box_office.append(movie_node.gross)
+			self.wiki_pages.append(intern(movie_node.wiki_page))
+			self.add_list(intern, movie_node.actors)
+		self.string_data = ''.join(pieces)
+		self.sort_names()
+		nodes = list(actor_nodes) + list(movie_nodes)
+		ids = dict((node, node_id) for node_id, node in enumerate(nodes))
+		for node_id, node in enumerate(nodes):
+			for neighbor_id in sorted(ids[neighbor] for neighbor in node.links):
+				self.indices.append(neighbor_id)
+				self.weights.append(self.edge_weight(node_id, neighbor_id))
+			self.offsets.append(len(self.indices))
+
+	def add_list(self, intern, names):
+		""" store the movies/actors list of the next node
+
+		:param intern: function giving the string id of a name
+
+		:param names: list of names
+
+		"""
+		self.list_items.extend(intern(name) for name in names)
+		self.list_offsets.append(len(self.list_items))
+
+	def edge_weight(self, node_id, neighbor_id):
+		""" weight of edge is age of actor times gross of movie
+
+		:param node_id: one end of the edge
+
+		:param neighbor_id: other end of the edge
+
+		:return: the edge weight
+
+		"""
+		actor_id, movie_id = min(node_id, neighbor_id), max(node_id, neighbor_id)
+		return self.ages[actor_id] * self.box_office[movie_id - self.num_actors]
+
+	def num_nodes(self):
+		""" :return: number of actor and movie nodes """
+		return self.num_actors + self.num_movies
+
+	def is_actor(self, node_id):
+		""" :return: whether node_id is an actor """
+		return node_id < self.num_actors
+
+	def get_string(self, string_id):
+		""" :return: string from the string table """
+		return self.string_data[self.string_offsets[string_id]:self.string_offsets[string_id + 1]].decode('utf-8')
+
+	def get_name_bytes(self, node_id):
+		""" :return: UTF-8 encoded name of the node, without decoding it """
+		string_id = self.node_names[node_id]
+		return self.string_data[self.string_offsets[string_id]:self.string_offsets[string_id + 1]]
+
+	def get_name(self, node_id):
+		""" :return: name of the node """
+		return self.get_string(self.node_names[node_id])
+
+	def get_list(self, node_id):
+		""" :return: the movies (for an actor) or actors (for a movie) list the node was loaded with """
+		return [self.get_string(i) for i in self.list_items[self.list_offsets[node_id]:self.list_offsets[node_id + 1]]]
+
+	def get_neighbors(self, node_id):
+		""" :return: array of the node ids linked to node_id """
+		return self.indices[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+	def get_edges(self, node_id):
+		""" :return: list of (neighbor id, weight) for node_id """
+		start, end = self.offsets[node_id], self.offsets[node_id + 1]
+		return zip(self.indices[start:end], self.weights[start:end])
+
+	def get_node_id(self, node):
+		""" look up a node id, accepting either the id or a name (actors are checked first)
+
+		:param node: node id or name
+
+		:return: the node id, or None if not found
+
+		"""
+		if isinstance(node, (int, long)):
+			return node
+		node_id = self.find_name(self.actor_order, node)
+		if node_id is None:
+			node_id = self.find_name(self.movie_order, node)
+		return node_id
+
+	def find_name(self, order, name):
+		""" binary search for a name, UTF-8 byte order is the same as code point order
+
+		:param order: actor_order or movie_order
+
+		:param name: name to look up
+
+		:return: the node id, or None if not found
+
+		"""
+		key = encode(name)
+		lo, hi = 0, len(order)
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.get_name_bytes(order[mid]) < key:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < len(order) and self.get_name_bytes(order[lo]) == key:
+			return order[lo]
+		return None
+
+	def to_json(self):
+		""" convert graph to JSON
+
+		:return: a dictionary holding graph data in JSON format
+
+		"""
+		d = [{}, {}]
+		for actor_id in xrange(self.num_actors):
+			actor = self.actor_to_json(actor_id)
+			d[0][actor['name']] = actor
+		for movie_id in xrange(self.num_actors, self.num_nodes()):
+			movie = self.movie_to_json(movie_id)
+			d[1][movie['name']] = movie
+		return d
+
+	def actor_to_json(self, actor_id):
+		""" :return: the actor data stored in dictionary """
+		return {'name': self.get_name(actor_id), 'age': int(self.ages[actor_id]), 'movies': self.get_list(actor_id),
+				'total_gross': int(self.total_gross[actor_id]), 'json_class': 'Actor'}
+
+	def movie_to_json(self, movie_id):
+		""" :return: the movie data stored in dictionary """
+		column = movie_id - self.num_actors
+		return {'name': self.get_name(movie_id), 'year': int(self.years[column]), 'box_office': int(self.box_office[column]),
+				'actors': self.get_list(movie_id), 'wiki_page': self.get_string(self.wiki_pages[column]), 'json_class': 'Movie'}
+
+	def write_to_file(self, filename):
+		""" write JSON data to file
+
+		:param filename: filename to store graph JSON data in
+
+		"""
+		with open(filename, 'w') as f:
+			json.dump(self.to_json(), f)
+
+
+
+def encode(s):
+	""" encode a string for the string table, byte strings are taken to be UTF-8 already
+
+	:param s: str or unicode
+
+	:return: UTF-8 encoded str
+	"""
+	return s.encode('utf-8') if isinstance(s, unicode) else s
@@ -1,27 +1,129 @@
 import json
+import threading
+from array import array
+from collections import deque
+from itertools import chain
+from csr_graph import CSRGraph
+from indexes import AttributeIndexes, insert_sorted, remove_sorted
+from loader import iter_file_records
+from nodes import Node
 from nodes import ActorNode
 from nodes import MovieNode
+from nodes import StringTable
+from rwlock import ReadWriteLock
+from snapshot import read_snapshot, write_snapshot
+
+# fields of each kind of record, with the value a new node gets when a record leaves one out
+ACTOR_DEFAULTS = {'age': 0, 'total_gross': 0, 'movies': []}
+MOVIE_DEFAULTS = {'year': 0, 'box_office': 0, 'actors': [], 'wiki_page': ''}
 
 class Graph(object):
 	""" Class to represent graph of ActorNodes and MovieNodes
 	"""
 
-	def __init__(self, actors_and_movies_json):
+	def __init__(self, actors_and_movies_json=None, indexed_edges=True):
 		""" Constructor.
 
-		:param actors_and_movies_json: JSON file of actor and wikipedia data from scraper.
+		:param actors_and_movies_json: JSON (or line-delimited .ndjson) file of actor and wikipedia data from scraper, None for an empty graph.
+
+		:param indexed_edges: build edges from name indexes (default) instead of checking every actor/movie pair.
 
 		"""
 		self.actor_vertices = set()
 		self.movie_vertices = set()
 		self.name_to_movie_node = {}
 		self.name_to_actor_node = {}
-		# read the JSON file into a dictionary
-		with open(actors_and_movies_json) as f:
-			d = json.load(f)
-		# initialize the nodes and edges of the graph
-		self.add_nodes(d)
-		self.add_edges()
+		# every node ever added, indexed by node id
+		self.nodes = []
+		# names held by the nodes, shared between them and dropped when the last node holding one changes
+		self.strings = StringTable()
+		# co-star projection, built on first use and then kept up to date as edges change
+		self.costars = None
+		# (co-star counts, actor nodes) sorted by count then node id, built on first use and kept up to date
+		self.hub_ranking = None
+		# sorted attribute indexes, built on first use and kept up to date as nodes change
+		self.attribute_indexes = None
+		# connected component labels, built on first use and kept while nodes and edges are only added within
+		# components, dropped when components may merge or split
+		self.components = None
+		# nodes listing each name in their movies/actors lists, built on first write and kept up to date
+		self.name_listings = None
+		# held by threads sharing the graph, readers while they query it and writers while they change it, the
+		# graph does not take it itself
+		self.lock = ReadWriteLock()
+		# taken to build the costars, hub ranking, components and attribute indexes on first use, so concurrent
+		# readers build each once and only ever see it finished, writers keep them up to date under the write lock
+		self.build_lock = threading.RLock()
+		if actors_and_movies_json is None:
+			return
+		# stream the records so the whole file is never held in memory, then link the nodes
+		self.add_records(iter_file_records(actors_and_movies_json))
+		self.add_edges(indexed_edges)
+
+	@classmethod
+	def from_data(cls, d, indexed_edges=True):
+		""" build a graph from data that has already been loaded
+
+		:param d: list of actor and movie dictionaries, same format as the JSON file.
+
+		:param indexed_edges: build edges from name indexes instead of checking every actor/movie pair.
+
+		:return: the new graph
+
+		"""
+		graph = cls()
+		graph.add_nodes(d)
+		graph.add_edges(indexed_edges)
+		return graph
+
+	@classmethod
+	def from_snapshot(cls, filename):
+		""" build a graph from a binary snapshot, using its prebuilt adjacency instead of matching names
+
+		:param filename: snapshot file written by write_snapshot
+
+		:return: the new graph
+
+		"""
+		csr = read_snapshot(filename)
+		graph = cls()
+		# decode each string of the table once, the nodes share the decoded copies
+		strings = [graph.strings.intern(csr.get_string(i)) for i in xrange(len(csr.string_offsets) - 1)]
+		node_names = csr.node_names.tolist()
+		list_offsets = csr.list_offsets.tolist()
+		list_items = csr.list_items.tolist()
+
+		def get_list(node_id):
+			return [strings[i] for i in list_items[list_offsets[node_id]:list_offsets[node_id + 1]]]
+
+		ages, total_gross = csr.ages.tolist(), csr.total_gross.tolist()
+		for actor_id in xrange(csr.num_actors):
+			name = strings[node_names[actor_id]]
+			graph.insert_actor_node(name, ActorNode.from_fields(name, ages[actor_id], get_list(actor_id),
+																total_gross[actor_id]))
+		years, box_office, wiki_pages = csr.years.tolist(), csr.box_office.tolist(), csr.wiki_pages.tolist()
+		for column in xrange(csr.num_movies):
+			movie_id = csr.num_actors + column
+			name = strings[node_names[movie_id]]
+			graph.insert_movie_node(name, MovieNode.from_fields(name, years[column], box_office[column],
+																get_list(movie_id), strings[wiki_pages[column]]))
+		offsets, indices = csr.offsets.tolist(), csr.indices.tolist()
+		for actor_id in xrange(csr.num_actors):
+			actor_node = graph.nodes[actor_id]
+			for movie_id in indices[offsets[actor_id]:offsets[actor_id + 1]]:
+				actor_node.links.append(graph.nodes[movie_id])
+				graph.nodes[movie_id].links.append(actor_node)
+		return graph
+
+	def write_snapshot(self, filename):
+		""" write graph to a binary snapshot file
+
+		:param filename: file to store the snapshot in
+
+		"""
+		by_id = lambda node: node.node_id
+		write_snapshot(CSRGraph.from_nodes(sorted(self.actor_vertices, key=by_id),
+										   sorted(self.movie_vertices, key=by_id)), filename)
 
 	def add_nodes(self, d):
 		""" add ActorNode for each actor and movie in data
@@ -29,87 +131,766 @@ class Graph(object):
 		:param d: dictionary containing data from scraper.
 
 		"""
-
 		# create the actor and movie nodes
 		for actor in d[0]:
-			actor_node = ActorNode(d[0][actor])
-			self.actor_vertices.add(actor_node)
-			self.name_to_actor_node[actor] = actor_node
+			self.add_actor_node(actor, d[0][actor])
 		# create the movie nodes
 		for movie in d[1]:
-			movie_node = MovieNode(d[1][movie])
-			self.movie_vertices.add(movie_node)
-			self.name_to_movie_node[movie] = movie_node
+			self.add_movie_node(movie, d[1][movie])
+
+	def add_records(self, records):
+		""" add a node for each record as it is read
+
+		:param records: iterable of (kind, name, data) where kind is 'actor' or 'movie'
+
+		"""
+		for kind, name, data in records:
+			if kind == 'actor':
+				self.add_actor_node(name, data)
+			else:
+				self.add_movie_node(name, data)
+
+	def add_actor_node(self, name, actor):
+		""" add an ActorNode (without edges)
+
+		:param name: name to store the actor under
+
+		:param actor: dictionary containing data on an actor
+
+		:return: the new node
+
+		"""
+		return self.insert_actor_node(name, ActorNode(actor, self.strings))
+
+	def insert_actor_node(self, name, actor_node):
+		""" add an ActorNode that has been made already (without edges)
+
+		:param name: name to store the actor under
+
+		:param actor_node: node to add, its strings already shared through the graph's StringTable
+
+		:return: the node
+
+		"""
+		self.add_node_id(actor_node)
+		self.actor_vertices.add(actor_node)
+		self.name_to_actor_node[name] = actor_node
+		if self.attribute_indexes is not None:
+			self.attribute_indexes.add_actor(actor_node)
+		if self.costars is not None:
+			self.costars[actor_node] = {}
+			if self.hub_ranking is not None:
+				insert_sorted(self.hub_ranking[0], self.hub_ranking[1], 0, actor_node)
+		if self.name_listings is not None:
+			self.update_listings(actor_node, actor_node.movies, 1)
+		return actor_node
 
-	def add_edges(self):
+	def add_movie_node(self, name, movie):
+		""" add a MovieNode (without edges)
+
+		:param name: name to store the movie under
+
+		:param movie: movie data stored in dictionary
+
+		:return: the new node
+
+		"""
+		return self.insert_movie_node(name, MovieNode(movie, self.strings))
+
+	def insert_movie_node(self, name, movie_node):
+		""" add a MovieNode that has been made already (without edges)
+
+		:param name: name to store the movie under
+
+		:param movie_node: node to add, its strings already shared through the graph's StringTable
+
+		:return: the node
+
+		"""
+		self.add_node_id(movie_node)
+		self.movie_vertices.add(movie_node)
+		self.name_to_movie_node[name] = movie_node
+		if self.attribute_indexes is not None:
+			self.attribute_indexes.add_movie(movie_node)
+		if self.name_listings is not None:
+			self.update_listings(movie_node, movie_node.actors, 1)
+		return movie_node
+
+	def add_node_id(self, node):
+		""" give node the next integer id, used to index per-node state during traversals
+
+		:param node: node being added to the graph
+
+		"""
+		node.node_id = len(self.nodes)
+		self.nodes.append(node)
+		# a new node is a component of its own
+		if self.components is not None:
+			labels, sizes = self.components
+			labels.append(len(sizes))
+			sizes.append(1)
+
+	def add_edges(self, indexed=True):
 		""" create edges between MovieNodes and ActorNodes if actor appeared in movie.
 
+		:param indexed: only link the pairs named in the movies/actors lists, otherwise check every pair.
+
+		"""
+		if not indexed:
+			self.add_edges_all_pairs()
+			return
+		# index nodes by name so each listed name is resolved with a single lookup
+		actors_by_name = index_by_name(self.actor_vertices)
+		movies_by_name = index_by_name(self.movie_vertices)
+		# collect each actor's movies from both lists first, so every edge is linked once
+		movies_of_actor = {}
+		for actor_node in self.actor_vertices:
+			for movie_name in actor_node.movies:
+				for movie_node in movies_by_name.get(movie_name, ()):
+					movies_of_actor.setdefault(actor_node, set()).add(movie_node)
+		for movie_node in self.movie_vertices:
+			for actor_name in movie_node.actors:
+				for actor_node in actors_by_name.get(actor_name, ()):
+					movies_of_actor.setdefault(actor_node, set()).add(movie_node)
+		for actor_node, movie_nodes in movies_of_actor.iteritems():
+			linked = set(actor_node.links)
+			for movie_node in movie_nodes:
+				if movie_node not in linked:
+					actor_node.links.append(movie_node)
+					movie_node.links.append(actor_node)
+		# edges were linked directly, the projection and components are rebuilt on next use
+		self.costars = None
+		self.components = None
+		self.hub_ranking = None
+
+	def add_edges_all_pairs(self):
+		""" create edges by checking every actor against every movie (slow, kept for comparison).
+
 		"""
 		for actor_node in self.actor_vertices:
 			for movie_node in self.movie_vertices:
 				movie_node.add_neighbor(actor_node)
 				actor_node.add_neighbor(movie_node)
+		# edges were added behind the projection's back
+		self.costars = None
+		self.components = None
+		self.hub_ranking = None
+
+	def add_edge(self, actor_node, movie_node):
+		""" link actor_node and movie_node in both directions
+
+		:param actor_node: actor that appeared in the movie
+
+		:param movie_node: movie the actor appeared in
+
+		"""
+		if movie_node in actor_node.links:
+			return
+		# weight of edge (age of actor times gross of movie) is derived from the nodes
+		actor_node.links.append(movie_node)
+		movie_node.links.append(actor_node)
+		self.edge_added(actor_node, movie_node)
+
+	def remove_edge(self, actor_node, movie_node):
+		""" unlink actor_node and movie_node
+
+		:param actor_node: actor that appeared in the movie
+
+		:param movie_node: movie the actor appeared in
+
+		"""
+		if movie_node not in actor_node.links:
+			return
+		actor_node.links.remove(movie_node)
+		movie_node.links.remove(actor_node)
+		self.edge_removed(actor_node, movie_node)
+
+	def edge_added(self, actor_node, movie_node):
+		""" bring the components and co-star projection up to date after an edge was linked
+
+		:param actor_node: actor that was linked
+
+		:param movie_node: movie that was linked
+
+		"""
+		if self.components is not None:
+			labels = self.components[0]
+			if labels[actor_node.node_id] != labels[movie_node.node_id]:
+				self.components = None
+		if self.costars is not None:
+			self.update_costars(actor_node, movie_node, 1)
+
+	def edge_removed(self, actor_node, movie_node, cast=None):
+		""" bring the components and co-star projection up to date after an edge was unlinked
+
+		:param actor_node: actor that was unlinked
+
+		:param movie_node: movie that was unlinked
+
+		:param cast: actors left in the movie, None for its current links
+
+		"""
+		# the component may have split
+		self.components = None
+		if self.costars is not None:
+			self.update_costars(actor_node, movie_node, -1, cast)
+
+	def get_name_listings(self):
+		""" get the nodes that list each name, so a write can find its edges without scanning the graph
+
+		:return: (movie name -> set of actor nodes listing it, actor name -> set of movie nodes listing it)
+
+		"""
+		if self.name_listings is None:
+			self.name_listings = ({}, {})
+			for node in self.actor_vertices:
+				self.update_listings(node, node.movies, 1)
+			for node in self.movie_vertices:
+				self.update_listings(node, node.actors, 1)
+		return self.name_listings
+
+	def update_listings(self, node, names, change):
+		""" add or remove node from the listings of the names in its movies/actors list
+
+		:param node: actor or movie node
+
+		:param names: names node lists
+
+		:param change: 1 to add, -1 to remove
+
+		"""
+		listings = self.name_listings[0 if isinstance(node, ActorNode) else 1]
+		for name in names:
+			if change > 0:
+				listings.setdefault(name, set()).add(node)
+			else:
+				nodes = listings.get(name)
+				if nodes is not None:
+					nodes.discard(node)
+					if not nodes:
+						del listings[name]
+
+	def relink_actor(self, actor_node):
+		""" make the edges of actor_node match the movies it lists and the movies listing it
+
+		:param actor_node: actor whose edges may be out of date
+
+		"""
+		movies_listing = self.get_name_listings()[1]
+		wanted = set(movies_listing.get(actor_node.name, ()))
+		for movie_name in actor_node.movies:
+			movie_node = self.name_to_movie_node.get(movie_name)
+			if movie_node is not None:
+				wanted.add(movie_node)
+		# compare against the current edges once, rather than searching the links for each movie
+		linked = set(actor_node.links)
+		if not linked.issubset(wanted):
+			actor_node.links = [movie_node for movie_node in actor_node.links if movie_node in wanted]
+			for movie_node in linked.difference(wanted):
+				movie_node.links.remove(actor_node)
+				self.edge_removed(actor_node, movie_node)
+		for movie_node in wanted.difference(linked):
+			actor_node.links.append(movie_node)
+			movie_node.links.append(actor_node)
+			self.edge_added(actor_node, movie_node)
+
+	def relink_movie(self, movie_node):
+		""" make the edges of movie_node match the actors it lists and the actors listing it
+
+		:param movie_node: movie whose edges may be out of date
+
+		"""
+		actors_listing = self.get_name_listings()[0]
+		wanted = set(actors_listing.get(movie_node.name, ()))
+		for actor_name in movie_node.actors:
+			actor_node = self.name_to_actor_node.get(actor_name)
+			if actor_node is not None:
+				wanted.add(actor_node)
+		# compare against the current edges once, rather than searching the links for each actor
+		linked = set(movie_node.links)
+		if not linked.issubset(wanted):
+			removed = [actor_node for actor_node in movie_node.links if actor_node not in wanted]
+			movie_node.links = [actor_node for actor_node in movie_node.links if actor_node in wanted]
+			for i, actor_node in enumerate(removed):
+				actor_node.links.remove(movie_node)
+				# the actors unlinked after this one are still in the cast it leaves
+				self.edge_removed(actor_node, movie_node, chain(movie_node.links, removed[i + 1:]))
+		for actor_node in wanted.difference(linked):
+			actor_node.links.append(movie_node)
+			movie_node.links.append(actor_node)
+			self.edge_added(actor_node, movie_node)
+
+	def check_actor(self, actor, name=None):
+		""" check an actor can be added, or updated when name is given, without changing anything
+
+		:param actor: dictionary of actor data, or of fields to change
+
+		:param name: name of the actor to update, None to add actor
+
+		:return: dictionary of the node fields in actor, raises KeyError if there is no actor to update and
+			ValueError if actor is invalid
+
+		"""
+		return check_record(actor, name, self.name_to_actor_node, ACTOR_DEFAULTS)
+
+	def check_movie(self, movie, name=None):
+		""" check a movie can be added, or updated when name is given, without changing anything
+
+		:param movie: dictionary of movie data, or of fields to change
+
+		:param name: name of the movie to update, None to add movie
+
+		:return: dictionary of the node fields in movie, raises KeyError if there is no movie to update and
+			ValueError if movie is invalid
+
+		"""
+		return check_record(movie, name, self.name_to_movie_node, MOVIE_DEFAULTS)
+
+	def add_actor(self, actor):
+		""" add an actor and link it to its movies, costs O(degree)
+
+		:param actor: dictionary of actor data, fields left out get default values
+
+		:return: the new node, raises ValueError if the actor exists or a field has the wrong type
+
+		"""
+		record = dict(ACTOR_DEFAULTS, **self.check_actor(actor))
+		name = record['name'] = actor['name']
+		self.get_name_listings()
+		actor_node = self.add_actor_node(name, record)
+		self.relink_actor(actor_node)
+		return actor_node
+
+	def add_movie(self, movie):
+		""" add a movie and link it to its actors, costs O(degree)
+
+		:param movie: dictionary of movie data, fields left out get default values
+
+		:return: the new node, raises ValueError if the movie exists or a field has the wrong type
+
+		"""
+		record = dict(MOVIE_DEFAULTS, **self.check_movie(movie))
+		name = record['name'] = movie['name']
+		self.get_name_listings()
+		movie_node = self.add_movie_node(name, record)
+		self.relink_movie(movie_node)
+		return movie_node
+
+	def update_actor(self, name, changes):
+		""" change fields of an actor, relinking it if its movies changed, costs O(degree)
+
+		:param name: name of the actor
+
+		:param changes: dictionary of fields to change
+
+		:return: the node, raises KeyError if there is no such actor and ValueError if a change is invalid
+
+		"""
+		fields = self.check_actor(changes, name)
+		actor_node = self.name_to_actor_node[name]
+		if 'age' in fields or 'total_gross' in fields:
+			if self.attribute_indexes is not None:
+				self.attribute_indexes.remove_actor(actor_node)
+			actor_node.age = fields.get('age', actor_node.age)
+			actor_node.total_gross = fields.get('total_gross', actor_node.total_gross)
+			if self.attribute_indexes is not None:
+				self.attribute_indexes.add_actor(actor_node)
+		if 'movies' in fields:
+			self.get_name_listings()
+			self.update_listings(actor_node, actor_node.movies, -1)
+			old_movies = actor_node.movies
+			actor_node.movies = self.strings.intern_all(fields['movies'])
+			self.update_listings(actor_node, actor_node.movies, 1)
+			self.release_strings(old_movies)
+			self.relink_actor(actor_node)
+		return actor_node
+
+	def update_movie(self, name, changes):
+		""" change fields of a movie, relinking it if its actors changed, costs O(degree)
+
+		:param name: name of the movie
+
+		:param changes: dictionary of fields to change
+
+		:return: the node, raises KeyError if there is no such movie and ValueError if a change is invalid
+
+		"""
+		fields = self.check_movie(changes, name)
+		movie_node = self.name_to_movie_node[name]
+		if 'year' in fields:
+			if self.attribute_indexes is not None:
+				self.attribute_indexes.remove_movie(movie_node)
+			movie_node.year = fields['year']
+			if self.attribute_indexes is not None:
+				self.attribute_indexes.add_movie(movie_node)
+		movie_node.gross = fields.get('box_office', movie_node.gross)
+		movie_node.wiki_page = fields.get('wiki_page', movie_node.wiki_page)
+		if 'actors' in fields:
+			self.get_name_listings()
+			self.update_listings(movie_node, movie_node.actors, -1)
+			old_actors = movie_node.actors
+			movie_node.actors = self.strings.intern_all(fields['actors'])
+			self.update_listings(movie_node, movie_node.actors, 1)
+			self.release_strings(old_actors)
+			self.relink_movie(movie_node)
+		return movie_node
+
+	def remove_actor(self, name):
+		""" remove an actor and its edges, costs O(degree)
+
+		:param name: name of the actor, raises KeyError if there is no such actor
+
+		"""
+		actor_node = self.name_to_actor_node.pop(name)
+		self.get_name_listings()
+		while actor_node.links:
+			movie_node = actor_node.links.pop()
+			movie_node.links.remove(actor_node)
+			self.edge_removed(actor_node, movie_node)
+		self.remove_node(actor_node)
+		self.actor_vertices.discard(actor_node)
+		if self.attribute_indexes is not None:
+			self.attribute_indexes.remove_actor(actor_node)
+		if self.costars is not None:
+			if self.hub_ranking is not None:
+				remove_sorted(self.hub_ranking[0], self.hub_ranking[1], len(self.costars[actor_node]), actor_node)
+			del self.costars[actor_node]
+		self.update_listings(actor_node, actor_node.movies, -1)
+		self.release_strings([actor_node.name] + actor_node.movies)
+
+	def remove_movie(self, name):
+		""" remove a movie and its edges, costs O(degree)
+
+		:param name: name of the movie, raises KeyError if there is no such movie
+
+		"""
+		movie_node = self.name_to_movie_node.pop(name)
+		self.get_name_listings()
+		while movie_node.links:
+			actor_node = movie_node.links.pop()
+			actor_node.links.remove(movie_node)
+			self.edge_removed(actor_node, movie_node)
+		self.remove_node(movie_node)
+		self.movie_vertices.discard(movie_node)
+		if self.attribute_indexes is not None:
+			self.attribute_indexes.remove_movie(movie_node)
+		self.update_listings(movie_node, movie_node.actors, -1)
+		self.release_strings([movie_node.name] + movie_node.actors)
+
+	def remove_node(self, node):
+		""" free the id of a node leaving the graph, other ids stay the same
+
+		:param node: node being removed
+
+		"""
+		self.nodes[node.node_id] = None
+		self.components = None
+
+	def release_strings(self, names):
+		""" drop names from the string table once no node is called or lists them, called after a write
+
+		:param names: names a node stopped holding
+
+		"""
+		actors_listing, movies_listing = self.name_listings
+		for name in names:
+			if not (name in self.name_to_actor_node or name in self.name_to_movie_node or name in actors_listing or
+					name in movies_listing):
+				self.strings.discard(name)
+
+	def get_costars(self):
+		""" get the actor-actor co-star projection of the graph
+
+		:return: dictionary mapping each actor node to a dictionary of co-star node to number of shared movies
+
+		"""
+		projection = self.costars
+		if projection is None:
+			with self.build_lock:
+				projection = self.costars
+				if projection is None:
+					projection = dict((actor_node, {}) for actor_node in self.actor_vertices)
+					for movie_node in self.movie_vertices:
+						cast = movie_node.links
+						for actor_node in cast:
+							costars = projection[actor_node]
+							for other_node in cast:
+								if other_node is not actor_node:
+									costars[other_node] = costars.get(other_node, 0) + 1
+					self.costars = projection
+		return projection
+
+	def update_costars(self, actor_node, movie_node, change, cast=None):
+		""" add or remove the co-star pairs between actor_node and the rest of the cast of movie_node
+
+		:param actor_node: actor that was linked or unlinked
+
+		:param movie_node: movie the actor was linked to or unlinked from
+
+		:param change: 1 when the edge was added, -1 when removed
+
+		:param cast: the rest of the cast, None for the links of movie_node
+
+		"""
+		costars = self.costars.setdefault(actor_node, {})
+		connections = len(costars)
+		for other_node in (movie_node.links if cast is None else cast):
+			if other_node is actor_node:
+				continue
+			other_costars = self.costars.setdefault(other_node, {})
+			other_connections = len(other_costars)
+			for node, pairs in ((other_node, costars), (actor_node, other_costars)):
+				count = pairs.get(node, 0) + change
+				if count > 0:
+					pairs[node] = count
+				else:
+					pairs.pop(node, None)
+			self.rerank_hub(other_node, other_connections)
+		self.rerank_hub(actor_node, connections)
+
+	def rerank_hub(self, actor_node, connections):
+		""" move an actor in the hub ranking after its number of co-stars changed
+
+		:param actor_node: actor whose co-stars changed
+
+		:param connections: number of co-stars the actor had before
+
+		"""
+		if self.hub_ranking is None or len(self.costars[actor_node]) == connections:
+			return
+		counts, actors = self.hub_ranking
+		remove_sorted(counts, actors, connections, actor_node)
+		insert_sorted(counts, actors, len(self.costars[actor_node]), actor_node)
+
+	def get_actor_connections(self, actor):
+		""" get number of actors an actor has worked with, from the co-star projection
+
+		:param actor: actor node or name
+
+		:return: number of actors this actor has been in a movie with
+
+		"""
+		return len(self.get_costars().get(self.get_node(actor), ()))
 
 
 	def dfs_traversal(self):
 		""" perform a DFS traversel of graph
 
+		:return: list of nodes in the order they were visited
+
 		"""
-		# reset visited flags
-		for actor_node in self.actor_vertices:
-				actor_node.visited = False
-		for movie_node in self.movie_vertices:
-				movie_node.visited = False
+		# visited flags live here rather than on the nodes, so traversals can run at the same time
+		visited = bytearray(len(self.nodes))
+		order = []
 		# call DFS on all nodes since might not be connected
-		for actor_node in self.actor_vertices:
-			if not actor_node.visited:
-				self.dfs_helper(actor_node)
-		for movie_node in self.movie_vertices:
-			if not movie_node.visited:
-				self.dfs_helper(movie_node)
+		for node in self.nodes:
+			if node is not None and not visited[node.node_id]:
+				self.dfs_helper(node, visited, order)
+		return order
+
+	def dfs_helper(self, node, visited, order):
+		""" Helper function for DFS, iterative so long chains cannot hit the recursion limit
 
-	def dfs_helper(self, node):
-		""" Helper function for DFS
+		:param node: node to start from
+
+		:param visited: flags indexed by node id, updated in place
+
+		:param order: list the visited nodes are appended to
 
 		"""
-		node.visited = True  # we've now visited node
-		# visit neighbors if not visited
-		for neighbor_node in node.neighbors.keys():
-			if not neighbor_node.visited:
-				self.dfs_helper(neighbor_node)
+		stack = [node]
+		while len(stack) > 0:
+			node = stack.pop()
+			if visited[node.node_id]:
+				continue
+			visited[node.node_id] = 1  # we've now visited node
+			order.append(node)
+			# visit neighbors if not visited
+			for neighbor_node in reversed(node.links):
+				if not visited[neighbor_node.node_id]:
+					stack.append(neighbor_node)
+
+	def connected_components(self):
+		""" label every node with the connected component it is in
+
+		:return: array of component ids indexed by node id (-1 for removed nodes), and the size of each component
+
+		"""
+		components = self.components
+		if components is None:
+			with self.build_lock:
+				components = self.components
+				if components is None:
+					components = self.components = self.label_components()
+		return components
+
+	def label_components(self):
+		""" label every node with the connected component it is in, by depth first search
+
+		:return: array of component ids indexed by node id (-1 for removed nodes), and the size of each component
+
+		"""
+		labels = array('i', [-1]) * len(self.nodes)
+		sizes = []
+		visited = bytearray(len(self.nodes))
+		for node in self.nodes:
+			if node is None or visited[node.node_id]:
+				continue
+			component = []
+			self.dfs_helper(node, visited, component)
+			for member in component:
+				labels[member.node_id] = len(sizes)
+			sizes.append(len(component))
+		return labels, sizes
+
+	def are_connected(self, node, other):
+		""" check if there is any path between two nodes
+
+		:param node: node or name
+
+		:param other: node or name
+
+		:return: True if both nodes are in the same connected component
+
+		"""
+		node = self.get_node(node)
+		other = self.get_node(other)
+		if node is None or other is None:
+			return False
+		labels, _ = self.connected_components()
+		return labels[node.node_id] == labels[other.node_id]
+
+	def in_other_components(self, start, targets):
+		""" check whether no target can be reached from start, using the components only if they are already known
+
+		:param start: node a search starts from
+
+		:param targets: nodes the search stops at
+
+		:return: True if every target is in another component, False if one may be reachable
 
-	def bfs(self, node, target):
+		"""
+		# a search after a write is not worth labelling the whole graph for
+		components = self.components
+		if components is None:
+			return False
+		labels = components[0]
+		return all(labels[start.node_id] != labels[target_node.node_id] for target_node in targets)
+
+	def get_node(self, node):
+		""" look up a node, accepting either the node itself or its name
+
+		:param node: a node, or the name of an actor or movie
+
+		:return: the node, or None if no such node is in the graph
+
+		"""
+		if isinstance(node, Node):
+			return node
+		actor_node = self.name_to_actor_node.get(node)
+		if actor_node is not None:
+			return actor_node
+		return self.name_to_movie_node.get(node)
+
+	def get_target_nodes(self, target):
+		""" get all nodes a search for target should stop at
+
+		:param target: a node, or a name (matches both an actor and a movie with that name)
+
+		:return: set of matching nodes
+
+		"""
+		if isinstance(target, Node):
+			return set([target])
+		targets = set()
+		for name_to_node in (self.name_to_actor_node, self.name_to_movie_node):
+			if target in name_to_node:
+				targets.add(name_to_node[target])
+		return targets
+
+	def bfs(self, node, target, return_path=False):
 		"""
 		do a BFS search for target starting from node
 
-		:param node: node to start search from
+		:param node: node (or name of node) to start search from
+
+		:param target: node (or name of node) to search for
 
-		:param target: node to search for
+		:param return_path: also return the names along the path found (actor, movie, actor, ...)
 
-		:return: the depth of the search when node is found, ignore movie nodes
+		:return: the depth of the search when node is found, ignore movie nodes. -1 if target cannot be reached.
+			If return_path is set, a tuple of the depth and the path (None when not found).
 
 		"""
-		# store a list of seen nodes and queue of active nodes
-		seen = set()
-		queue = [None, node]
+		start = self.get_node(node)
+		targets = self.get_target_nodes(target)
+		if start is None or len(targets) == 0:
+			return search_result(-1, None, return_path)
+		if start in targets:
+			return search_result(0, [start.name], return_path)
+		if self.in_other_components(start, targets):
+			return search_result(-1, None, return_path)
+		# nodes are marked when they are enqueued, so each is enqueued at most once
+		parents = {start: (None, 0)}
+		queue = deque([start])
 		depth = 0
 		while len(queue) > 0:
-			curr_node = queue.pop()
-			# end of current level
-			if curr_node is None:
-				depth += 1
-				queue.insert(0, None)
-				# could not find in the graph
-				if queue[-1] is None:
-					return -1
-				continue
-			# found target, return level
-			if curr_node.name == target:
-				return int(depth/2) # we don't want to count steps on movie nodes
-			seen.add(curr_node)
-			for next_node in curr_node.neighbors.keys():
-				if next_node not in seen:
-					queue.insert(0, next_node)
+			depth += 1
+			# expand one full level of the search
+			for _ in xrange(len(queue)):
+				curr_node = queue.popleft()
+				for next_node in curr_node.links:
+					if next_node in parents:
+						continue
+					parents[next_node] = (curr_node, depth)
+					# found target, stop without expanding the rest of the level
+					if next_node in targets:
+						return search_result(depth, path_to(next_node, parents), return_path)
+					queue.append(next_node)
+		# could not find in the graph
+		return search_result(-1, None, return_path)
+
+	def bidirectional_bfs(self, node, target, return_path=False):
+		"""
+		do a BFS search from node and target at the same time, meeting in the middle
+
+		:param node: node (or name of node) to start search from
+
+		:param target: node (or name of node) to search for
+
+		:param return_path: also return the names along the path found (actor, movie, actor, ...)
+
+		:return: same as bfs
+
+		"""
+		start = self.get_node(node)
+		targets = self.get_target_nodes(target)
+		if start is None or len(targets) == 0:
+			return search_result(-1, None, return_path)
+		if start in targets:
+			return search_result(0, [start.name], return_path)
+		if self.in_other_components(start, targets):
+			return search_result(-1, None, return_path)
+		# each side maps the nodes it has seen to their parent and distance from its start
+		forward = {start: (None, 0)}
+		backward = dict((target_node, (None, 0)) for target_node in targets)
+		forward_frontier = [start]
+		backward_frontier = list(targets)
+		while len(forward_frontier) > 0 and len(backward_frontier) > 0:
+			# always grow the smaller side, that keeps both searches shallow
+			if len(forward_frontier) <= len(backward_frontier):
+				forward_frontier, meeting_node = expand_level(forward_frontier, forward, backward)
+			else:
+				backward_frontier, meeting_node = expand_level(backward_frontier, backward, forward)
+			if meeting_node is not None:
+				edges = forward[meeting_node][1] + backward[meeting_node][1]
+				path = None
+				if return_path:
+					# walk back to the start on one side and to the target on the other
+					path = path_to(meeting_node, forward) + path_to(meeting_node, backward)[::-1][1:]
+				return search_result(edges, path, return_path)
+		# could not find in the graph
+		return search_result(-1, None, return_path)
 
 	def to_json(self):
 		""" convert graph to JSON
@@ -117,14 +898,23 @@ class Graph(object):
 		:return: a dictionary holding graph data in JSON format
 
 		"""
-		d = [{}, {}]
-		for actor_name in self.name_to_actor_node.keys():
-			actor = self.name_to_actor_node[actor_name].to_json()
-			d[0][actor_name] = actor
-		for movie_name in self.name_to_movie_node.keys():
-			movie = self.name_to_movie_node[movie_name].to_json()
-			d[1][movie_name] = movie
-		return d
+		return [self.actors_to_json(), self.movies_to_json()]
+
+	def actors_to_json(self):
+		""" convert the actors of the graph to JSON, the records share their name strings and lists with the nodes
+
+		:return: dictionary of actor name to actor data
+
+		"""
+		return dict((actor_name, actor_node.to_json()) for actor_name, actor_node in self.name_to_actor_node.iteritems())
+
+	def movies_to_json(self):
+		""" convert the movies of the graph to JSON, the records share their name strings and lists with the nodes
+
+		:return: dictionary of movie name to movie data
+
+		"""
+		return dict((movie_name, movie_node.to_json()) for movie_name, movie_node in self.name_to_movie_node.iteritems())
 
 	def to_json_query(self, attr, val):
 		d = [{}, {}]
@@ -150,6 +940,21 @@ class Graph(object):
 		with open(filename, 'w') as f:
 			json.dump(d, f)
 
+	def get_attribute_indexes(self):
+		""" get the sorted year, age and gross indexes of the graph
+
+		:return: AttributeIndexes for the current nodes
+
+		"""
+		# read once, so the indexes returned are the ones checked
+		indexes = self.attribute_indexes
+		if indexes is None:
+			with self.build_lock:
+				indexes = self.attribute_indexes
+				if indexes is None:
+					indexes = self.attribute_indexes = AttributeIndexes(self.actor_vertices, self.movie_vertices)
+		return indexes
+
 	def get_oldest_X_actors(self, x):
 		""" sort the actors by age and return the top x
 		
@@ -161,7 +966,7 @@ class Graph(object):
 		# check for invalid param
 		if x == 0 or x < 0:
 			return []
-		actors = sorted(self.actor_vertices, key = lambda actor : actor.age)[-x:]
+		actors = self.get_attribute_indexes().get_oldest(x)
 		return [(actor.name, actor.age) for actor in actors]
 
 	def get_movies_from_year(self, year):
@@ -182,7 +987,7 @@ class Graph(object):
 		:return: a list containing movies objects from that year
 
 		"""
-		return [movie for movie in self.movie_vertices if movie.year == year]
+		return self.get_attribute_indexes().get_movies_from_year(year)
 
 	def get_actors_from_year(self ,year):
 		""" create list of all actors who appeared in a given year
@@ -196,7 +1001,7 @@ class Graph(object):
 		movies_from_year = self.get_movies_from_year_nodes(year)
 		# loop over movies from that year and get all actors
 		for movie in movies_from_year:
-			actors_from_year.update(set(movie.neighbors.keys()))
+			actors_from_year.update(movie.links)
 		return [actor.name for actor in actors_from_year]
 
 	def get_top_X_grossing_actors(self, x):
@@ -209,7 +1014,7 @@ class Graph(object):
 		# check for invalid param
 		if x == 0 or x < 0:
 			return []
-		actors = sorted(self.actor_vertices, key = lambda actor: actor.get_grossing_value())[-x:]
+		actors = self.get_attribute_indexes().get_top_grossing(x)
 		return [(actor.name, actor.get_grossing_value()) for actor in actors]
 
 	def get_hub_actors(self, i):
@@ -221,7 +1026,17 @@ class Graph(object):
 		"""
 		if i == 0 or i < 0:
 			return []
-		return sorted([(actor.name, actor.get_actor_connections()) for actor in self.actor_vertices], key=lambda x: x[1])[-i:]
+		# the ranking is kept up to date as the co-star projection changes
+		ranking = self.hub_ranking
+		if ranking is None:
+			with self.build_lock:
+				ranking = self.hub_ranking
+				if ranking is None:
+					costars = self.get_costars()
+					actors = sorted(self.actor_vertices, key=lambda actor: (len(costars[actor]), actor.node_id))
+					ranking = self.hub_ranking = ([len(costars[actor]) for actor in actors], actors)
+		counts, actors = ranking
+		return [(actor.name, count) for count, actor in zip(counts[-i:], actors[-i:])]
 
 	def get_gross_for_age_group(self, start, end):
 		""" get total gross value for all actors with age between start and end
@@ -231,7 +1046,7 @@ class Graph(object):
 		:return: sum of gross value for all actors in this age range.
 
 		"""
-		return sum([actor.get_grossing_value() for actor in self.actor_vertices if start <= actor.age <= end])
+		return self.get_attribute_indexes().sum_gross_age_range(start, end)
 
 	def get_actors_in_age_group(self, start, end):
 		""" Get number of actors in age group
@@ -240,5 +1055,135 @@ class Graph(object):
 		:return: number actors in this age range.
 
 		"""
-		return len([actor for actor in self.actor_vertices if start <= actor.age <= end])
+		return self.get_attribute_indexes().count_age_range(start, end)
+
+
+
+def check_record(record, name, name_to_node, defaults):
+	""" check a record can be added, or used to update the node called name
+
+	:param record: dictionary of actor or movie data, or of fields to change
+
+	:param name: name of the node to update, None to add record
+
+	:param name_to_node: name_to_actor_node or name_to_movie_node
+
+	:param defaults: ACTOR_DEFAULTS or MOVIE_DEFAULTS
+
+	:return: dictionary of the node fields in record, raises KeyError or ValueError if the write is invalid
+
+	"""
+	if name is None:
+		new_name = record.get('name')
+		if not isinstance(new_name, basestring) or new_name in name_to_node:
+			raise ValueError('record needs a new name')
+	else:
+		if name not in name_to_node:
+			raise KeyError(name)
+		if record.get('name', name) != name:
+			raise ValueError('records cannot be renamed')
+	return check_fields(record, defaults)
+
 
+def check_fields(record, defaults):
+	""" check the node fields of a record have the right types, other keys are ignored
+
+	:param record: dictionary of actor or movie data
+
+	:param defaults: ACTOR_DEFAULTS or MOVIE_DEFAULTS
+
+	:return: dictionary of the node fields in record, raises ValueError if one has the wrong type
+
+	"""
+	fields = {}
+	for key, default in defaults.iteritems():
+		if key not in record:
+			continue
+		value = record[key]
+		if isinstance(default, list):
+			valid = isinstance(value, list) and all(isinstance(item, basestring) for item in value)
+		elif isinstance(default, basestring):
+			valid = isinstance(value, basestring)
+		else:
+			valid = isinstance(value, (int, long)) and not isinstance(value, bool)
+		if not valid:
+			raise ValueError('%s has the wrong type' % key)
+		fields[key] = value
+	return fields
+
+
+def index_by_name(nodes):
+	""" group nodes by their name
+
+	:param nodes: iterable of nodes to index
+
+	:return: dictionary mapping each name to a list of nodes with that name
+
+	"""
+	index = {}
+	for node in nodes:
+		index.setdefault(node.name, []).append(node)
+	return index
+
+
+def expand_level(frontier, seen, other_seen):
+	""" expand one level of a bidirectional search
+
+	:param frontier: nodes at the current depth of this side of the search
+
+	:param seen: nodes seen by this side, mapped to (parent, distance)
+
+	:param other_seen: nodes seen by the other side, mapped to (parent, distance)
+
+	:return: the next frontier, and the node where the sides meet on the shortest path (None if they did not meet)
+
+	"""
+	next_frontier = []
+	meeting_node = None
+	for curr_node in frontier:
+		distance = seen[curr_node][1] + 1
+		for next_node in curr_node.links:
+			if next_node in seen:
+				continue
+			seen[next_node] = (curr_node, distance)
+			next_frontier.append(next_node)
+			# keep the meeting point with the shortest total path
+			if next_node in other_seen:
+				if meeting_node is None or other_seen[next_node][1] < other_seen[meeting_node][1]:
+					meeting_node = next_node
+	return next_frontier, meeting_node
+
+
+def path_to(node, parents):
+	""" follow parent links back from node to the start of a search
+
+	:param node: node the search reached
+
+	:param parents: nodes mapped to (parent, distance)
+
+	:return: names of the nodes from the start of the search to node
+
+	"""
+	path = []
+	while node is not None:
+		path.append(node.name)
+		node = parents[node][0]
+	return path[::-1]
+
+
+def search_result(edges, path, return_path):
+	""" format the result of a BFS search
+
+	:param edges: number of edges between start and target, -1 if not found
+
+	:param path: names along the path found
+
+	:param return_path: whether the path was requested
+
+	:return: the degree of separation (movie nodes not counted), with the path if requested
+
+	"""
+	depth = int(edges / 2) if edges > 0 else edges  # we don't want to count steps on movie nodes
+	if return_path:
+		return depth, path
+	return depth
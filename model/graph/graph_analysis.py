@@ -1,25 +1,21 @@
 from graph import Graph
+from separation import separation_histogram
+import multiprocessing
 import numpy as np
 import matplotlib.pyplot as plt
 
 
-def get_actor_seperations(g):
+def get_actor_seperations(g, workers=1):
 	""" get a list of seperation degree between all pairs of actors
 
 	:param g: graph to calc. seperation for
+	:param workers: number of processes to spread the searches over
 	:return: a list of seperations
 	"""
 	seperations = []
-	# loop over all pairs of actors
-	for actor1 in g.actor_vertices:
-		for actor2 in g.actor_vertices:
-			# don't calculate seperation between self and self
-			if actor1 == actor2:
-				continue
-			i = g.bfs(actor1, actor2.name)
-			j = g.bfs(actor2, actor1.name)
-			if i != -1:
-				seperations.append(i)
+	# one BFS per actor over the co-star graph, unreachable pairs are left out
+	for seperation, count in sorted(separation_histogram(g, workers).items()):
+		seperations.extend([seperation] * count)
 	return seperations
 
 
@@ -117,14 +113,14 @@ def plot_connections(g):
 
 	:param g: graph to create plot for
 	"""
-	connections = np.array([actor.get_actor_connections() for actor in g.actor_vertices])
+	connections = np.array([len(costars) for costars in g.get_costars().values()])
 	plt.boxplot(connections, showfliers=False)
 	plt.show()
 
 
 if __name__ == '__main__':
 	g = Graph('model/data/data.json')
-	seperation = get_actor_seperations(g)
+	seperation = get_actor_seperations(g, multiprocessing.cpu_count())
 	plot_seperations(seperation)
 	age_gross, age_counts = get_gross_all_age_groups(g)
 	generate_age_gross_plot(age_gross)
@@ -11,16 +11,16 @@ def generate_bipartite_graph(graph):
 	nx_graph = nx.Graph()
 	labels = {}
 	# loop over the top 5 actors
-	for actor_node in sorted(list(graph.actor_vertices), key=lambda x : len(x.neighbors.keys()))[-5:]:
+	for actor_node in sorted(list(graph.actor_vertices), key=lambda x : len(x.links))[-5:]:
 		nx_graph.add_node(actor_node.name, type='actor')
 		labels[actor_node.name] = actor_node.name + ": " + str(actor_node.age)
 		# loop over 5 of the movies these actors were in
-		for movie_node in actor_node.neighbors.keys()[:5]:
+		for movie_node in actor_node.links[:5]:
 			nx_graph.add_node(movie_node.name, type='movie')
 			nx_graph.add_edge(actor_node.name, movie_node.name)
 			labels[movie_node.name] = movie_node.name + ": " + str(movie_node.gross)
 			# add some actors who were also in this movie
-			for actor_node2 in movie_node.neighbors.keys()[:3]:
+			for actor_node2 in movie_node.links[:3]:
 				nx_graph.add_node(actor_node2.name, type='actor')
 				nx_graph.add_edge(actor_node2.name, movie_node.name)
 				labels[actor_node2.name] = actor_node2.name + ": " + str(actor_node2.age)
@@ -48,10 +48,10 @@ def generate_spring_graph_large(graph):
 	"""
 	nx_graph = nx.Graph()
 	# loop over top 150 actors
-	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.neighbors.keys()))[-150:]:
+	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.links))[-150:]:
 		nx_graph.add_node(actor_node.name, type='actor')
 		# loop over all movies they were in
-		for movie_node in actor_node.neighbors.keys():
+		for movie_node in actor_node.links:
 			nx_graph.add_node(movie_node.name, type='movie')
 			nx_graph.add_edge(actor_node.name, movie_node.name)
 
@@ -69,20 +69,20 @@ def generate_spring_graph_small(graph):
 	nx_graph = nx.Graph()
 	labels = {}
 	# loop over bottom 200 actors
-	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.neighbors.keys()))[:200]:
+	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.links))[:200]:
 		nx_graph.add_node(actor_node.name, type='actor')
 		labels[actor_node.name] = ""
 		# loop over neighboring actors
-		for movie_node in actor_node.neighbors.keys():
+		for movie_node in actor_node.links:
 			labels[movie_node.name] = ""
 			nx_graph.add_node(movie_node.name, type='movie')
 			nx_graph.add_edge(actor_node.name, movie_node.name)
 
 	# add bruce willis seperately
-	bruce_willis = sorted(list(graph.actor_vertices), key=lambda x: len(x.neighbors.keys()))[-1]
+	bruce_willis = sorted(list(graph.actor_vertices), key=lambda x: len(x.links))[-1]
 	nx_graph.add_node(bruce_willis.name, type='actor')
 	labels[bruce_willis.name] = "BRUCE WILLIS"
-	for movie_node in bruce_willis.neighbors.keys():
+	for movie_node in bruce_willis.links:
 		labels[movie_node.name] = ""
 		nx_graph.add_node(movie_node.name, type='movie')
 		nx_graph.add_edge(bruce_willis.name, movie_node.name)
@@ -101,16 +101,16 @@ def generate_spring_graph_subset(graph):
 	nx_graph = nx.Graph()
 	labels = {}
 	# select "mid-size" actors
-	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.neighbors.keys()))[-35:-30]:
+	for actor_node in sorted(list(graph.actor_vertices), key=lambda x: len(x.links))[-35:-30]:
 		nx_graph.add_node(actor_node.name, type='actor')
 		labels[actor_node.name] = actor_node.name + ": " + str(actor_node.age)
 		# add movies these actors were in
-		for movie_node in actor_node.neighbors.keys():
+		for movie_node in actor_node.links:
 			nx_graph.add_node(movie_node.name, type='movie')
 			nx_graph.add_edge(actor_node.name, movie_node.name)
 			labels[movie_node.name] = movie_node.name + ": " + str(movie_node.gross)
 			# add a few actors from these movies
-			for actor_node2 in movie_node.neighbors.keys()[:3]:
+			for actor_node2 in movie_node.links[:3]:
 				nx_graph.add_node(actor_node2.name, type='actor')
 				nx_graph.add_edge(actor_node2.name, movie_node.name)
 				labels[actor_node2.name] = actor_node2.name + ": " + str(actor_node2.age)
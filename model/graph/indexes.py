@@ -0,0 +1,237 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class AttributeIndexes(object):
+	""" Sorted indexes over actor and movie attributes, used for range and top-k queries
+
+	Nodes are added and removed as the graph changes, a node must be removed before its attributes change and added
+	again afterwards.
+
+	"""
+
+	def __init__(self, actor_vertices, movie_vertices):
+		""" Constructor.
+
+		:param actor_vertices: actor nodes to index
+		:param movie_vertices: movie nodes to index
+
+		"""
+		# movies grouped by year
+		self.movies_by_year = {}
+		for movie_node in movie_vertices:
+			self.movies_by_year.setdefault(movie_node.year, []).append(movie_node)
+		# actors sorted by age then node id, ages[i] is the age of actors_by_age[i]
+		self.actors_by_age = sorted(actor_vertices, key=lambda actor: (actor.age, actor.node_id))
+		self.ages = [actor.age for actor in self.actors_by_age]
+		# total gross of the actors of each age, with the distinct ages sorted for range sums
+		self.gross_by_age = {}
+		for actor_node in self.actors_by_age:
+			self.gross_by_age[actor_node.age] = self.gross_by_age.get(actor_node.age, 0) + actor_node.get_grossing_value()
+		self.distinct_ages = sorted(self.gross_by_age)
+		# Fenwick tree of the totals over the positions in distinct_ages, rebuilt whenever an age is added or removed
+		# since that moves the positions, so reads never build it
+		self.gross_tree = None
+		self.build_gross_tree()
+		# actors sorted by gross then node id, grosses[i] is the gross of actors_by_gross[i]
+		self.actors_by_gross = sorted(actor_vertices, key=lambda actor: (actor.get_grossing_value(), actor.node_id))
+		self.grosses = [actor.get_grossing_value() for actor in self.actors_by_gross]
+
+	def add_actor(self, actor_node):
+		""" index an actor
+
+		:param actor_node: actor to add
+
+		"""
+		insert_sorted(self.ages, self.actors_by_age, actor_node.age, actor_node)
+		insert_sorted(self.grosses, self.actors_by_gross, actor_node.get_grossing_value(), actor_node)
+		if actor_node.age not in self.gross_by_age:
+			self.gross_by_age[actor_node.age] = actor_node.get_grossing_value()
+			insort(self.distinct_ages, actor_node.age)
+			self.build_gross_tree()
+		else:
+			self.gross_by_age[actor_node.age] += actor_node.get_grossing_value()
+			self.update_gross_tree(actor_node.age, actor_node.get_grossing_value())
+
+	def remove_actor(self, actor_node):
+		""" drop an actor, with the attributes it was indexed with
+
+		:param actor_node: actor to remove
+
+		"""
+		remove_sorted(self.ages, self.actors_by_age, actor_node.age, actor_node)
+		remove_sorted(self.grosses, self.actors_by_gross, actor_node.get_grossing_value(), actor_node)
+		self.gross_by_age[actor_node.age] -= actor_node.get_grossing_value()
+		if self.count_age_range(actor_node.age, actor_node.age) == 0:
+			del self.gross_by_age[actor_node.age]
+			del self.distinct_ages[bisect_left(self.distinct_ages, actor_node.age)]
+			self.build_gross_tree()
+		else:
+			self.update_gross_tree(actor_node.age, -actor_node.get_grossing_value())
+
+	def update_gross_tree(self, age, change):
+		""" add to the total of an age in the Fenwick tree
+
+		:param age: age already in distinct_ages
+		:param change: amount to add to its total
+
+		"""
+		i = bisect_left(self.distinct_ages, age) + 1
+		while i < len(self.gross_tree):
+			self.gross_tree[i] += change
+			i += i & -i
+
+	def build_gross_tree(self):
+		""" build the Fenwick tree from the totals of each age, a few hundred ages at most
+
+		"""
+		# each node holds the sum of the i & -i totals ending at position i
+		tree = [0] + [self.gross_by_age[age] for age in self.distinct_ages]
+		for i in xrange(1, len(tree)):
+			parent = i + (i & -i)
+			if parent < len(tree):
+				tree[parent] += tree[i]
+		self.gross_tree = tree
+
+	def gross_prefix_sum(self, n):
+		""" sum the totals of the first n distinct ages
+
+		:param n: number of distinct ages
+		:return: total gross of actors with those ages
+
+		"""
+		total = 0
+		while n > 0:
+			total += self.gross_tree[n]
+			n -= n & -n
+		return total
+
+	def add_movie(self, movie_node):
+		""" index a movie
+
+		:param movie_node: movie to add
+
+		"""
+		self.movies_by_year.setdefault(movie_node.year, []).append(movie_node)
+
+	def remove_movie(self, movie_node):
+		""" drop a movie, with the year it was indexed with
+
+		:param movie_node: movie to remove
+
+		"""
+		movies = self.movies_by_year[movie_node.year]
+		movies.remove(movie_node)
+		if not movies:
+			del self.movies_by_year[movie_node.year]
+
+	def get_movies_from_year(self, year):
+		""" get movies from the given year
+
+		:param year: the year to select movies from
+		:return: list of movie nodes from that year
+
+		"""
+		return list(self.movies_by_year.get(year, ()))
+
+	def get_age_range(self, start, end):
+		""" find the positions of actors with age between start and end in actors_by_age
+
+		:param start: start of age range
+		:param end: end of age range
+		:return: first position in range and position after the range
+
+		"""
+		lo = bisect_left(self.ages, start)
+		return lo, max(lo, bisect_right(self.ages, end))
+
+	def count_age_range(self, start, end):
+		""" count actors with age between start and end
+
+		:param start: start of age range
+		:param end: end of age range
+		:return: number of actors in the range
+
+		"""
+		lo, hi = self.get_age_range(start, end)
+		return hi - lo
+
+	def sum_gross_age_range(self, start, end):
+		""" sum gross for actors with age between start and end
+
+		:param start: start of age range
+		:param end: end of age range
+		:return: total gross of actors in the range
+
+		"""
+		lo = bisect_left(self.distinct_ages, start)
+		hi = max(lo, bisect_right(self.distinct_ages, end))
+		return self.gross_prefix_sum(hi) - self.gross_prefix_sum(lo)
+
+	def get_oldest(self, x):
+		""" get the x oldest actors
+
+		:param x: number of actors to select
+		:return: list of actor nodes, youngest first
+
+		"""
+		return self.actors_by_age[-x:]
+
+	def get_top_grossing(self, x):
+		""" get the x top grossing actors
+
+		:param x: number of actors to select
+		:return: list of actor nodes, lowest gross first
+
+		"""
+		return self.actors_by_gross[-x:]
+
+
+def position(values, nodes, value, node):
+	""" find where a node is, or belongs, in a list sorted by value then node id
+
+	:param values: sorted values, values[i] belongs to nodes[i]
+	:param nodes: the nodes
+	:param value: value of node
+	:param node: node to find
+	:return: position in the lists
+
+	"""
+	lo = bisect_left(values, value)
+	hi = bisect_right(values, value, lo)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		if nodes[mid].node_id < node.node_id:
+			lo = mid + 1
+		else:
+			hi = mid
+	return lo
+
+
+def insert_sorted(values, nodes, value, node):
+	""" insert a node into a list sorted by value then node id, costs O(log n) plus moving the items after it
+
+	:param values: sorted values, values[i] belongs to nodes[i]
+	:param nodes: the nodes
+	:param value: value of node
+	:param node: node to insert
+
+	"""
+	i = position(values, nodes, value, node)
+	values.insert(i, value)
+	nodes.insert(i, node)
+
+
+def remove_sorted(values, nodes, value, node):
+	""" remove a node from a list sorted by value then node id
+
+	:param values: sorted values, values[i] belongs to nodes[i]
+	:param nodes: the nodes
+	:param value: value of node when it was inserted
+	:param node: node to remove
+
+	"""
+	i = position(values, nodes, value, node)
+	if i == len(nodes) or nodes[i] is not node:
+		raise ValueError('node is not indexed')
+	del values[i]
+	del nodes[i]
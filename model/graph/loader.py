@@ -0,0 +1,176 @@
+import json
+
+# sections of the JSON file, in the order they appear
+SECTIONS = ('actor', 'movie')
+JSON_CLASSES = {'Actor': 'actor', 'Movie': 'movie'}
+
+
+class JSONRecordReader(object):
+	""" Reads the [{actors}, {movies}] JSON file one record at a time, without loading the whole file
+
+	"""
+
+	def __init__(self, f, chunk_size=1 << 16):
+		""" Constructor.
+
+		:param f: file object to read from
+		:param chunk_size: number of bytes to read at a time
+
+		"""
+		self.f = f
+		self.chunk_size = chunk_size
+		self.decoder = json.JSONDecoder()
+		self.buf = ''
+		self.pos = 0
+		self.eof = False
+
+	def fill(self):
+		""" read another chunk into the buffer, dropping what has already been parsed
+
+		:return: False if the file has no more data
+
+		"""
+		if self.eof:
+			return False
+		chunk = self.f.read(self.chunk_size)
+		if not chunk:
+			self.eof = True
+			return False
+		self.buf = self.buf[self.pos:] + chunk
+		self.pos = 0
+		return True
+
+	def next_char(self):
+		""" skip whitespace and return the next character without consuming it
+
+		:return: the next character, or '' at the end of the file
+
+		"""
+		while True:
+			while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\n\r':
+				self.pos += 1
+			if self.pos < len(self.buf) or not self.fill():
+				return self.buf[self.pos:self.pos + 1]
+
+	def expect(self, chars):
+		""" consume the next character, which must be one of chars
+
+		:param chars: allowed characters
+		:return: the character consumed
+
+		"""
+		c = self.next_char()
+		if c == '' or c not in chars:
+			raise ValueError('expected one of %r at offset %d, found %r' % (chars, self.pos, c))
+		self.pos += 1
+		return c
+
+	def decode(self):
+		""" decode the next JSON value, reading more of the file until it is complete
+
+		:return: the decoded value
+
+		"""
+		self.next_char()
+		while True:
+			try:
+				value, end = self.decoder.raw_decode(self.buf, self.pos)
+			except ValueError:
+				# value is cut off at the end of the buffer
+				if not self.fill():
+					raise
+				continue
+			self.pos = end
+			return value
+
+	def __iter__(self):
+		""" iterate over the records in the file
+
+		:return: iterator of (kind, key, record) where kind is 'actor' or 'movie'
+
+		"""
+		self.expect('[')
+		for i, kind in enumerate(SECTIONS):
+			if i > 0:
+				self.expect(',')
+			self.expect('{')
+			if self.next_char() == '}':
+				self.pos += 1
+				continue
+			while True:
+				key = self.decode()
+				self.expect(':')
+				yield kind, key, self.decode()
+				if self.expect(',}') == '}':
+					break
+		self.expect(']')
+
+
+def iter_json_records(f, chunk_size=1 << 16):
+	""" stream records from a file in the [{actors}, {movies}] format
+
+	:param f: file object to read from
+	:param chunk_size: number of bytes to read at a time
+	:return: iterator of (kind, key, record)
+	"""
+	return iter(JSONRecordReader(f, chunk_size))
+
+
+def iter_ndjson_records(f):
+	""" stream records from a line-delimited file, one actor or movie object per line
+
+	:param f: file object to read from
+	:return: iterator of (kind, key, record)
+	"""
+	for line in f:
+		if line.strip():
+			record = json.loads(line)
+			yield JSON_CLASSES[record['json_class']], record['name'], record
+
+
+def iter_file_records(filename):
+	""" stream records from a file, picking the format from its extension (.ndjson/.jsonl are line-delimited)
+
+	:param filename: file to read
+	:return: iterator of (kind, key, record)
+	"""
+	with open(filename) as f:
+		if filename.endswith('.ndjson') or filename.endswith('.jsonl'):
+			records = iter_ndjson_records(f)
+		else:
+			records = iter_json_records(f)
+		for record in records:
+			yield record
+
+
+def write_json_records(records, f):
+	""" write records in the [{actors}, {movies}] format without building the whole document
+
+	:param records: iterable of (kind, key, record), all actors before all movies
+	:param f: file object to write to
+	"""
+	f.write('[\n{')
+	section = 0
+	first = True
+	for kind, key, record in records:
+		# move on to the movie section
+		while SECTIONS[section] != kind:
+			f.write('\n},\n{')
+			section += 1
+			first = True
+		f.write('\n  ' if first else ',\n  ')
+		f.write(json.dumps(key) + ': ' + json.dumps(record))
+		first = False
+	for _ in xrange(section, len(SECTIONS) - 1):
+		f.write('\n},\n{')
+	f.write('\n}\n]\n')
+
+
+def write_ndjson_records(records, f):
+	""" write records one per line
+
+	:param records: iterable of (kind, key, record)
+	:param f: file object to write to
+	"""
+	for _, _, record in records:
+		f.write(json.dumps(record) + '\n')
@@ -1,29 +1,131 @@
+class StringTable(object):
+	""" shared copies of the strings held by the nodes of one graph, so a name stored in many movies/actors lists
+	is kept once (works for unicode too, unlike intern)
+
+	"""
+
+	def __init__(self):
+		""" Constructor.
+
+		"""
+		self.strings = {}
+
+	def __len__(self):
+		return len(self.strings)
+
+	def __contains__(self, s):
+		return s in self.strings
+
+	def intern(self, s):
+		""" get the shared copy of a string, adding it if needed
+
+		:param s: string to look up
+		:return: the shared copy of s
+		"""
+		return self.strings.setdefault(s, s)
+
+	def intern_all(self, strings):
+		""" get the shared copies of a list of strings
+
+		:param strings: strings to look up
+		:return: list of the shared copies
+		"""
+		return [self.intern(s) for s in strings]
+
+	def discard(self, s):
+		""" drop a string no node holds anymore
+
+		:param s: string to drop
+		"""
+		self.strings.pop(s, None)
+
+
 class Node(object):
+	# no per-instance __dict__, nodes only hold these fields
+	__slots__ = ('name', 'links', 'node_id')
 
-	def __init__(self, data):
+	def __init__(self, data, strings=None):
 		""" Constructor
 
 		:param data: Json Data
+		:param strings: StringTable of the graph the node belongs to, None to keep the strings in data
+		"""
+		self.set_name(data['name'], strings)
+
+	def set_name(self, name, strings=None):
+		""" set the name of a node without links or id
+
+		:param name: name of the node
+		:param strings: StringTable of the graph the node belongs to, None to keep name as it is
+		"""
+		self.name = strings.intern(name) if strings is not None else name
+		# linked nodes, edge weights are derived from the node attributes when needed
+		self.links = []
+		# position in the graph, set when the node is added to one
+		self.node_id = None
+
+	@property
+	def neighbors(self):
+		""" get the linked nodes with the weight of each edge
+
+		:return: dictionary of neighbor node to edge weight
+		"""
+		return dict((node, self.get_edge_weight(node)) for node in self.links)
+
+	def link(self, node):
+		""" add node as a neighbor if it is not one already
+
+		:param node: node to link to
+		"""
+		if node not in self.links:
+			self.links.append(node)
+
+	def unlink(self, node):
+		""" remove node from the neighbors if it is one
+
+		:param node: node to unlink from
 		"""
-		self.name = data['name']
-		self.neighbors = {}
+		if node in self.links:
+			self.links.remove(node)
 
 
 class ActorNode(Node):
 	""" Node class to represent an Actor
 
 	"""
+	__slots__ = ('age', 'movies', 'total_gross')
 
-	def __init__(self, actor):
+	def __init__(self, actor, strings=None):
 		""" Constructor.
 		
 		:param actor: dictionary containing data on an actor
 
+		:param strings: StringTable of the graph the node belongs to, None to keep the strings in actor
+
+		"""
+		self.set_fields(actor['name'], actor['age'], actor['movies'], actor['total_gross'], strings)
+
+	@classmethod
+	def from_fields(cls, name, age, movies, total_gross, strings=None):
+		""" make an ActorNode from its fields, without a dictionary
+
+		:return: the new node
+
 		"""
-		super(ActorNode, self).__init__(actor)
-		self.age = actor['age']
-		self.movies = actor['movies']
-		self.total_gross = actor['total_gross']
+		actor_node = cls.__new__(cls)
+		actor_node.set_fields(name, age, movies, total_gross, strings)
+		return actor_node
+
+	def set_fields(self, name, age, movies, total_gross, strings=None):
+		""" set the fields of the actor
+
+		:param strings: StringTable of the graph the node belongs to, None to keep the strings as they are
+
+		"""
+		self.set_name(name, strings)
+		self.age = age
+		self.movies = strings.intern_all(movies) if strings is not None else list(movies)
+		self.total_gross = total_gross
 
 	def add_neighbor(self, movie_node):
 		""" Add movie_node as neighbor if actor appeared in that movie
@@ -33,8 +135,17 @@ class ActorNode(Node):
 		"""
 
 		if movie_node.name in self.movies or self.name in movie_node.actors:
-			# weight of edge is age of actor times gross of movie
-			self.neighbors[movie_node] = (movie_node.get_gross() * self.age)
+			self.link(movie_node)
+
+	def get_edge_weight(self, movie_node):
+		""" get weight of the edge to movie_node
+
+		:param movie_node: movie this actor is linked to
+
+		:return: weight of edge is age of actor times gross of movie
+
+		"""
+		return movie_node.get_gross() * self.age
 
 	def get_movies_in(self):
 		""" return list of all movies actor appeared in
@@ -42,7 +153,7 @@ class ActorNode(Node):
 		:return: list of movies this actor was in
 
 		"""
-		return [movie.name for movie in self.neighbors.keys()]
+		return [movie.name for movie in self.links]
 
 	def get_grossing_value(self):
 		""" sum the gross of all movies this actor has appeared in
@@ -52,17 +163,22 @@ class ActorNode(Node):
 		"""
 		return self.total_gross
 
-	def get_actor_connections(self):
+	def get_actor_connections(self, graph=None):
 		""" get number of actors this actor has worked with
 
+		:param graph: Graph this actor is in, to read its co-star projection, which is built once and kept up to date,
+		instead of walking the casts of this actor's movies
+
 		:return: number of actors this actor has been in a movie with
 
 		"""
+		if graph is not None:
+			return graph.get_actor_connections(self)
 		connections = set()
 		# iterate over all movies this actor is in
-		for movie_node in self.neighbors.keys():
+		for movie_node in self.links:
 			# iterate over all actors in this movie
-			for actor_node in movie_node.neighbors:
+			for actor_node in movie_node.links:
 				if actor_node != self:
 					connections.add(actor_node)
 		return len(connections)
@@ -88,18 +204,40 @@ class MovieNode(Node):
 	""" Node class to represent an Actor
 
 	"""
+	__slots__ = ('year', 'gross', 'actors', 'wiki_page')
 
-	def __init__(self, movie):
+	def __init__(self, movie, strings=None):
 		""" Constructor.
 
 		:param movie: movie data stored in dictionary
 
+		:param strings: StringTable of the graph the node belongs to, None to keep the strings in movie
+
+		"""
+		self.set_fields(movie['name'], movie['year'], movie['box_office'], movie['actors'], movie['wiki_page'], strings)
+
+	@classmethod
+	def from_fields(cls, name, year, gross, actors, wiki_page, strings=None):
+		""" make a MovieNode from its fields, without a dictionary
+
+		:return: the new node
+
 		"""
-		super(MovieNode, self).__init__(movie)
-		self.year = movie['year']
-		self.gross = movie['box_office']
-		self.actors = movie['actors']
-		self.wiki_page = movie['wiki_page']
+		movie_node = cls.__new__(cls)
+		movie_node.set_fields(name, year, gross, actors, wiki_page, strings)
+		return movie_node
+
+	def set_fields(self, name, year, gross, actors, wiki_page, strings=None):
+		""" set the fields of the movie
+
+		:param strings: StringTable of the graph the node belongs to, None to keep the strings as they are
+
+		"""
+		self.set_name(name, strings)
+		self.year = year
+		self.gross = gross
+		self.actors = strings.intern_all(actors) if strings is not None else list(actors)
+		self.wiki_page = wiki_page
 
 	def add_neighbor(self, actor_node):
 		""" add actor_node as neighbor if actor acted in this movie
@@ -108,8 +246,17 @@ class MovieNode(Node):
 
 		"""
 		if actor_node.name in self.actors or self.name in actor_node.movies:
-			# weight of edge is age of actor times gross of movie
-			self.neighbors[actor_node] = (actor_node.age * self.gross)
+			self.link(actor_node)
+
+	def get_edge_weight(self, actor_node):
+		""" get weight of the edge to actor_node
+
+		:param actor_node: actor linked to this movie
+
+		:return: weight of edge is age of actor times gross of movie
+
+		"""
+		return actor_node.age * self.gross
 
 	def get_gross(self):
 		""" get gross of this movie
@@ -125,7 +272,7 @@ class MovieNode(Node):
 		:return: list of actors who were in this movie
 
 		"""
-		return [actor.name for actor in self.neighbors.keys()]
+		return [actor.name for actor in self.links]
 
 	def to_json(self):
 		""" convert node to JSON format (stored as dictionary)
@@ -0,0 +1,54 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock(object):
+	""" lock held by any number of readers at once, or by a single writer
+
+	Waiting writers go first, so a steady stream of readers cannot keep a write out. The lock is not reentrant.
+
+	"""
+
+	def __init__(self):
+		""" Constructor.
+
+		"""
+		self.condition = threading.Condition(threading.Lock())
+		self.readers = 0
+		self.writing_now = False
+		self.waiting_writers = 0
+
+	@contextmanager
+	def reading(self):
+		""" hold the lock for reading for the duration of a with block
+
+		"""
+		with self.condition:
+			while self.writing_now or self.waiting_writers:
+				self.condition.wait()
+			self.readers += 1
+		try:
+			yield
+		finally:
+			with self.condition:
+				self.readers -= 1
+				if self.readers == 0:
+					self.condition.notify_all()
+
+	@contextmanager
+	def writing(self):
+		""" hold the lock for writing for the duration of a with block
+
+		"""
+		with self.condition:
+			self.waiting_writers += 1
+			while self.writing_now or self.readers:
+				self.condition.wait()
+			self.waiting_writers -= 1
+			self.writing_now = True
+		try:
+			yield
+		finally:
+			with self.condition:
+				self.writing_now = False
+				self.condition.notify_all()
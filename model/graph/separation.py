@@ -0,0 +1,129 @@
+import multiprocessing
+from collections import Counter
+
+# actor projection used by the worker processes, set by init_worker
+worker_adjacency = None
+
+
+def build_actor_projection(graph):
+	""" build the actor-actor co-star graph, with actors numbered by position
+
+	:param graph: graph to project
+	:return: list of actor names, and a list holding the co-star ids of each actor
+	"""
+	actor_names = sorted(graph.name_to_actor_node.keys())
+	actor_ids = dict((graph.name_to_actor_node[name], i) for i, name in enumerate(actor_names))
+	costars = graph.get_costars()
+	adjacency = []
+	for name in actor_names:
+		# actors are connected if they appeared in a movie together
+		costar_nodes = costars.get(graph.name_to_actor_node[name], ())
+		adjacency.append(tuple(actor_ids[node] for node in costar_nodes if node in actor_ids))
+	return actor_names, adjacency
+
+
+def actor_distances(adjacency, source):
+	""" BFS over the actor projection from a single actor
+
+	:param adjacency: co-star ids of each actor
+	:param source: id of actor to start from
+	:return: list of (actor id, degree of separation) for every other reachable actor
+	"""
+	distances = {source: 0}
+	frontier = [source]
+	depth = 0
+	rows = []
+	while len(frontier) > 0:
+		depth += 1
+		next_frontier = []
+		for actor_id in frontier:
+			for costar_id in adjacency[actor_id]:
+				if costar_id not in distances:
+					distances[costar_id] = depth
+					next_frontier.append(costar_id)
+					rows.append((costar_id, depth))
+		frontier = next_frontier
+	return rows
+
+
+def init_worker(adjacency):
+	""" store the actor projection in a worker process
+
+	:param adjacency: co-star ids of each actor
+	"""
+	global worker_adjacency
+	worker_adjacency = adjacency
+
+
+def histogram_for_sources(sources):
+	""" count degrees of separation from a chunk of source actors (runs in a worker)
+
+	:param sources: ids of actors to start from
+	:return: Counter of degree of separation to number of ordered pairs
+	"""
+	histogram = Counter()
+	for source in sources:
+		for _, depth in actor_distances(worker_adjacency, source):
+			histogram[depth] += 1
+	return histogram
+
+
+def rows_for_sources(sources):
+	""" find degrees of separation from a chunk of source actors (runs in a worker)
+
+	:param sources: ids of actors to start from
+	:return: list of (source id, target id, degree of separation)
+	"""
+	return [(source, target, depth) for source in sources for target, depth in actor_distances(worker_adjacency, source)]
+
+
+def map_sources(adjacency, func, workers, chunk_size):
+	""" apply func to chunks of source actors, in a process pool if more than one worker
+
+	:param adjacency: co-star ids of each actor
+	:param func: function taking a list of source ids
+	:param workers: number of processes to use
+	:param chunk_size: number of sources handed to a worker at once
+	:return: iterator over the results of func
+	"""
+	chunks = [range(i, min(i + chunk_size, len(adjacency))) for i in xrange(0, len(adjacency), chunk_size)]
+	if workers <= 1:
+		init_worker(adjacency)
+		for chunk in chunks:
+			yield func(chunk)
+		return
+	pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(adjacency,))
+	try:
+		for result in pool.imap_unordered(func, chunks):
+			yield result
+	finally:
+		pool.terminate()
+
+
+def separation_histogram(graph, workers=1, chunk_size=64):
+	""" count the degree of separation of every ordered pair of connected actors
+
+	:param graph: graph to calculate separations for
+	:param workers: number of processes to spread the sources over
+	:param chunk_size: number of sources handed to a worker at once
+	:return: dictionary of degree of separation to number of ordered pairs
+	"""
+	_, adjacency = build_actor_projection(graph)
+	histogram = Counter()
+	for partial in map_sources(adjacency, histogram_for_sources, workers, chunk_size):
+		histogram.update(partial)
+	return dict(histogram)
+
+
+def iter_separations(graph, workers=1, chunk_size=64):
+	""" stream the degree of separation of every ordered pair of connected actors
+
+	:param graph: graph to calculate separations for
+	:param workers: number of processes to spread the sources over
+	:param chunk_size: number of sources handed to a worker at once
+	:return: iterator of (actor name, other actor name, degree of separation)
+	"""
+	actor_names, adjacency = build_actor_projection(graph)
+	for rows in map_sources(adjacency, rows_for_sources, workers, chunk_size):
+		for source, target, depth in rows:
+			yield actor_names[source], actor_names[target], depth
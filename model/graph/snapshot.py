@@ -0,0 +1,119 @@
+import mmap
+import struct
+import sys
+import zlib
+import numpy as np
+from csr_graph import CSRGraph
+
+# file layout: fixed header, section table, then the sections (string table blob and CSRGraph arrays)
+MAGIC = 'WSGRAPH\0'
+VERSION = 3
+# the crc32 covers the whole file, with the header's crc field taken as 0
+HEADER = struct.Struct('<8sIBIIQQQ')  # magic, version, big endian, sections, crc32, strings, actors, movies
+SECTION = struct.Struct('<16scBQQ')  # name, array typecode, item size, offset, length in bytes
+ARRAYS = ('string_offsets', 'actor_order', 'movie_order', 'node_names', 'ages', 'total_gross', 'years', 'box_office', 'wiki_pages',
+		  'list_offsets', 'list_items', 'offsets', 'indices', 'weights')
+ALIGNMENT = 8
+CRC_CHUNK = 1 << 20
+
+
+def write_snapshot(graph, filename):
+	""" write a CSRGraph to a binary snapshot file
+
+	:param graph: CSRGraph to save
+	:param filename: file to write
+	"""
+	sections = [('strings', 'c', 1, str(graph.string_data))]
+	# a loaded graph holds numpy views, the typecodes are those of a CSRGraph's arrays
+	empty = CSRGraph()
+	for name in ARRAYS:
+		values = getattr(graph, name)
+		sections.append((name, getattr(empty, name).typecode, values.itemsize, values.tostring()))
+	# lay out the sections after the header and section table
+	offset = HEADER.size + SECTION.size * len(sections)
+	table = []
+	for name, typecode, itemsize, data in sections:
+		offset += -offset % ALIGNMENT
+		table.append(SECTION.pack(name, typecode, itemsize, offset, len(data)))
+		offset += len(data)
+	body = ''.join(table)
+	position = HEADER.size + len(body)
+	chunks = [body]
+	for name, typecode, itemsize, data in sections:
+		padding = '\0' * (-position % ALIGNMENT)
+		chunks.extend([padding, data])
+		position += len(padding) + len(data)
+	fields = [MAGIC, VERSION, sys.byteorder == 'big', len(sections), 0, len(graph.string_offsets) - 1, graph.num_actors,
+			  graph.num_movies]
+	crc = zlib.crc32(HEADER.pack(*fields))
+	for chunk in chunks:
+		crc = zlib.crc32(chunk, crc)
+	fields[4] = crc & 0xffffffff
+	header = HEADER.pack(*fields)
+	with open(filename, 'wb') as f:
+		f.write(header)
+		for chunk in chunks:
+			f.write(chunk)
+
+
+def read_snapshot(filename, verify=True):
+	""" load a CSRGraph from a binary snapshot file through mmap, without parsing records or copying sections
+
+	The string table and arrays of the graph are read-only views over the mapped file, which stays mapped as long as
+	the graph uses them. Only a snapshot written on a platform of the other byte order is copied, to swap its bytes.
+
+	:param filename: file to read
+	:param verify: check the crc32 of the file before loading
+	:return: the CSRGraph
+	"""
+	with open(filename, 'rb') as f:
+		mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+	try:
+		if len(mm) < HEADER.size:
+			raise ValueError('%s is not a graph snapshot' % filename)
+		fields = list(HEADER.unpack(mm[:HEADER.size]))
+		magic, version, big_endian, num_sections, crc, _, num_actors, num_movies = fields
+		if magic != MAGIC:
+			raise ValueError('%s is not a graph snapshot' % filename)
+		if version != VERSION:
+			raise ValueError('%s has snapshot version %d, expected %d' % (filename, version, VERSION))
+		if verify:
+			fields[4] = 0
+			actual = zlib.crc32(HEADER.pack(*fields))
+			for start in xrange(HEADER.size, len(mm), CRC_CHUNK):
+				actual = zlib.crc32(mm[start:start + CRC_CHUNK], actual)
+			if actual & 0xffffffff != crc:
+				raise ValueError('%s is corrupt, checksum does not match' % filename)
+		sections = {}
+		for i in xrange(num_sections):
+			start = HEADER.size + i * SECTION.size
+			name, typecode, itemsize, offset, length = SECTION.unpack(mm[start:start + SECTION.size])
+			sections[name.rstrip('\0')] = (typecode, itemsize, offset, length)
+		graph = CSRGraph()
+		graph.num_actors = num_actors
+		graph.num_movies = num_movies
+		_, _, offset, length = sections['strings']
+		graph.string_data = buffer(mm, offset, length)
+		for name in ARRAYS:
+			typecode, itemsize, offset, length = sections[name]
+			dtype = np.dtype(typecode)
+			if dtype.itemsize != itemsize:
+				raise ValueError('%s was written on a platform with a different %r size' % (filename, typecode))
+			values = np.frombuffer(mm, dtype, length // itemsize, offset) if length else np.zeros(0, dtype)
+			if big_endian != (sys.byteorder == 'big'):
+				values = values.byteswap()
+			setattr(graph, name, values)
+	except:
+		mm.close()
+		raise
+	graph.mapping = mm
+	return graph
+
+
+if __name__ == '__main__':
+	if len(sys.argv) != 3:
+		print 'usage: python model/graph/snapshot.py <data file> <snapshot file>'
+		sys.exit(1)
+	# imported here, graph imports this module
+	from graph import Graph
+	Graph(sys.argv[1]).write_snapshot(sys.argv[2])
@@ -0,0 +1,51 @@
+import random
+
+
+def generate_data(num_actors, num_movies, cast_size=6, seed=0):
+	""" generate random actor and movie data in the same format as data.json
+
+	:param num_actors: number of actors to generate
+	:param num_movies: number of movies to generate
+	:param cast_size: number of actors in each movie
+	:param seed: seed for the random generator, same seed gives the same data
+	:return: list holding a dictionary of actors and a dictionary of movies
+	"""
+	rng = random.Random(seed)
+	actor_names = ['Actor %d' % i for i in xrange(num_actors)]
+	actors = {}
+	movies = {}
+	for name in actor_names:
+		actors[name] = {'json_class': 'Actor', 'name': name, 'age': rng.randint(10, 99),
+						'total_gross': rng.randint(0, 10 ** 9), 'movies': []}
+	for i in xrange(num_movies):
+		name = 'Movie %d' % i
+		cast = rng.sample(actor_names, min(cast_size, num_actors))
+		movies[name] = {'json_class': 'Movie', 'name': name, 'year': rng.randint(1950, 2017),
+						'box_office': rng.randint(0, 10 ** 9), 'wiki_page': '', 'actors': cast}
+		# like the scraped data, some credits are only listed on the movie side
+		for actor_name in cast:
+			if rng.random() < 0.8:
+				actors[actor_name]['movies'].append(name)
+	return [actors, movies]
+
+
+def iter_records(num_actors, num_movies, movies_per_actor=6, seed=0):
+	""" generate random records one at a time, for datasets too large to build in memory
+
+	:param num_actors: number of actors to generate
+	:param num_movies: number of movies to generate
+	:param movies_per_actor: number of movies each actor lists (movies list as many actors)
+	:param seed: seed for the random generator, same seed gives the same records
+	:return: iterator of (kind, name, record), all actors before all movies
+	"""
+	rng = random.Random(seed)
+	for i in xrange(num_actors):
+		name = 'Actor %d' % i
+		movies = ['Movie %d' % rng.randrange(num_movies) for _ in xrange(movies_per_actor)]
+		yield 'actor', name, {'json_class': 'Actor', 'name': name, 'age': rng.randint(10, 99),
+							  'total_gross': rng.randint(0, 10 ** 9), 'movies': movies}
+	for i in xrange(num_movies):
+		name = 'Movie %d' % i
+		actors = ['Actor %d' % rng.randrange(num_actors) for _ in xrange(movies_per_actor)]
+		yield 'movie', name, {'json_class': 'Movie', 'name': name, 'year': rng.randint(1950, 2017),
+							  'box_office': rng.randint(0, 10 ** 9), 'wiki_page': '', 'actors': actors}
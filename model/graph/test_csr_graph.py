@@ -0,0 +1,42 @@
+import unittest
+from csr_graph import CSRGraph
+from graph import Graph
+
+class CSRGraphTests(unittest.TestCase):
+
+	def setUp(self):
+		# create both graphs from the same JSON file
+		self.g = Graph('model/data/data.json')
+		self.csr = CSRGraph('model/data/data.json')
+
+	# test both graphs hold the same nodes, edges and weights
+	def test_same_edges(self):
+		self.assertEqual(self.csr.num_actors, len(self.g.actor_vertices))
+		self.assertEqual(self.csr.num_movies, len(self.g.movie_vertices))
+		for node_id in xrange(self.csr.num_nodes()):
+			name = self.csr.get_name(node_id)
+			if self.csr.is_actor(node_id):
+				node = self.g.name_to_actor_node[name]
+			else:
+				node = self.g.name_to_movie_node[name]
+			edges = dict((self.csr.get_name(n), w) for n, w in self.csr.get_edges(node_id))
+			self.assertEqual(edges, dict((n.name, w) for n, w in node.neighbors.items()))
+
+	# test graph converts back to the same JSON
+	def test_to_json(self):
+		self.assertEqual(self.csr.to_json(), self.g.to_json())
+
+	# test names are found by binary search over the string table, including names outside ASCII
+	def test_name_lookup(self):
+		for node_id in xrange(self.csr.num_nodes()):
+			self.assertEqual(self.csr.get_node_id(self.csr.get_name(node_id)), node_id)
+		self.assertIsNone(self.csr.get_node_id('Not an Actor'))
+		csr = CSRGraph.from_data([{u'Zo\xeb': {'name': u'Zo\xeb', 'age': 30, 'total_gross': 5, 'movies': [u'Am\xe9lie']}},
+								  {u'Am\xe9lie': {'name': u'Am\xe9lie', 'year': 2001, 'box_office': 2, 'actors': [],
+												  'wiki_page': ''}}])
+		self.assertEqual(list(csr.get_neighbors(csr.get_node_id(u'Zo\xeb'))), [csr.get_node_id(u'Am\xe9lie')])
+		self.assertEqual(csr.get_name(1), u'Am\xe9lie')
+		self.assertEqual(csr.get_node_id(u'Zo\xeb'.encode('utf-8')), 0)
+
+if __name__ == '__main__':
+	unittest.main()
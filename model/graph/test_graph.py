@@ -1,4 +1,6 @@
 import json
+import sys
+import threading
 import unittest
 from graph import Graph
 
@@ -31,6 +33,36 @@ class GraphTests(unittest.TestCase):
 		self.assertIn(bruce_willis.age * blind_date.gross, bruce_willis.neighbors.values())
 		self.assertIn(bruce_willis.age * blind_date.gross, blind_date.neighbors.values())
 
+	# test concurrent readers share one build of the derived state
+	def test_concurrent_builds(self):
+		built = []
+		interval = sys.getcheckinterval()
+		# switch threads as often as possible, so builds overlap if they can
+		sys.setcheckinterval(1)
+		try:
+			def read():
+				built.append((id(self.g.get_costars()), self.g.get_hub_actors(3), id(self.g.connected_components()),
+							  id(self.g.get_attribute_indexes())))
+			readers = [threading.Thread(target=read) for _ in range(8)]
+			for reader in readers:
+				reader.start()
+			for reader in readers:
+				reader.join()
+		finally:
+			sys.setcheckinterval(interval)
+		self.assertEqual(len(built), 8)
+		self.assertEqual(len(set(built_ids[:1] + built_ids[2:] for built_ids in built)), 1)
+		self.assertEqual(built[0], (id(self.g.costars), self.g.get_hub_actors(3), id(self.g.components),
+									id(self.g.attribute_indexes)))
+
+	# test that indexed edge construction matches checking every actor/movie pair
+	def test_indexed_edges_match_all_pairs(self):
+		all_pairs = Graph('model/data/data.json', indexed_edges=False)
+		def edges(g):
+			nodes = list(g.actor_vertices) + list(g.movie_vertices)
+			return dict(((node.name, other.name), w) for node in nodes for other, w in node.neighbors.items())
+		self.assertEqual(edges(self.g), edges(all_pairs))
+
 	# test graph is properly converted back to JSON 
 	def test_graph_to_json(self):
 		# convert graph to json
@@ -125,12 +157,41 @@ class GraphTests(unittest.TestCase):
 
 	# test DFS traversal
 	def test_dfs_traversal(self):
-		self.g.dfs_traversal()
-		# all nodes should be visited now
-		for actor_node in self.g.actor_vertices:
-			self.assertTrue(actor_node.visited)
-		for movie_node in self.g.movie_vertices:
-			self.assertTrue(movie_node.visited)
+		order = self.g.dfs_traversal()
+		# all nodes should be visited exactly once
+		self.assertEqual(len(order), len(set(order)))
+		self.assertEqual(set(order), self.g.actor_vertices | self.g.movie_vertices)
+
+	# test DFS on a chain longer than the recursion limit
+	def test_dfs_traversal_long_chain(self):
+		g = Graph()
+		length = 5000
+		actors = dict(('a%d' % i, {'name': 'a%d' % i, 'age': 1, 'total_gross': 0, 'movies': ['m%d' % i, 'm%d' % (i + 1)]})
+					  for i in range(length))
+		movies = dict(('m%d' % i, {'name': 'm%d' % i, 'year': 2000, 'box_office': 1, 'actors': [], 'wiki_page': ''})
+					  for i in range(length + 1))
+		g.add_nodes([actors, movies])
+		g.add_edges()
+		self.assertEqual(len(g.dfs_traversal()), 2 * length + 1)
+		self.assertEqual(g.bfs('a0', 'a%d' % (length - 1)), length - 1)
+
+	# test connected components
+	def test_connected_components(self):
+		labels, sizes = self.g.connected_components()
+		self.assertEqual(sum(sizes), len(self.g.nodes))
+		self.assertEqual(sorted(set(labels)), range(len(sizes)))
+		for node in self.g.nodes:
+			for neighbor in node.links:
+				self.assertEqual(labels[node.node_id], labels[neighbor.node_id])
+		self.assertTrue(self.g.are_connected('Bruce Willis', 'Kirstie Alley'))
+		self.assertFalse(self.g.are_connected('Bruce Willis', 'Not an Actor'))
+		# unlinking an actor from all movies puts them in their own component
+		kim_basinger = self.g.name_to_actor_node['Kim Basinger']
+		for movie in list(kim_basinger.links):
+			self.g.remove_edge(kim_basinger, movie)
+		self.assertFalse(self.g.are_connected('Bruce Willis', 'Kim Basinger'))
+		self.assertEqual(self.g.bfs('Bruce Willis', 'Kim Basinger'), -1)
+		self.assertEqual(len(self.g.connected_components()[1]), len(sizes) + 1)
 
 	# Test BFS traversal w/ a depth 1
 	def test_bfs_d1(self):
@@ -180,6 +241,33 @@ class GraphTests(unittest.TestCase):
 		j = self.g.bfs(other, first.name)
 		self.assertEqual(j, 2)
 
+	# Test BFS with names and the path returned
+	def test_bfs_path(self):
+		i, path = self.g.bfs('Kirstie Alley', 'John Pankow', return_path=True)
+		self.assertEqual(i, 2)
+		# path alternates actor, movie, actor, movie, actor
+		self.assertEqual(len(path), 5)
+		self.assertEqual(path[0], 'Kirstie Alley')
+		self.assertEqual(path[-1], 'John Pankow')
+		for actor_name, movie_name in zip(path[0::2], path[1::2]):
+			self.assertIn(movie_name, self.g.name_to_actor_node[actor_name].get_movies_in())
+		# unreachable target has no path
+		self.assertEqual(self.g.bfs('Bruce Willis', 'Not an Actor', return_path=True), (-1, None))
+
+	# Test bidirectional BFS agrees with BFS
+	def test_bidirectional_bfs(self):
+		actor_names = sorted(self.g.name_to_actor_node.keys())[:40]
+		for first in actor_names:
+			for other in actor_names:
+				i = self.g.bfs(first, other)
+				j, path = self.g.bidirectional_bfs(first, other, return_path=True)
+				self.assertEqual(i, j)
+				if j != -1:
+					self.assertEqual(len(path), 2 * j + 1)
+					self.assertEqual((path[0], path[-1]), (first, other))
+		self.assertEqual(self.g.bidirectional_bfs('Danny Aiello', 'Kirstie Alley'), 2)
+		self.assertEqual(self.g.bidirectional_bfs('Not an Actor', 'Kirstie Alley'), -1)
+
 	# Test top 5 hub actors
 	def test_hub_actors(self):
 		# select top 5 hub actors
@@ -201,6 +289,34 @@ class GraphTests(unittest.TestCase):
 		# Multiple bottom individuals with no connections
 		self.assertEqual(hub_actors[0][1], 0)
 
+	# Test co-star projection matches counting co-stars from the nodes
+	def test_costars(self):
+		costars = self.g.get_costars()
+		for actor in self.g.actor_vertices:
+			# count the co-stars by walking the casts of the actor's movies
+			connections = set(other for movie in actor.links for other in movie.links if other is not actor)
+			self.assertEqual(len(costars[actor]), len(connections))
+			self.assertEqual(self.g.get_actor_connections(actor.name), len(connections))
+			self.assertEqual(actor.get_actor_connections(self.g), len(connections))
+			self.assertEqual(actor.get_actor_connections(), len(connections))
+
+	# Test co-star projection and hub actors are kept up to date when edges change
+	def test_costars_incremental(self):
+		self.g.get_hub_actors(5)
+		bruce_willis = self.g.name_to_actor_node['Bruce Willis']
+		movies = bruce_willis.neighbors.keys()
+		for movie in movies:
+			self.g.remove_edge(bruce_willis, movie)
+		self.assertEqual(self.g.get_actor_connections('Bruce Willis'), 0)
+		self.assertNotEqual(self.g.get_hub_actors(1)[0][0], 'Bruce Willis')
+		for movie in movies:
+			self.g.add_edge(bruce_willis, movie)
+		incremental = self.g.get_costars()
+		# rebuilding from scratch should give the same projection
+		self.g.costars = None
+		self.assertEqual(incremental, self.g.get_costars())
+		self.assertEqual(self.g.get_hub_actors(1), [('Bruce Willis', 305)])
+
 	# Test hub actors with invalid param
 	def test_hub_actors_invalid(self):
 		hub_actors = self.g.get_hub_actors(-15)
@@ -213,6 +329,107 @@ class GraphTests(unittest.TestCase):
 		gross2 = self.g.get_gross_for_age_group(20, 29)
 		self.assertEqual(gross2, 21767523)
 
+	# Test indexed age range queries against scanning every actor
+	def test_age_group_ranges(self):
+		for start in range(-5, 100, 7):
+			for end in range(start - 10, 110, 13):
+				actors = [actor for actor in self.g.actor_vertices if start <= actor.age <= end]
+				self.assertEqual(self.g.get_actors_in_age_group(start, end), len(actors))
+				self.assertEqual(self.g.get_gross_for_age_group(start, end), sum(a.total_gross for a in actors))
+
+	# Test gross range sums stay correct as actors are added and removed after the sums are built
+	def test_gross_range_after_writes(self):
+		def scanned(start, end):
+			return sum(actor.total_gross for actor in self.g.actor_vertices if start <= actor.age <= end)
+		self.assertEqual(self.g.get_gross_for_age_group(0, 200), scanned(0, 200))
+		tree = self.g.get_attribute_indexes().gross_tree
+		# an age that is already indexed updates the tree in place
+		self.g.add_actor({'name': 'Same Age', 'age': 61, 'total_gross': 1000})
+		self.assertIs(self.g.get_attribute_indexes().gross_tree, tree)
+		# a new age, and the last actor of an age going, move the positions
+		self.g.add_actor({'name': 'New Age', 'age': 131, 'total_gross': 7})
+		self.g.remove_actor('Kirstie Alley')
+		self.g.remove_actor('Same Age')
+		for start, end in ((0, 200), (61, 61), (60, 69), (100, 140), (131, 131), (20, 10)):
+			self.assertEqual(self.g.get_gross_for_age_group(start, end), scanned(start, end))
+		self.g.remove_actor('New Age')
+		self.assertEqual(self.g.get_gross_for_age_group(100, 140), 0)
+		self.assertEqual(self.g.get_gross_for_age_group(0, 200), scanned(0, 200))
+
+	# Test attribute indexes are kept up to date when nodes are added
+	def test_attribute_indexes_new_nodes(self):
+		self.assertEqual(self.g.get_actors_in_age_group(100, 150), 0)
+		self.g.add_nodes([{'Old Actor': {'name': 'Old Actor', 'age': 120, 'movies': [], 'total_gross': 5}},
+						  {'New Movie': {'name': 'New Movie', 'year': 2018, 'box_office': 1, 'actors': [], 'wiki_page': ''}}])
+		self.assertEqual(self.g.get_actors_in_age_group(100, 150), 1)
+		self.assertEqual(self.g.get_gross_for_age_group(100, 150), 5)
+		self.assertEqual(self.g.get_oldest_X_actors(1), [('Old Actor', 120)])
+		self.assertEqual(self.g.get_movies_from_year(2018), ['New Movie'])
+
+	# Test writes through the mutation layer leave the same graph as rebuilding from the data
+	def test_mutations_match_rebuild(self):
+		g = self.g
+		# build the lazy state first so it is updated rather than rebuilt
+		g.get_costars()
+		g.get_hub_actors(1)
+		g.connected_components()
+		indexes = g.get_attribute_indexes()
+		g.add_actor({'name': 'New Actor', 'age': 30, 'movies': ['Pulp Fiction', 'Movie To Come']})
+		g.add_movie({'name': 'Movie To Come', 'year': 2018, 'actors': ['Bruce Willis']})
+		g.update_actor('Bruce Willis', {'age': 70, 'movies': ['Die Hard']})
+		g.update_movie('Pulp Fiction', {'actors': ['John Travolta'], 'box_office': 5})
+		g.remove_actor('Kirstie Alley')
+		g.remove_movie('Die Hard')
+		# searches after writes do not label the whole graph again
+		g.bfs('New Actor', 'Bruce Willis')
+		self.assertIsNone(g.components)
+		rebuilt = Graph.from_data(g.to_json())
+		for graph in (g, rebuilt):
+			graph.edges = set((actor.name, movie.name, actor.get_edge_weight(movie))
+							  for actor in graph.actor_vertices for movie in actor.links)
+		self.assertEqual(g.edges, rebuilt.edges)
+		self.assertIn(('New Actor', 'Movie To Come', 0), g.edges)
+		self.assertIn(('Bruce Willis', 'Movie To Come', 0), g.edges)
+		self.assertEqual(dict((actor.name, sorted(costar.name for costar in costars)) for actor, costars in g.get_costars().items()),
+						 dict((actor.name, sorted(costar.name for costar in costars)) for actor, costars in rebuilt.get_costars().items()))
+		self.assertEqual(sorted(g.get_hub_actors(5)), sorted(rebuilt.get_hub_actors(5)))
+		self.assertEqual([count for _, count in g.get_hub_actors(1000)], [count for _, count in rebuilt.get_hub_actors(1000)])
+		# the indexes were updated rather than rebuilt
+		self.assertIs(g.attribute_indexes, indexes)
+		for start, end in ((0, 200), (60, 75), (30, 30)):
+			self.assertEqual(g.get_gross_for_age_group(start, end), rebuilt.get_gross_for_age_group(start, end))
+			self.assertEqual(g.get_actors_in_age_group(start, end), rebuilt.get_actors_in_age_group(start, end))
+		for year in (1988, 1994, 2018):
+			self.assertItemsEqual(g.get_movies_from_year(year), rebuilt.get_movies_from_year(year))
+		self.assertEqual([gross for _, gross in g.get_top_X_grossing_actors(20)],
+						 [gross for _, gross in rebuilt.get_top_X_grossing_actors(20)])
+		self.assertEqual(sorted(g.connected_components()[1]), sorted(rebuilt.connected_components()[1]))
+		self.assertEqual([age for _, age in g.get_oldest_X_actors(3)], [age for _, age in rebuilt.get_oldest_X_actors(3)])
+		self.assertEqual(g.bfs('New Actor', 'Bruce Willis'), rebuilt.bfs('New Actor', 'Bruce Willis'))
+		# names of removed nodes and replaced lists are no longer interned
+		self.assertEqual(g.strings.strings, rebuilt.strings.strings)
+		g.add_actor({'name': 'Passing Actor', 'movies': ['Unmade Movie']})
+		g.remove_actor('Passing Actor')
+		self.assertNotIn('Passing Actor', g.strings)
+		self.assertNotIn('Unmade Movie', g.strings)
+
+	# Test invalid writes are rejected without changing the graph
+	def test_mutation_errors(self):
+		with self.assertRaises(ValueError):
+			self.g.add_actor({'name': 'Bruce Willis'})
+		with self.assertRaises(ValueError):
+			self.g.add_movie({'year': 2000})
+		with self.assertRaises(ValueError):
+			self.g.update_actor('Bruce Willis', {'name': 'Someone Else'})
+		with self.assertRaises(ValueError):
+			self.g.update_movie('Pulp Fiction', {'year': '1994'})
+		with self.assertRaises(ValueError):
+			self.g.add_actor({'name': 'Bad Actor', 'movies': 'Pulp Fiction'})
+		with self.assertRaises(KeyError):
+			self.g.remove_movie('Unknown Movie')
+		self.assertNotIn('Bad Actor', self.g.name_to_actor_node)
+		self.assertEqual(self.g.name_to_movie_node['Pulp Fiction'].year, 1994)
+
 	# Test gross for invalid age group
 	def test_get_gross_for_age_group_invalid(self):
 		# start age larger than end
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from StringIO import StringIO
+from graph import Graph
+from loader import iter_json_records, iter_ndjson_records, write_json_records, write_ndjson_records
+
+class LoaderTests(unittest.TestCase):
+
+	def setUp(self):
+		# read JSON file into Python dictionary
+		with open('model/data/data.json') as f:
+			self.json_data = json.load(f)
+
+	def records_to_data(self, records):
+		d = [{}, {}]
+		for kind, name, record in records:
+			d[0 if kind == 'actor' else 1][name] = record
+		return d
+
+	# test streaming the JSON file gives the same data as loading it at once
+	def test_stream_json(self):
+		with open('model/data/data.json') as f:
+			self.assertEqual(self.records_to_data(iter_json_records(f)), self.json_data)
+		# tiny chunks force records to be split across reads
+		with open('model/data/data.json') as f:
+			self.assertEqual(self.records_to_data(iter_json_records(f, chunk_size=7)), self.json_data)
+
+	# test writing records back in either format
+	def test_write_round_trip(self):
+		records = [('actor', name, record) for name, record in self.json_data[0].items()]
+		records += [('movie', name, record) for name, record in self.json_data[1].items()]
+		out = StringIO()
+		write_json_records(records, out)
+		self.assertEqual(json.loads(out.getvalue()), self.json_data)
+		out = StringIO()
+		write_ndjson_records(records, out)
+		self.assertEqual(self.records_to_data(iter_ndjson_records(StringIO(out.getvalue()))), self.json_data)
+		# empty sections
+		out = StringIO()
+		write_json_records([], out)
+		self.assertEqual(json.loads(out.getvalue()), [{}, {}])
+		self.assertEqual(list(iter_json_records(StringIO(out.getvalue()))), [])
+
+	# test truncated files are rejected
+	def test_stream_truncated(self):
+		with open('model/data/data.json') as f:
+			data = f.read()
+		with self.assertRaises(ValueError):
+			list(iter_json_records(StringIO(data[:len(data) / 2])))
+
+	# test building a graph from a line-delimited file
+	def test_graph_from_ndjson(self):
+		fd, filename = tempfile.mkstemp(suffix='.ndjson')
+		try:
+			with os.fdopen(fd, 'w') as f:
+				write_ndjson_records([('actor', n, r) for n, r in self.json_data[0].items()] +
+									 [('movie', n, r) for n, r in self.json_data[1].items()], f)
+			g = Graph(filename)
+		finally:
+			os.remove(filename)
+		self.assertEqual(g.to_json(), Graph('model/data/data.json').to_json())
+		self.assertEqual(g.get_hub_actors(1), [('Bruce Willis', 305)])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -2,6 +2,7 @@ import json
 import unittest
 from nodes import ActorNode 
 from nodes import MovieNode
+from nodes import StringTable
 
 class GraphTests(unittest.TestCase):
 
@@ -12,9 +13,12 @@ class GraphTests(unittest.TestCase):
 					  'wiki_page' : '', 'json_class': 'movie'}
 		self.movie2 = {'name': 'movie2', 'box_office': 1000, 'year': 2016, 'actors': ['George'],
 					   'wiki_page' : '', 'json_class': 'movie'}
-		self.actor_node = ActorNode(self.actor)
-		self.movie_node = MovieNode(self.movie)
-		self.movie_node2 = MovieNode(self.movie2)
+		# names decoded from JSON are separate objects, as when they are read from the data file
+		self.actor, self.movie, self.movie2 = json.loads(json.dumps([self.actor, self.movie, self.movie2]))
+		self.strings = StringTable()
+		self.actor_node = ActorNode(self.actor, self.strings)
+		self.movie_node = MovieNode(self.movie, self.strings)
+		self.movie_node2 = MovieNode(self.movie2, self.strings)
 
 	# test construct correctly sets fields
 	def test_node_constructors(self):
@@ -28,6 +32,15 @@ class GraphTests(unittest.TestCase):
 		self.assertEqual(self.movie_node.neighbors, {})
 		self.assertEqual(self.actor_node.neighbors, {})
 
+	# test nodes made from their fields match nodes made from dictionaries
+	def test_from_fields(self):
+		actor_node = ActorNode.from_fields(u'Lance', 22, [u'movie1'], 1000, self.strings)
+		movie_node = MovieNode.from_fields(u'movie1', 2017, 100, [u'Lance'], u'', self.strings)
+		self.assertEqual(actor_node.to_json(), self.actor_node.to_json())
+		self.assertEqual(movie_node.to_json(), self.movie_node.to_json())
+		self.assertIs(actor_node.name, self.actor_node.name)
+		self.assertEqual((actor_node.links, actor_node.node_id), ([], None))
+
 	# test converting node to Json (stored in dict)
 	def test_node_to_json(self):
 		json_actor = self.actor_node.to_json()
@@ -59,6 +72,25 @@ class GraphTests(unittest.TestCase):
 		self.assertEqual(self.actor_node.neighbors, {self.movie_node : (22*100)})
 		self.assertEqual(self.movie_node.neighbors, {self.actor_node : (22*100)})
 
+	# test edge weights are derived from the current node attributes
+	def test_edge_weight_derived(self):
+		self.movie_node.add_neighbor(self.actor_node)
+		self.actor_node.add_neighbor(self.movie_node)
+		self.actor_node.age = 23
+		self.assertEqual(self.actor_node.neighbors, {self.movie_node : (23*100)})
+		self.assertEqual(self.movie_node.neighbors, {self.actor_node : (23*100)})
+
+	# test nodes have no per-instance dictionary and share name strings
+	def test_node_slots(self):
+		self.assertFalse(hasattr(self.actor_node, '__dict__'))
+		self.assertFalse(hasattr(self.movie_node, '__dict__'))
+		self.assertIs(self.actor_node.movies[0], self.movie_node.name)
+		self.assertIs(self.movie_node.actors[0], self.actor_node.name)
+		# Lance, movie1, movie2 and George
+		self.assertEqual(len(self.strings), 4)
+		self.strings.discard('George')
+		self.assertNotIn('George', self.strings)
+
 	# test trying to add an invalid neighbor
 	def test_add_neighbor_invalid(self):
 		self.actor_node.add_neighbor(self.movie_node2)
@@ -0,0 +1,35 @@
+import unittest
+from collections import Counter
+from graph import Graph
+from separation import separation_histogram, iter_separations
+
+class SeparationTests(unittest.TestCase):
+
+	def setUp(self):
+		# create graph from JSON file
+		self.g = Graph('model/data/data.json')
+
+	# test that separations match a BFS between each pair of actors
+	def test_rows_match_bfs(self):
+		rows = dict(((a, b), d) for a, b, d in iter_separations(self.g))
+		for actor1 in sorted(self.g.name_to_actor_node.keys())[:25]:
+			for actor2 in self.g.name_to_actor_node.keys():
+				if actor1 == actor2:
+					continue
+				self.assertEqual(rows.get((actor1, actor2), -1), self.g.bfs(actor1, actor2))
+
+	# test histogram is the distribution of the streamed rows
+	def test_histogram_matches_rows(self):
+		histogram = separation_histogram(self.g)
+		self.assertEqual(histogram, dict(Counter(d for _, _, d in iter_separations(self.g))))
+		# separations are symmetric, so every count is over ordered pairs
+		self.assertEqual(histogram[1] % 2, 0)
+
+	# test spreading the sources over a process pool gives the same result
+	def test_histogram_workers(self):
+		self.assertEqual(separation_histogram(self.g, workers=2, chunk_size=50), separation_histogram(self.g))
+		rows = sorted(iter_separations(self.g, workers=2, chunk_size=50))
+		self.assertEqual(rows, sorted(iter_separations(self.g)))
+
+if __name__ == '__main__':
+	unittest.main()
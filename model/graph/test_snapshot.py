@@ -0,0 +1,82 @@
+import os
+import struct
+import tempfile
+import unittest
+from csr_graph import CSRGraph
+from graph import Graph
+from snapshot import HEADER, read_snapshot, write_snapshot
+
+class SnapshotTests(unittest.TestCase):
+
+	def setUp(self):
+		# create graph from JSON file
+		self.g = Graph('model/data/data.json')
+		fd, self.filename = tempfile.mkstemp(suffix='.snapshot')
+		os.close(fd)
+
+	def tearDown(self):
+		os.remove(self.filename)
+
+	def edges(self, g):
+		nodes = list(g.actor_vertices) + list(g.movie_vertices)
+		return dict(((node.name, other.name), w) for node in nodes for other, w in node.neighbors.items())
+
+	# test a CSRGraph is the same after saving and loading
+	def test_csr_round_trip(self):
+		csr = CSRGraph('model/data/data.json')
+		write_snapshot(csr, self.filename)
+		loaded = read_snapshot(self.filename)
+		self.assertEqual(loaded.to_json(), csr.to_json())
+		for name in ('offsets', 'indices', 'weights', 'ages', 'years'):
+			self.assertEqual(list(getattr(loaded, name)), list(getattr(csr, name)))
+		self.assertEqual(loaded.get_node_id('Kirstie Alley'), csr.get_node_id('Kirstie Alley'))
+
+	# test a Graph restored from a snapshot matches one built from JSON
+	def test_graph_round_trip(self):
+		self.g.write_snapshot(self.filename)
+		loaded = Graph.from_snapshot(self.filename)
+		self.assertEqual(loaded.to_json(), self.g.to_json())
+		self.assertEqual(self.edges(loaded), self.edges(self.g))
+		self.assertEqual(loaded.get_hub_actors(2), self.g.get_hub_actors(2))
+		self.assertEqual(loaded.bfs('Danny Aiello', 'Kirstie Alley'), 2)
+
+	# test a snapshot is written from the links of a graph that has changed since it was loaded
+	def test_graph_round_trip_after_writes(self):
+		self.g.add_actor({'name': 'New Actor', 'age': 30, 'movies': ['Look Who\'s Talking'], 'total_gross': 0})
+		self.g.remove_actor('Kirstie Alley')
+		self.g.write_snapshot(self.filename)
+		loaded = Graph.from_snapshot(self.filename)
+		self.assertEqual(loaded.to_json(), self.g.to_json())
+		self.assertEqual(self.edges(loaded), self.edges(self.g))
+		# names in the lists share the decoded copy of the node name
+		actor = loaded.name_to_actor_node['New Actor']
+		self.assertIs(actor.name, loaded.strings.intern(u'New Actor'))
+		self.assertIs(actor.movies[0], actor.links[0].name)
+
+	# test an empty graph can be saved
+	def test_empty_graph(self):
+		write_snapshot(CSRGraph(), self.filename)
+		self.assertEqual(read_snapshot(self.filename).to_json(), [{}, {}])
+
+	# test corrupt and foreign files are rejected
+	def test_invalid_snapshot(self):
+		self.g.write_snapshot(self.filename)
+		with open(self.filename, 'r+b') as f:
+			f.seek(-3, os.SEEK_END)
+			f.write('xyz')
+		with self.assertRaises(ValueError):
+			read_snapshot(self.filename)
+		# the header is checked too, a wrong actor count would slice every section wrongly
+		self.g.write_snapshot(self.filename)
+		with open(self.filename, 'r+b') as f:
+			f.seek(HEADER.size - 16)
+			f.write(struct.pack('<Q', 1))
+		with self.assertRaises(ValueError):
+			read_snapshot(self.filename)
+		with open(self.filename, 'wb') as f:
+			f.write('[{}, {}]' * 20)
+		with self.assertRaises(ValueError):
+			read_snapshot(self.filename)
+
+if __name__ == '__main__':
+	unittest.main()
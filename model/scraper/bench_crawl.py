@@ -0,0 +1,52 @@
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+from crawler import Crawler, PipelineCrawler
+from fixture_server import FixtureServer
+from synthetic_pages import write_site
+from wiki_scraper import parse_actor_page, parse_fetched_page, parse_movie_page, read_page
+
+
+def run_benchmark(pages, latency, levels, processes):
+	""" crawl a generated site from a local server at several concurrency levels and print pages per second
+
+	:param pages: number of actor (and movie) pages to crawl
+	:param latency: seconds the server waits before each response, standing in for the round trip to Wikipedia
+	:param levels: concurrency levels to compare
+	:param processes: number of parse processes for the pipelined crawls, 0 to only parse in the fetch threads
+	"""
+	directory = tempfile.mkdtemp()
+	server = FixtureServer(directory, latency)
+	try:
+		write_site(directory, pages, pages)
+		server.start()
+		print '%-12s %-14s %8s %10s %12s' % ('concurrency', 'parsing', 'pages', 'time (s)', 'pages/s')
+		for concurrency in levels:
+			crawlers = [('threads', Crawler(parse_actor_page, parse_movie_page, pages, pages, concurrency))]
+			if processes:
+				crawlers.append(('%d processes' % processes, PipelineCrawler(read_page, parse_fetched_page, pages, pages,
+																			 concurrency, processes=processes)))
+			for label, crawler in crawlers:
+				start = time.time()
+				actors, movies = crawler.crawl(server.url('/wiki/Actor_0'))
+				seconds = time.time() - start
+				count = len(actors) + len(movies)
+				print '%-12d %-14s %8d %10.2f %12.1f' % (concurrency, label, count, seconds, count / seconds)
+	finally:
+		server.shutdown()
+		server.server_close()
+		shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark crawl throughput against a local server.')
+	parser.add_argument('levels', nargs='*', type=int, default=[1, 2, 4, 8, 16, 32],
+						help='concurrency levels to compare')
+	parser.add_argument('--pages', type=int, default=150, help='number of actor (and movie) pages to crawl')
+	parser.add_argument('--latency', type=float, default=0.1, help='seconds of simulated round trip per request')
+	parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+						help='parse processes for the pipelined crawls, 0 to skip them')
+	args = parser.parse_args()
+	run_benchmark(args.pages, args.latency, args.levels, args.processes)
@@ -0,0 +1,48 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import wiki_scraper
+from synthetic_pages import write_site
+
+
+def run_benchmark(pages, paragraphs):
+	""" time parsing the same pages with each available parse backend and check they agree
+
+	:param pages: number of actor (and movie) pages to parse
+	:param paragraphs: number of filler paragraphs in each page
+	"""
+	directory = tempfile.mkdtemp()
+	try:
+		write_site(directory, pages, pages, paragraphs=paragraphs)
+		html = []
+		for i in xrange(pages):
+			for kind, parse in (('Actor', wiki_scraper.parse_actor), ('Movie', wiki_scraper.parse_movie)):
+				with open(os.path.join(directory, 'wiki', '%s_%d' % (kind, i))) as f:
+					html.append((parse, f.read(), '/wiki/%s_%d' % (kind, i)))
+		size = sum(len(body) for _, body, _ in html) / len(html) / 1024.0
+		print '%d pages of %.0f KB on average' % (len(html), size)
+		print '%-10s %14s %10s %10s' % ('backend', 'ms per page', 'speedup', 'same')
+		expected = None
+		baseline = None
+		backends = [backend for backend in wiki_scraper.PARSE_BACKENDS if backend != 'lxml' or wiki_scraper.lxml]
+		for backend in backends:
+			wiki_scraper.use_parse_backend(backend)
+			start = time.time()
+			# parse the HTML directly, so the time is not spent reading files
+			records = [parse(wiki_scraper.parse_html(body), url) for parse, body, url in html]
+			seconds = (time.time() - start) / len(html)
+			if expected is None:
+				expected, baseline = records, seconds
+			print '%-10s %14.1f %9.1fx %10s' % (backend, seconds * 1000, baseline / seconds, records == expected)
+	finally:
+		shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark per-page parse time of each parse backend.')
+	parser.add_argument('--pages', type=int, default=50, help='number of actor (and movie) pages to parse')
+	parser.add_argument('--paragraphs', type=int, default=200, help='filler paragraphs per page, 200 is about 100 KB')
+	args = parser.parse_args()
+	run_benchmark(args.pages, args.paragraphs)
@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+
+# json_class written with each record, as in the NDJSON files the graph loads
+JSON_CLASSES = {'actor': 'Actor', 'movie': 'Movie'}
+# status of a page in the persistent frontier
+QUEUED, DONE, FAILED = 0, 1, 2
+
+
+def graph_record(kind, record):
+	""" convert a parsed page to a record with the fields the graph loader reads, as in data.json
+
+	Actor pages do not give a total gross, it is written as 0, the default for a record loaded without one.
+
+	:param kind: 'actor' or 'movie'
+	:param record: dictionary from parse_actor or parse_movie
+	:return: the record
+	"""
+	if kind == 'actor':
+		return {'json_class': JSON_CLASSES[kind], 'name': record['name'], 'age': record['age'], 'total_gross': 0,
+				'movies': record['movies']}
+	return {'json_class': JSON_CLASSES[kind], 'name': record['name'], 'year': record['year'],
+			'box_office': record['gross'], 'actors': record['actors'], 'wiki_page': record['wiki_page']}
+
+
+class CrawlState(object):
+	""" frontier, seen pages and counts of a crawl, kept in memory
+
+	Pages are identified by their url relative to the site, like the links in actor and movie dictionaries.
+	"""
+
+	def __init__(self):
+		""" Constructor.
+
+		"""
+		# relative urls already queued or parsed, so no page is fetched twice
+		self.seen = {'actor': set(), 'movie': set()}
+		self.frontier = {'actor': deque(), 'movie': deque()}
+		# number of pages parsed successfully
+		self.counts = {'actor': 0, 'movie': 0}
+
+	def started(self):
+		""" check whether the crawl already has pages, so there is no need to start from the first page
+
+		:return: True if any page was queued or parsed
+		"""
+		return bool(self.seen['actor'] or self.seen['movie'])
+
+	def add_links(self, kind, links):
+		""" queue the pages a parsed page links to that were not seen before
+
+		:param kind: 'actor' or 'movie'
+		:param links: relative urls of the pages
+		"""
+		for link in links:
+			if link not in self.seen[kind]:
+				self.seen[kind].add(link)
+				self.frontier[kind].append(link)
+
+	def pop(self, kind):
+		""" take the next page to crawl off the frontier
+
+		:param kind: 'actor' or 'movie'
+		:return: relative url, or None if the frontier is empty
+		"""
+		return self.frontier[kind].popleft() if self.frontier[kind] else None
+
+	def accept(self, kind, link, record):
+		""" record a page that was parsed successfully
+
+		:param kind: 'actor' or 'movie'
+		:param link: relative url of the page
+		:param record: the parsed dictionary
+		"""
+		self.seen[kind].add(link)
+		self.counts[kind] += 1
+
+	def retry(self, kind, link):
+		""" put a page that could not be fetched back at the end of the frontier
+
+		:param kind: 'actor' or 'movie'
+		:param link: relative url of the page
+		"""
+		self.frontier[kind].append(link)
+
+	def reject(self, kind, link):
+		""" record a page that does not exist, could not be parsed or could not be fetched after several attempts
+
+		:param kind: 'actor' or 'movie'
+		:param link: relative url of the page
+		"""
+
+	def checkpoint(self):
+		""" make the progress so far durable
+
+		"""
+
+
+class PersistentCrawlState(CrawlState):
+	""" CrawlState saved in SQLite with parsed records appended to an NDJSON file, so a crawl can be resumed
+
+	Changes are committed at checkpoints, together with the length of the NDJSON file at that point. Resuming goes
+	back to the last checkpoint: later lines are cut from the file and pages that were in flight are queued again.
+	Pages that could not be fetched stay queued, so an interrupted or paused crawl tries them again.
+	"""
+
+	def __init__(self, database, output, resume=False, checkpoint_pages=50, checkpoint_seconds=30.0):
+		""" Constructor.
+
+		:param database: SQLite file holding the frontier and seen pages
+		:param output: NDJSON file parsed records are appended to, one actor or movie object per line
+		:param resume: carry on from the last checkpoint in database, otherwise start a new crawl
+		:param checkpoint_pages: number of parsed or failed pages between checkpoints
+		:param checkpoint_seconds: most seconds between checkpoints
+		"""
+		CrawlState.__init__(self)
+		self.checkpoint_pages = checkpoint_pages
+		self.checkpoint_seconds = checkpoint_seconds
+		self.db = sqlite3.connect(database)
+		self.db.execute('CREATE TABLE IF NOT EXISTS pages (kind TEXT, url TEXT, status INTEGER, PRIMARY KEY (kind, url))')
+		self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+		if not resume:
+			self.db.execute('DELETE FROM pages')
+			self.db.execute('DELETE FROM meta')
+		row = self.db.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+		offset = row[0] if row is not None else 0
+		self.db.commit()
+		# records written after the last checkpoint belong to pages that will be parsed again
+		self.output = open(output, 'ab')
+		self.output.truncate(offset)
+		self.output.seek(offset)
+		for kind, link, status in self.db.execute('SELECT kind, url, status FROM pages ORDER BY rowid'):
+			self.seen[kind].add(link)
+			if status == QUEUED:
+				self.frontier[kind].append(link)
+			elif status == DONE:
+				self.counts[kind] += 1
+		self.changes = 0
+		self.last_checkpoint = time.time()
+
+	def add_links(self, kind, links):
+		""" queue the pages a parsed page links to that were not seen before
+
+		:param kind: 'actor' or 'movie'
+		:param links: relative urls of the pages
+		"""
+		links = [link for link in links if link not in self.seen[kind]]
+		CrawlState.add_links(self, kind, links)
+		self.db.executemany('INSERT OR IGNORE INTO pages VALUES (?, ?, ?)', [(kind, link, QUEUED) for link in links])
+
+	def accept(self, kind, link, record):
+		""" record a page that was parsed successfully and append it to the output, as a graph_record
+
+		:param kind: 'actor' or 'movie'
+		:param link: relative url of the page
+		:param record: the parsed dictionary
+		"""
+		CrawlState.accept(self, kind, link, record)
+		self.output.write(json.dumps(graph_record(kind, record)) + '\n')
+		self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)', (kind, link, DONE))
+		self.changed()
+
+	def reject(self, kind, link):
+		""" record a page that does not exist, could not be parsed or could not be fetched after several attempts, it is
+		not tried again on resume
+
+		:param kind: 'actor' or 'movie'
+		:param link: relative url of the page
+		"""
+		self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)', (kind, link, FAILED))
+		self.changed()
+
+	def changed(self):
+		""" count a parsed or failed page and checkpoint when enough pages or time have gone by
+
+		"""
+		self.changes += 1
+		if self.changes >= self.checkpoint_pages or time.time() - self.last_checkpoint >= self.checkpoint_seconds:
+			self.checkpoint()
+
+	def checkpoint(self):
+		""" make the progress so far durable, records reach the disk before the frontier that refers to them
+
+		"""
+		self.output.flush()
+		os.fsync(self.output.fileno())
+		self.db.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (self.output.tell(),))
+		self.db.commit()
+		self.changes = 0
+		self.last_checkpoint = time.time()
+
+	def close(self):
+		""" checkpoint and close the files
+
+		"""
+		self.checkpoint()
+		self.output.close()
+		self.db.close()
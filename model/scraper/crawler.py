@@ -0,0 +1,431 @@
+import logging
+import multiprocessing
+import Queue
+import threading
+import time
+from crawl_state import CrawlState
+from urlparse import urlsplit
+
+# number of links followed from each page, newest filmography entries and top billed cast
+LINKS_PER_PAGE = 20
+# seconds the pipeline threads wait on a queue or a parse before checking whether the crawl is stopping
+POLL_INTERVAL = 0.1
+
+
+class FetchError(Exception):
+	""" raised by fetch and parse functions when a page could not be fetched now but may be later, such as when the
+	server is down, as opposed to a page that does not exist or cannot be parsed
+
+	"""
+
+
+class HostLimiter(object):
+	""" spaces out requests to the same host, shared by all workers, only requests that reach the network wait for it
+
+	"""
+
+	def __init__(self, delay):
+		""" Constructor.
+
+		:param delay: minimum seconds between the start of two requests to one host
+		"""
+		self.delay = delay
+		# host -> time the next request to it may start
+		self.next_start = {}
+		self.lock = threading.Lock()
+
+	def wait(self, url):
+		""" block until a request to url may start
+
+		:param url: url about to be requested
+		"""
+		if self.delay <= 0:
+			return
+		host = urlsplit(url).netloc
+		with self.lock:
+			now = time.time()
+			start = max(now, self.next_start.get(host, now))
+			# claim the slot before sleeping so other workers queue up behind it
+			self.next_start[host] = start + self.delay
+		if start > now:
+			time.sleep(start - now)
+
+
+def parse_safely(parse, kind, url, html):
+	""" run a parse function in a pool process, an exception in a page must not lose its result
+
+	:param parse: function of (kind, url, html) returning a dictionary, or None if the page is not of that kind
+	:param kind: 'actor' or 'movie'
+	:param url: url the page was fetched from
+	:param html: the fetched page
+	:return: (kind, url, dictionary or None)
+	"""
+	try:
+		return kind, url, parse(kind, url, html)
+	except Exception:
+		logging.exception('' + url + ' raised an error while parsing as ' + kind + ' page')
+		return kind, url, None
+
+
+def drain(queue):
+	""" drop every item waiting in a queue
+
+	:param queue: the Queue
+	"""
+	try:
+		while True:
+			queue.get_nowait()
+	except Queue.Empty:
+		pass
+
+
+class Crawler(object):
+	""" crawls actor and movie pages with a pool of worker threads, stopping at exactly the requested counts
+
+	A single coordinating thread owns the frontier and results, workers only fetch and parse pages. With a
+	concurrency of 0 every page is parsed in the coordinating thread, one at a time, which is easiest to debug.
+
+	Pages that cannot be fetched go back on the frontier, and the crawl backs off while fetches keep failing and stops
+	after max_fetch_errors of them in a row, so an outage does not use up the frontier.
+	"""
+
+	def __init__(self, parse_actor, parse_movie, max_actors, max_movies, concurrency=8, max_fetch_errors=5,
+				 retry_delay=1.0, fetch_attempts=3):
+		""" Constructor.
+
+		:param parse_actor: function of a url returning an actor dictionary, or None if the page is not an actor, it
+			spaces out its own requests since only it knows which are answered from a cache, and raises FetchError if
+			the page could not be fetched
+		:param parse_movie: function of a url returning a movie dictionary, or None if the page is not a movie
+		:param max_actors: number of actor pages to parse
+		:param max_movies: number of movie pages to parse
+		:param concurrency: number of pages fetched at once, 0 to crawl without any threads
+		:param max_fetch_errors: number of pages in a row that could not be fetched before the crawl stops, it can be
+			resumed from its CrawlState later
+		:param retry_delay: seconds to wait after a page could not be fetched, doubled for each one in a row
+		:param fetch_attempts: number of times a page is fetched before it is given up on
+		"""
+		self.parse = {'actor': parse_actor, 'movie': parse_movie}
+		self.limits = {'actor': max_actors, 'movie': max_movies}
+		self.concurrency = concurrency
+		self.max_fetch_errors = max_fetch_errors
+		self.retry_delay = retry_delay
+		self.fetch_attempts = fetch_attempts
+		# most pages handed out and not yet returned by next_result
+		self.capacity = max(concurrency, 1)
+
+	def parse_url(self, kind, url):
+		""" fetch and parse a page in the calling thread
+
+		:param kind: 'actor' or 'movie'
+		:param url: url of the page
+		:return: dictionary for the page, None if it is not of that kind, or the FetchError if it could not be fetched
+		"""
+		try:
+			return self.parse[kind](url)
+		except FetchError as e:
+			return e
+		except Exception:
+			# a page the parser cannot handle must not stop the crawl
+			logging.exception('' + url + ' raised an error while parsing as ' + kind + ' page')
+			return None
+
+	def work(self):
+		""" worker thread, fetches and parses pages until it is handed None
+
+		"""
+		while True:
+			task = self.tasks.get()
+			if task is None:
+				return
+			kind, url = task
+			self.results.put((kind, url, self.parse_url(kind, url)))
+
+	def start(self):
+		""" start the workers for a crawl
+
+		"""
+		self.tasks = Queue.Queue()
+		self.results = Queue.Queue()
+		self.workers = [threading.Thread(target=self.work) for _ in xrange(self.concurrency)]
+		for worker in self.workers:
+			worker.daemon = True
+			worker.start()
+
+	def submit(self, kind, url):
+		""" hand a page to the workers
+
+		:param kind: 'actor' or 'movie'
+		:param url: url of the page
+		"""
+		if self.concurrency == 0:
+			self.results.put((kind, url, self.parse_url(kind, url)))
+		else:
+			self.tasks.put((kind, url))
+
+	def next_result(self):
+		""" wait for a page handed to submit to be parsed
+
+		:return: (kind, url, dictionary, None or FetchError)
+		"""
+		return self.results.get()
+
+	def stop(self, finished):
+		""" stop the workers after a crawl
+
+		:param finished: True if every page handed out was returned, False if the crawl was interrupted
+		"""
+		# pages no worker has started are dropped, so the workers are handed None next
+		drain(self.tasks)
+		for worker in self.workers:
+			self.tasks.put(None)
+		for worker in self.workers:
+			worker.join()
+
+	def crawl(self, starting_url, state=None):
+		""" crawl outwards from a page, alternating between actor and movie pages through their links
+
+		:param starting_url: first page, parsed as an actor or else as a movie
+		:param state: CrawlState to keep the frontier in, a new one if None, a state that already has pages carries
+			on from its frontier instead of starting_url
+		:return: (list of actor dictionaries, list of movie dictionaries) parsed by this call, in the order they were
+			parsed, fewer than the limits if pages could not be fetched
+		"""
+		state = state or CrawlState()
+		parts = urlsplit(starting_url)
+		# all URLS in dictionaries are relative, need this.
+		baseurl = '%s://%s' % (parts.scheme, parts.netloc)
+		found = {'actor': [], 'movie': []}
+		# pages being fetched, counted against the limits so they are never overshot
+		in_flight = {'actor': 0, 'movie': 0}
+		# (kind, relative url) -> times the page could not be fetched
+		attempts = {}
+		# pages in a row that could not be fetched
+		fetch_errors = 0
+
+		def accept(kind, url, record):
+			""" store a parsed page and queue the pages it links to """
+			found[kind].append(record)
+			state.accept(kind, url[len(baseurl):], record)
+			if kind == 'actor':
+				state.add_links('movie', record['movieurls'][-LINKS_PER_PAGE:])
+			else:
+				state.add_links('actor', record['actorurls'][:LINKS_PER_PAGE])
+
+		# attempt to parse starting page as actor, then as a movie
+		for kind in ('actor', 'movie'):
+			if state.started():
+				break
+			if self.limits[kind] == 0:
+				continue
+			record = self.parse_url(kind, starting_url)
+			if isinstance(record, FetchError):
+				logging.error('' + starting_url + ' could not be fetched, crawl must terminate')
+				return found['actor'], found['movie']
+			if record is not None:
+				accept(kind, starting_url, record)
+				break
+			logging.warning('' + starting_url + ' was unable to be parsed as ' + kind + ' page')
+		else:
+			logging.error('' + starting_url + ' could not be parsed, crawl must terminate')
+			return found['actor'], found['movie']
+
+		self.start()
+		pending = 0
+		try:
+			while True:
+				# hand out work while there is room, alternating kinds to grow both frontiers
+				scheduled = True
+				while pending < self.capacity and scheduled:
+					scheduled = False
+					for kind in ('movie', 'actor'):
+						if pending < self.capacity and state.counts[kind] + in_flight[kind] < self.limits[kind]:
+							link = state.pop(kind)
+							if link is not None:
+								self.submit(kind, baseurl + link)
+								in_flight[kind] += 1
+								pending += 1
+								scheduled = True
+				if pending == 0:
+					# limits reached or nothing left to crawl
+					break
+				kind, url, record = self.next_result()
+				pending -= 1
+				in_flight[kind] -= 1
+				if isinstance(record, FetchError):
+					link = url[len(baseurl):]
+					attempts[kind, link] = attempts.get((kind, link), 0) + 1
+					if attempts[kind, link] < self.fetch_attempts:
+						state.retry(kind, link)
+					else:
+						state.reject(kind, link)
+					fetch_errors += 1
+					if fetch_errors >= self.max_fetch_errors:
+						logging.error(str(fetch_errors) + ' pages in a row could not be fetched, crawl must pause')
+						break
+					# give the server time to recover
+					time.sleep(self.retry_delay * 2 ** (fetch_errors - 1))
+					continue
+				fetch_errors = 0
+				if record is not None:
+					accept(kind, url, record)
+				else:
+					state.reject(kind, url[len(baseurl):])
+		finally:
+			self.stop(pending == 0)
+			state.checkpoint()
+		return found['actor'], found['movie']
+
+
+class PipelineCrawler(Crawler):
+	""" Crawler that fetches pages in threads and parses them in a pool of processes, so parsing uses every core
+
+	Fetched pages wait in a bounded queue for the parse stage, fetch workers block when it is full, and the
+	coordinating thread updates the frontier from the parsed results. Every thread of a crawl is joined when it ends,
+	finished or paused.
+	"""
+
+	def __init__(self, fetch, parse, max_actors, max_movies, concurrency=8, processes=None, queue_size=16,
+				 max_fetch_errors=5, retry_delay=1.0, fetch_attempts=3):
+		""" Constructor.
+
+		:param fetch: function of a url returning the page, or None if there is no such page, it spaces out its own
+			requests and raises FetchError if the page could not be fetched
+		:param parse: function of (kind, url, page) returning a dictionary, or None if the page is not of that kind,
+			must be defined at module level so it can be sent to the pool
+		:param max_actors: number of actor pages to parse
+		:param max_movies: number of movie pages to parse
+		:param concurrency: number of pages fetched at once
+		:param processes: number of parse processes, the number of cores if None
+		:param queue_size: number of fetched pages that can wait to be parsed
+		:param max_fetch_errors: number of pages in a row that could not be fetched before the crawl stops
+		:param retry_delay: seconds to wait after a page could not be fetched, doubled for each one in a row
+		:param fetch_attempts: number of times a page is fetched before it is given up on
+		"""
+		Crawler.__init__(self, None, None, max_actors, max_movies, max(concurrency, 1), max_fetch_errors, retry_delay,
+						 fetch_attempts)
+		self.fetch = fetch
+		self.parse_page = parse
+		self.processes = processes or multiprocessing.cpu_count()
+		self.queue_size = queue_size
+		# enough pages in flight for every fetch worker, the queue and every parse process to be busy
+		self.capacity = self.concurrency + queue_size + self.processes
+
+	def parse_url(self, kind, url):
+		""" fetch and parse a page in the calling thread
+
+		:param kind: 'actor' or 'movie'
+		:param url: url of the page
+		:return: dictionary for the page, None if it is not of that kind, or the FetchError if it could not be fetched
+		"""
+		try:
+			page = self.fetch(url)
+		except FetchError as e:
+			return e
+		if page is None:
+			return None
+		return parse_safely(self.parse_page, kind, url, page)[2]
+
+	def work(self):
+		""" fetch worker thread, fetches pages for the parse stage until it is handed None
+
+		"""
+		while True:
+			task = self.tasks.get()
+			if task is None:
+				return
+			kind, url = task
+			try:
+				page = self.fetch(url)
+			except FetchError as e:
+				self.results.put((kind, url, e))
+				continue
+			if page is None:
+				# nothing to parse
+				self.results.put((kind, url, None))
+			else:
+				self.hand_over((kind, url, page))
+
+	def hand_over(self, item):
+		""" queue a fetched page for the parse stage, blocking while it is behind unless the crawl is stopping
+
+		:param item: (kind, url, page)
+		"""
+		while not self.stopping.is_set():
+			try:
+				self.fetched.put(item, timeout=POLL_INTERVAL)
+				return
+			except Queue.Full:
+				pass
+
+	def dispatch(self):
+		""" hand fetched pages to the pool, no more than one waiting per process, and pass on each parse as it
+		finishes, until the crawl is stopping
+
+		"""
+		# ((kind, url, page), AsyncResult) of the pages in the pool, oldest first
+		running = []
+		while not self.stopping.is_set():
+			for task in [task for task in running if task[1].ready()]:
+				running.remove(task)
+				self.results.put(self.parsed(*task))
+			if len(running) >= self.processes:
+				running[0][1].wait(POLL_INTERVAL)
+				continue
+			try:
+				item = self.fetched.get(timeout=POLL_INTERVAL)
+			except Queue.Empty:
+				continue
+			running.append((item, self.pool.apply_async(parse_safely, (self.parse_page,) + item)))
+
+	def parsed(self, item, result):
+		""" get the result of a finished parse, a page that could not be sent to or returned from the pool gives None
+
+		:param item: (kind, url, page) handed to the pool
+		:param result: AsyncResult of the parse, ready
+		:return: (kind, url, dictionary or None)
+		"""
+		try:
+			return result.get()
+		except Exception:
+			kind, url, _ = item
+			logging.exception('' + url + ' could not be handed to or returned from a parse process')
+			return kind, url, None
+
+	def start(self):
+		""" start the pool, the fetch workers and the thread feeding the pool
+
+		"""
+		# fork the pool before any threads of this crawl are running
+		self.pool = multiprocessing.Pool(self.processes)
+		self.fetched = Queue.Queue(maxsize=self.queue_size)
+		self.stopping = threading.Event()
+		Crawler.start(self)
+		self.dispatcher = threading.Thread(target=self.dispatch)
+		self.dispatcher.daemon = True
+		self.dispatcher.start()
+
+	def submit(self, kind, url):
+		""" hand a page to the fetch workers
+
+		:param kind: 'actor' or 'movie'
+		:param url: url of the page
+		"""
+		self.tasks.put((kind, url))
+
+	def stop(self, finished):
+		""" stop the workers and the pool after a crawl
+
+		:param finished: True if every page handed out was returned, False if the crawl was interrupted
+		"""
+		# fetch workers waiting on the parse stage drop their page, and the dispatcher stops handing pages to the pool
+		self.stopping.set()
+		self.dispatcher.join()
+		Crawler.stop(self, finished)
+		drain(self.fetched)
+		if finished:
+			# every stage is idle, so the pool can finish cleanly
+			self.pool.close()
+		else:
+			self.pool.terminate()
+		self.pool.join()
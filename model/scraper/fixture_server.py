@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+import time
+import urllib
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from email.utils import formatdate
+from SocketServer import ThreadingMixIn
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+	""" serve saved pages from the server's directory, a missing page is a 404 like on Wikipedia
+
+	Pages carry an ETag and Last-Modified, and conditional requests for unchanged pages get a 304.
+
+	"""
+
+	def do_GET(self):
+		server = self.server
+		path = urllib.unquote(self.path.split('?', 1)[0])
+		with server.lock:
+			server.requests.append(path)
+		# stand-in for the round trip to a real server
+		time.sleep(server.latency)
+		if server.down:
+			self.record(path, 503)
+			self.send_error(503)
+			return
+		filename = os.path.normpath(os.path.join(server.directory, path.lstrip('/')))
+		if not filename.startswith(server.directory) or not os.path.isfile(filename):
+			self.record(path, 404)
+			self.send_error(404)
+			return
+		with open(filename, 'rb') as f:
+			body = f.read()
+		etag = '"%s"' % hashlib.sha1(body).hexdigest()
+		last_modified = formatdate(os.path.getmtime(filename), usegmt=True)
+		# If-None-Match takes precedence over If-Modified-Since when both are sent
+		if_none_match = self.headers.getheader('If-None-Match')
+		if if_none_match == etag or (if_none_match is None and self.headers.getheader('If-Modified-Since') == last_modified):
+			self.record(path, 304)
+			self.send_response(304)
+			self.send_header('ETag', etag)
+			self.end_headers()
+			return
+		self.record(path, 200)
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/html; charset=UTF-8')
+		self.send_header('Content-Length', str(len(body)))
+		self.send_header('ETag', etag)
+		self.send_header('Last-Modified', last_modified)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def record(self, path, status):
+		""" note the status a request was answered with
+
+		:param path: path requested
+		:param status: HTTP status of the response
+		"""
+		with self.server.lock:
+			self.server.statuses.append((path, status))
+
+	def log_message(self, format, *args):
+		# keep test and benchmark output clean
+		pass
+
+
+class FixtureServer(ThreadingMixIn, HTTPServer):
+	""" local HTTP server for saved pages, so the scraper can be tested and benchmarked without the network
+
+	"""
+	daemon_threads = True
+	# benchmarks open many connections at once
+	request_queue_size = 128
+
+	def __init__(self, directory, latency=0.0):
+		""" Constructor.
+
+		:param directory: directory holding the pages, a request for /wiki/X is served from <directory>/wiki/X
+		:param latency: seconds to wait before answering each request
+		"""
+		HTTPServer.__init__(self, ('127.0.0.1', 0), FixtureRequestHandler)
+		self.directory = os.path.abspath(directory)
+		self.latency = latency
+		# paths requested so far, in order
+		self.requests = []
+		# (path, status) of the responses sent so far
+		self.statuses = []
+		# True to answer every request with 503, like a server in an outage
+		self.down = False
+		self.lock = threading.Lock()
+
+	def url(self, path=''):
+		""" get the URL of a page on this server
+
+		:param path: path of the page, such as /wiki/Actor_0
+		:return: full URL
+		"""
+		return 'http://127.0.0.1:%d%s' % (self.server_address[1], path)
+
+	def start(self):
+		""" serve requests in a background thread until shutdown is called
+
+		"""
+		thread = threading.Thread(target=self.serve_forever)
+		thread.daemon = True
+		thread.start()
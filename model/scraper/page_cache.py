@@ -0,0 +1,183 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib2
+
+
+class PageCache(object):
+	""" on-disk cache of fetched pages, revalidated with ETag and Last-Modified
+
+	Bodies are stored once per distinct content under objects/, named by their SHA-1, and an SQLite index maps each
+	url to its body and validators. Least recently used pages are evicted once the bodies exceed max_bytes.
+	"""
+
+	def __init__(self, directory, ttl=None, max_bytes=1 << 30, offline=False):
+		""" Constructor.
+
+		:param directory: directory to keep the cache in, created if missing
+		:param ttl: seconds a fetched page is used without asking the server, None to revalidate on every fetch
+		:param max_bytes: total size of stored bodies to keep
+		:param offline: only serve pages already in the cache, never use the network
+		"""
+		self.directory = directory
+		self.ttl = ttl
+		self.max_bytes = max_bytes
+		self.offline = offline
+		if not os.path.isdir(os.path.join(directory, 'objects')):
+			os.makedirs(os.path.join(directory, 'objects'))
+		# shared by the crawler's worker threads, every use holds the lock
+		self.db = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+		self.lock = threading.Lock()
+		with self.lock, self.db:
+			self.db.execute('CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, digest TEXT, etag TEXT, '
+							'last_modified TEXT, fetched REAL, used REAL)')
+			self.db.execute('CREATE INDEX IF NOT EXISTS pages_used ON pages (used)')
+			self.db.execute('CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, size INTEGER)')
+			self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+
+	def object_path(self, digest):
+		""" get the file a body is stored in
+
+		:param digest: SHA-1 of the body
+		:return: path of the file
+		"""
+		return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+	def lookup(self, url):
+		""" find the cached copy of a page
+
+		:param url: url of the page
+		:return: (digest, etag, last_modified, fetched), or None if the page is not cached
+		"""
+		with self.lock:
+			return self.db.execute('SELECT digest, etag, last_modified, fetched FROM pages WHERE url = ?',
+								   (url,)).fetchone()
+
+	def read(self, url, digest, fetched=None):
+		""" read a cached body and mark the page as used
+
+		:param url: url of the page
+		:param digest: SHA-1 of the body
+		:param fetched: time the server last confirmed the body, None to keep the stored time
+		:return: the body, or None if it has been evicted since it was looked up
+		"""
+		try:
+			with open(self.object_path(digest), 'rb') as f:
+				body = f.read()
+		except IOError:
+			return None
+		with self.lock, self.db:
+			self.db.execute('UPDATE pages SET used = ?, fetched = COALESCE(?, fetched) WHERE url = ?',
+							(time.time(), fetched, url))
+		return body
+
+	def store(self, url, body, etag, last_modified):
+		""" add or replace the cached copy of a page
+
+		:param url: url of the page
+		:param body: the body
+		:param etag: ETag header of the response, or None
+		:param last_modified: Last-Modified header of the response, or None
+		"""
+		digest = hashlib.sha1(body).hexdigest()
+		path = self.object_path(digest)
+		if not os.path.isdir(os.path.dirname(path)):
+			try:
+				os.makedirs(os.path.dirname(path))
+			except OSError:
+				# another thread made it first
+				pass
+		if not os.path.exists(path):
+			# write then rename, so a body is never read half written
+			handle, temp = tempfile.mkstemp(dir=os.path.dirname(path))
+			with os.fdopen(handle, 'wb') as f:
+				f.write(body)
+			os.rename(temp, path)
+		now = time.time()
+		with self.lock, self.db:
+			old = self.db.execute('SELECT digest FROM pages WHERE url = ?', (url,)).fetchone()
+			self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+							(url, digest, etag, last_modified, now, now))
+			if self.db.execute('INSERT OR IGNORE INTO objects VALUES (?, ?)', (digest, len(body))).rowcount:
+				self.size += len(body)
+			if old is not None and old[0] != digest:
+				self.release(old[0])
+			self.evict()
+
+	def release(self, digest):
+		""" delete a body no page refers to anymore, called with the lock held
+
+		:param digest: SHA-1 of the body
+		"""
+		if self.db.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (digest,)).fetchone() is not None:
+			return
+		size = self.db.execute('SELECT size FROM objects WHERE digest = ?', (digest,)).fetchone()[0]
+		self.db.execute('DELETE FROM objects WHERE digest = ?', (digest,))
+		self.size -= size
+		try:
+			os.remove(self.object_path(digest))
+		except OSError:
+			pass
+
+	def evict(self):
+		""" drop least recently used pages until the bodies fit in max_bytes, called with the lock held
+
+		"""
+		while self.size > self.max_bytes:
+			oldest = self.db.execute('SELECT url, digest FROM pages ORDER BY used LIMIT 1').fetchone()
+			if oldest is None:
+				return
+			self.db.execute('DELETE FROM pages WHERE url = ?', (oldest[0],))
+			self.release(oldest[1])
+
+	def fetch(self, url, wait=None):
+		""" get the body of a page, from the cache when it is fresh or the server says it has not changed
+
+		:param url: url of the page
+		:param wait: function of the url called before each request to the server, such as HostLimiter.wait, pages
+			read from disk do not call it
+		:return: the body, raises urllib2.HTTPError or urllib2.URLError like urllib2.urlopen
+		"""
+		entry = self.lookup(url)
+		if entry is not None:
+			digest, etag, last_modified, fetched = entry
+			if self.offline or (self.ttl is not None and time.time() - fetched < self.ttl):
+				body = self.read(url, digest)
+				if body is not None:
+					return body
+		if self.offline:
+			raise urllib2.URLError('%s is not in the page cache' % url)
+		request = urllib2.Request(url)
+		if entry is not None:
+			# ask the server to answer 304 if the page has not changed
+			if etag:
+				request.add_header('If-None-Match', etag)
+			if last_modified:
+				request.add_header('If-Modified-Since', last_modified)
+		if wait is not None:
+			wait(url)
+		try:
+			response = urllib2.urlopen(request)
+		except urllib2.HTTPError as e:
+			if e.code != 304 or entry is None:
+				raise
+			body = self.read(url, entry[0], time.time())
+			if body is not None:
+				return body
+			# evicted in the meantime, fetch it again in full
+			if wait is not None:
+				wait(url)
+			response = urllib2.urlopen(url)
+		body = response.read()
+		self.store(url, body, response.info().getheader('ETag'), response.info().getheader('Last-Modified'))
+		return body
+
+	def close(self):
+		""" close the index, the cache can be opened again from its directory
+
+		"""
+		with self.lock:
+			self.db.close()
@@ -0,0 +1,133 @@
+import os
+import random
+
+# words the filler paragraphs are made from
+WORDS = ('film', 'role', 'career', 'award', 'studio', 'critics', 'release', 'director', 'television', 'series',
+		 'production', 'performance', 'audience', 'season', 'premiere', 'festival', 'nominated', 'starred')
+
+
+def filler(rng, paragraphs):
+	""" generate article text like the body of a Wikipedia page, which the parser has to skip over
+
+	:param rng: random generator
+	:param paragraphs: number of paragraphs
+	:return: HTML string
+	"""
+	parts = []
+	for _ in xrange(paragraphs):
+		words = [rng.choice(WORDS) for _ in xrange(60)]
+		# body text links to other articles, which the scraper does not follow
+		topic = rng.randrange(1000)
+		words[rng.randrange(60)] = '<a href="/wiki/Topic_%d" title="Topic %d">topic</a>' % (topic, topic)
+		parts.append('<p>%s.<sup class="reference"><a href="#cite_note-%d">[%d]</a></sup></p>' %
+					 (' '.join(words).capitalize(), topic, topic))
+	return '\n'.join(parts)
+
+
+def page(title, body):
+	""" wrap the body of an article in the page around it
+
+	:param title: title of the article
+	:param body: HTML of the article
+	:return: HTML string
+	"""
+	return ('<!DOCTYPE html>\n<html lang="en"><head><meta charset="UTF-8"/><title>%s - Wikipedia</title></head>\n'
+			'<body><div id="content"><h1 id="firstHeading" class="firstHeading">%s</h1>\n'
+			'<div id="bodyContent"><div class="mw-parser-output">\n%s\n</div></div></div>\n'
+			'<div id="footer"><p>Text is available under the Creative Commons Attribution-ShareAlike License.</p></div>'
+			'</body></html>\n') % (title, title, body)
+
+
+def link(kind, i):
+	""" link to an actor or movie page
+
+	:param kind: 'Actor' or 'Movie'
+	:param i: number of the actor or movie
+	:return: HTML string
+	"""
+	return '<a href="/wiki/%s_%d" title="%s %d">%s %d</a>' % (kind, i, kind, i, kind, i)
+
+
+def actor_page(rng, i, movies, paragraphs):
+	""" generate an actor page in one of the layouts the scraper handles
+
+	:param rng: random generator
+	:param i: number of the actor
+	:param movies: numbers of the movies in the actor's filmography
+	:param paragraphs: number of filler paragraphs
+	:return: HTML string
+	"""
+	name = 'Actor %d' % i
+	age = rng.randint(20, 90)
+	if i % 5 == 4:
+		# dead actors only have their age at death
+		life = ('<tr><th>Died</th><td>March %d, 2010 (aged %d)<br /><span class="deathplace">Los Angeles, California'
+				'</span></td></tr>') % (rng.randint(1, 28), age)
+	else:
+		life = ('<tr><th>Born</th><td>June %d, %d <span class="noprint ForceAgeToShow">(age&#160;%d)</span>'
+				'<br /><span class="birthplace">New York City</span></td></tr>') % (rng.randint(1, 28), 2017 - age, age)
+	infobox = ('<table class="infobox biography vcard"><tr><th colspan="2"><span class="fn">%s</span></th></tr>%s'
+			   '<tr><th>Occupation</th><td>Actor</td></tr></table>') % (name, life)
+	if i % 3 == 2:
+		# filmography as a table of year and title
+		rows = ''.join('<tr><td>%d</td><td><i>%s</i></td><td>Role</td></tr>' % (rng.randint(1950, 2017), link('Movie', j))
+					   for j in movies)
+		filmography = ('<h2><span class="mw-headline" id="Filmography">Filmography</span></h2>\n'
+					   '<table class="wikitable sortable">%s</table>') % rows
+	else:
+		items = ''.join('<li><i>%s</i> (%d)</li>' % (link('Movie', j), rng.randint(1950, 2017)) for j in movies)
+		filmography = ('<h2><span class="mw-headline" id="Filmography">Filmography</span></h2>\n'
+					   '<div class="div-col columns column-count column-count-%d"><ul>%s</ul></div>') % (2 + i % 2, items)
+	return page(name, '\n'.join([infobox, filler(rng, paragraphs / 2), filmography, filler(rng, paragraphs / 2)]))
+
+
+def movie_page(rng, i, actors, paragraphs):
+	""" generate a movie page in one of the layouts the scraper handles
+
+	:param rng: random generator
+	:param i: number of the movie
+	:param actors: numbers of the actors in the cast
+	:param paragraphs: number of filler paragraphs
+	:return: HTML string
+	"""
+	name = 'Movie %d' % i
+	year = rng.randint(1950, 2017)
+	if i % 2:
+		release = ('<div class="plainlist"><ul><li>June %d, %d<span style="display:none">&#160;(<span class="bday dtstart '
+				   'published updated">%d-06-01</span>)</span></li></ul></div>') % (rng.randint(1, 28), year, year)
+	else:
+		release = 'June %d, %d' % (rng.randint(1, 28), year)
+	gross = rng.choice(['$%.1f million' % rng.uniform(1, 900), '$%.2f billion' % rng.uniform(1, 2),
+						'$%s' % format(rng.randint(10000, 999999), ',')])
+	infobox = ('<table class="infobox vevent"><tr><th colspan="2" class="summary">%s</th></tr>'
+			   '<tr><th><div>Release date</div></th><td>%s</td></tr>'
+			   '<tr><th>Running time</th><td>%d minutes</td></tr>'
+			   '<tr><th>Box office</th><td>%s<sup class="reference"><a href="#cite_note-1">[1]</a></sup></td></tr>'
+			   '</table>') % (name, release, rng.randint(80, 180), gross)
+	cast = ''.join('<li>%s as Character %d</li>' % (link('Actor', j), j) for j in actors)
+	cast = '<h2><span class="mw-headline" id="Cast">Cast</span></h2>\n<ul>%s</ul>' % cast
+	return page(name, '\n'.join([infobox, filler(rng, paragraphs / 2), cast, filler(rng, paragraphs / 2)]))
+
+
+def write_site(directory, num_actors, num_movies, links=6, paragraphs=200, seed=0):
+	""" write a site of actor and movie pages linking to each other, served at /wiki/Actor_<i> and /wiki/Movie_<i>
+
+	:param directory: directory to write the pages to, under wiki/
+	:param num_actors: number of actor pages
+	:param num_movies: number of movie pages
+	:param links: number of movies in each filmography and actors in each cast
+	:param paragraphs: number of filler paragraphs in each page, 200 gives pages of about 100 KB
+	:param seed: seed for the random generator, same seed gives the same pages
+	"""
+	rng = random.Random(seed)
+	wiki = os.path.join(directory, 'wiki')
+	if not os.path.isdir(wiki):
+		os.makedirs(wiki)
+	for i in xrange(num_actors):
+		movies = rng.sample(xrange(num_movies), min(links, num_movies))
+		with open(os.path.join(wiki, 'Actor_%d' % i), 'w') as f:
+			f.write(actor_page(rng, i, movies, paragraphs))
+	for i in xrange(num_movies):
+		actors = rng.sample(xrange(num_actors), min(links, num_actors))
+		with open(os.path.join(wiki, 'Movie_%d' % i), 'w') as f:
+			f.write(movie_page(rng, i, actors, paragraphs))
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from crawl_state import PersistentCrawlState
+from crawler import Crawler
+from fixture_server import FixtureServer
+from synthetic_pages import write_site
+from wiki_scraper import parse_actor_page, parse_movie_page
+
+
+class CrawlStateTests(unittest.TestCase):
+
+	def setUp(self):
+		# pages that fail to parse are expected, keep their warnings out of the test output
+		logging.disable(logging.ERROR)
+		# serve a small generated site and keep the crawl state next to it
+		self.directory = tempfile.mkdtemp()
+		write_site(os.path.join(self.directory, 'site'), 40, 40, links=4, paragraphs=10)
+		self.server = FixtureServer(os.path.join(self.directory, 'site'))
+		self.server.start()
+		self.database = os.path.join(self.directory, 'crawl.db')
+		self.output = os.path.join(self.directory, 'records.ndjson')
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.directory)
+		logging.disable(logging.NOTSET)
+
+	def crawl(self, max_actors, max_movies, resume=False):
+		state = PersistentCrawlState(self.database, self.output, resume, checkpoint_pages=3)
+		crawler = Crawler(parse_actor_page, parse_movie_page, max_actors, max_movies, concurrency=4, retry_delay=0)
+		crawler.crawl(self.server.url('/wiki/Actor_0'), state)
+		state.close()
+
+	def read_output(self):
+		with open(self.output) as f:
+			return [json.loads(line) for line in f]
+
+	# test records are appended as NDJSON the graph loader can read
+	def test_output(self):
+		self.crawl(10, 8)
+		records = self.read_output()
+		self.assertEqual(sorted(record['json_class'] for record in records), ['Actor'] * 10 + ['Movie'] * 8)
+		self.assertEqual(len(set(record['name'] for record in records)), 18)
+		# with the fields of the records in data.json
+		with open('model/data/data.json') as f:
+			actors, movies = json.load(f)
+		fields = {'Actor': set(next(actors.itervalues())), 'Movie': set(next(movies.itervalues()))}
+		for record in records:
+			self.assertEqual(set(record), fields[record['json_class']])
+			if record['json_class'] == 'Movie':
+				movie = parse_movie_page(record['wiki_page'])
+				self.assertEqual((record['name'], record['box_office']), (movie['name'], movie['gross']))
+		# a new crawl starts over
+		self.crawl(2, 2)
+		self.assertEqual(len(self.read_output()), 4)
+
+	# test a resumed crawl carries on from the frontier without fetching any page again
+	def test_resume(self):
+		self.crawl(5, 5)
+		self.crawl(20, 25, resume=True)
+		records = self.read_output()
+		self.assertEqual(sorted(record['json_class'] for record in records), ['Actor'] * 20 + ['Movie'] * 25)
+		self.assertEqual(len(set(record['name'] for record in records)), 45)
+		self.assertEqual(sorted(set(self.server.requests)), sorted(self.server.requests))
+		# nothing left to do
+		del self.server.requests[:]
+		self.crawl(20, 25, resume=True)
+		self.assertEqual((self.server.requests, len(self.read_output())), ([], 45))
+
+	# test pages that cannot be fetched in an outage stay queued, and the crawl stops instead of using up the frontier
+	def test_outage(self):
+		self.crawl(5, 5)
+		self.server.down = True
+		del self.server.requests[:]
+		self.crawl(20, 25, resume=True)
+		# five pages in a row failed, with at most three more in flight
+		self.assertLessEqual(len(self.server.requests), 8)
+		self.assertEqual(len(self.read_output()), 10)
+		# once the server is back the resumed crawl finishes
+		self.server.down = False
+		self.crawl(20, 25, resume=True)
+		records = self.read_output()
+		self.assertEqual(sorted(record['json_class'] for record in records), ['Actor'] * 20 + ['Movie'] * 25)
+		self.assertEqual(len(set(record['name'] for record in records)), 45)
+
+	# test work after the last checkpoint is dropped on resume and done again
+	def test_crash(self):
+		state = PersistentCrawlState(self.database, self.output, checkpoint_pages=1000, checkpoint_seconds=1000)
+		Crawler(parse_actor_page, parse_movie_page, 4, 4, concurrency=0).crawl(self.server.url('/wiki/Actor_0'), state)
+		# progress after the checkpoint at the end of the crawl, lost without another checkpoint
+		state.accept('actor', '/wiki/Actor_39', parse_actor_page(self.server.url('/wiki/Actor_39')))
+		state.output.write('{"name": "half a li')
+		state.output.flush()
+		state.db.close()
+		state = PersistentCrawlState(self.database, self.output, resume=True)
+		self.assertEqual(state.counts, {'actor': 4, 'movie': 4})
+		self.assertNotIn('/wiki/Actor_39', state.seen['actor'])
+		state.close()
+		self.assertEqual(len(self.read_output()), 8)
+
+if __name__ == '__main__':
+	unittest.main()
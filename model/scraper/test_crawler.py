@@ -0,0 +1,182 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from crawler import Crawler, FetchError, HostLimiter, PipelineCrawler
+from fixture_server import FixtureServer
+from synthetic_pages import write_site
+from wiki_scraper import parse_actor_page, parse_fetched_page, parse_movie_page, read_page
+
+
+def parse_except_movie_1(kind, url, html):
+	""" parse a fetched page, failing on one of them """
+	if url.endswith('/Movie_1'):
+		raise ValueError('cannot parse ' + url)
+	return parse_fetched_page(kind, url, html)
+
+
+def parse_with_bad_link(kind, url, html):
+	""" parse a fetched page, adding a link with a port that is not a number to each actor """
+	record = parse_fetched_page(kind, url, html)
+	if kind == 'actor' and record is not None:
+		record['movieurls'].append(':bad' + url[-8:])
+	return record
+
+
+class CrawlerTests(unittest.TestCase):
+
+	def setUp(self):
+		# missing pages are expected, keep their warnings out of the test output
+		logging.disable(logging.ERROR)
+		# serve a small generated site of actor and movie pages from a local server
+		self.directory = tempfile.mkdtemp()
+		write_site(self.directory, 40, 40, links=4, paragraphs=10)
+		self.server = FixtureServer(self.directory)
+		self.server.start()
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.directory)
+		logging.disable(logging.NOTSET)
+
+	def crawl(self, max_actors, max_movies, concurrency=4, start='/wiki/Actor_0'):
+		crawler = Crawler(parse_actor_page, parse_movie_page, max_actors, max_movies, concurrency)
+		return crawler.crawl(self.server.url(start))
+
+	# test the crawl stops at exactly the requested counts, fetching each page once
+	def test_exact_counts(self):
+		for max_actors, max_movies in [(1, 1), (3, 2), (25, 30)]:
+			del self.server.requests[:]
+			actors, movies = self.crawl(max_actors, max_movies)
+			self.assertEqual((len(actors), len(movies)), (max_actors, max_movies))
+			self.assertEqual(len(set(self.server.requests)), len(self.server.requests))
+			# nothing is fetched beyond the limits
+			self.assertEqual(len(self.server.requests), max_actors + max_movies)
+
+	# test concurrent results are the same records a serial parse gives
+	def test_records(self):
+		actors, movies = self.crawl(20, 20, concurrency=8)
+		for actor in actors:
+			self.assertEqual(actor, parse_actor_page(self.server.url('/wiki/' + actor['name'].replace(' ', '_'))))
+		for movie in movies:
+			self.assertEqual(movie, parse_movie_page(self.server.url('/wiki/' + movie['name'].replace(' ', '_'))))
+		# every record was reached through links from records before it
+		linked = set(url for actor in actors for url in actor['movieurls'])
+		self.assertTrue(all('/wiki/' + movie['name'].replace(' ', '_') in linked for movie in movies))
+
+	# test parsing in a process pool, and without any threads, gives the same records as a serial parse
+	def test_pipeline(self):
+		crawler = PipelineCrawler(read_page, parse_fetched_page, 30, 30, concurrency=4, processes=2, queue_size=2)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertEqual((len(actors), len(movies)), (30, 30))
+		for actor in actors:
+			self.assertEqual(actor, parse_actor_page(self.server.url('/wiki/' + actor['name'].replace(' ', '_'))))
+		for movie in movies:
+			self.assertEqual(movie, parse_movie_page(self.server.url('/wiki/' + movie['name'].replace(' ', '_'))))
+		# without threads the order is fixed, the first page is followed by the movies it links to
+		actors, movies = self.crawl(5, 5, concurrency=0)
+		self.assertEqual([movie['name'] for movie in movies[:4]], [name for name in actors[0]['movies']])
+		# a page the parse function fails on is skipped, not waited for
+		crawler = PipelineCrawler(read_page, parse_except_movie_1, 40, 40, processes=2)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertIn('/wiki/Movie_1', self.server.requests)
+		self.assertNotIn('Movie 1', [movie['name'] for movie in movies])
+		self.assertGreater(len(movies), 30)
+
+	# test missing pages are skipped and the crawl ends when there is nothing left
+	def test_missing_pages(self):
+		for i in xrange(1, 40):
+			os.remove(os.path.join(self.directory, 'wiki', 'Movie_%d' % i))
+		actors, movies = self.crawl(40, 40)
+		self.assertLessEqual(len(movies), 1)
+		self.assertGreaterEqual(len(actors), 1)
+		# starting from a movie works too
+		actors, movies = self.crawl(0, 1, start='/wiki/Movie_0')
+		self.assertEqual((len(actors), [movie['name'] for movie in movies]), (0, ['Movie 0']))
+		# a page that is neither gives nothing
+		self.assertEqual(self.crawl(5, 5, start='/wiki/Movie_1'), ([], []))
+
+	# test pages that could not be fetched are tried again, unlike pages that do not parse
+	def test_fetch_errors(self):
+		failed = set()
+
+		def fetch(url):
+			# every movie page fails its first fetch
+			if '/Movie_' in url and url not in failed:
+				failed.add(url)
+				raise FetchError(url)
+			return read_page(url)
+		crawler = PipelineCrawler(fetch, parse_except_movie_1, 40, 40, processes=2, max_fetch_errors=100, retry_delay=0)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertGreater(len(movies), 30)
+		self.assertNotIn('Movie 1', [movie['name'] for movie in movies])
+		# each page reached the server once, the page that failed to parse was not tried again
+		self.assertIn('/wiki/Movie_1', self.server.requests)
+		self.assertEqual(len(set(self.server.requests)), len(self.server.requests))
+		# a page is given up on after fetch_attempts
+		attempts = []
+
+		def fetch_actors(url):
+			if '/Movie_' in url:
+				attempts.append(url)
+				raise FetchError(url)
+			return read_page(url)
+		crawler = PipelineCrawler(fetch_actors, parse_fetched_page, 5, 5, processes=1, max_fetch_errors=100, retry_delay=0,
+								  fetch_attempts=2)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertEqual((len(actors), movies, len(attempts)), (1, [], 8))
+		self.assertTrue(all(attempts.count(url) == 2 for url in attempts))
+		# a crawl that cannot fetch its first page ends at once
+		self.server.down = True
+		del self.server.requests[:]
+		self.assertEqual(self.crawl(5, 5), ([], []))
+		self.assertEqual(self.server.requests, ['/wiki/Actor_0'])
+
+	# test a page the pool cannot take frees its place, and every thread of a crawl ends with it, paused or not
+	def test_pipeline_stops(self):
+		threads = threading.active_count()
+		# a nested function cannot be sent to the parse processes, only the first page is parsed in this thread
+		crawler = PipelineCrawler(read_page, lambda kind, url, html: parse_fetched_page(kind, url, html), 5, 5,
+								  processes=1)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertEqual((len(actors), movies), (1, []))
+		self.assertEqual(threading.active_count(), threads)
+
+		def fetch(url):
+			if '/Movie_' in url:
+				raise FetchError(url)
+			return read_page(url)
+		crawler = PipelineCrawler(fetch, parse_fetched_page, 40, 40, processes=1, max_fetch_errors=1)
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertEqual((len(actors), movies), (1, []))
+		self.assertEqual(threading.active_count(), threads)
+		self.assertTrue(crawler.fetched.empty() and crawler.tasks.empty())
+
+	# test a malformed link is skipped, it is not taken for the server being down
+	def test_malformed_links(self):
+		for url in ('htp://example.org/wiki/A', 'wiki/A', 'http:///wiki/A', self.server.url('/wiki/A').replace('/wiki', ':a/wiki')):
+			self.assertIsNone(read_page(url))
+		self.assertRaises(FetchError, read_page, 'http://127.0.0.1:1/wiki/A')
+		# a single fetch error would wait a minute then end the crawl
+		crawler = PipelineCrawler(read_page, parse_with_bad_link, 20, 20, processes=1, max_fetch_errors=1, retry_delay=60)
+		start = time.time()
+		actors, movies = crawler.crawl(self.server.url('/wiki/Actor_0'))
+		self.assertEqual((len(actors), len(movies)), (20, 20))
+		self.assertLess(time.time() - start, 30)
+
+	# test requests to the same host are spaced out
+	def test_host_limiter(self):
+		limiter = HostLimiter(0.05)
+		start = time.time()
+		for _ in xrange(4):
+			limiter.wait('http://example.org/wiki/A')
+		limiter.wait('http://example.com/wiki/A')
+		self.assertGreaterEqual(time.time() - start, 0.15)
+		self.assertLess(time.time() - start, 0.2)
+
+if __name__ == '__main__':
+	unittest.main()
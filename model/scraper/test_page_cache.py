@@ -0,0 +1,117 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+import urllib2
+import wiki_scraper
+from fixture_server import FixtureServer
+from page_cache import PageCache
+from synthetic_pages import write_site
+
+
+class PageCacheTests(unittest.TestCase):
+
+	def setUp(self):
+		# missing pages are expected, keep their warnings out of the test output
+		logging.disable(logging.ERROR)
+		# serve a small generated site and keep the cache next to it
+		self.directory = tempfile.mkdtemp()
+		write_site(os.path.join(self.directory, 'site'), 10, 10, links=4, paragraphs=10)
+		self.server = FixtureServer(os.path.join(self.directory, 'site'))
+		self.server.start()
+		self.cache_directory = os.path.join(self.directory, 'cache')
+
+	def tearDown(self):
+		wiki_scraper.use_page_cache(None)
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.directory)
+		logging.disable(logging.NOTSET)
+
+	# test cached pages are revalidated and only fetched again in full when they change
+	def test_revalidation(self):
+		cache = PageCache(self.cache_directory)
+		url = self.server.url('/wiki/Actor_0')
+		body = cache.fetch(url)
+		self.assertEqual(cache.fetch(url), body)
+		self.assertEqual([status for _, status in self.server.statuses], [200, 304])
+		# change the page on the server
+		with open(os.path.join(self.directory, 'site', 'wiki', 'Actor_0'), 'a') as f:
+			f.write('<p>edited</p>')
+		self.assertIn('edited', cache.fetch(url))
+		self.assertEqual(self.server.statuses[-1][1], 200)
+		# the old body is no longer referenced
+		self.assertEqual(len(os.listdir(os.path.join(self.cache_directory, 'objects', cache.lookup(url)[0][:2]))), 1)
+		self.assertEqual(cache.size, len(cache.fetch(url)))
+
+	# test fresh pages are read from disk without a request, and offline caches never make one
+	def test_ttl_and_offline(self):
+		cache = PageCache(self.cache_directory, ttl=3600)
+		url = self.server.url('/wiki/Movie_0')
+		body = cache.fetch(url)
+		self.assertEqual(cache.fetch(url), body)
+		self.assertEqual(len(self.server.requests), 1)
+		cache.close()
+		# the cache persists, and parses the same offline
+		cache = PageCache(self.cache_directory, offline=True)
+		self.assertEqual(cache.fetch(url), body)
+		self.assertRaises(urllib2.URLError, cache.fetch, self.server.url('/wiki/Movie_1'))
+		self.assertEqual(len(self.server.requests), 1)
+		expected = wiki_scraper.parse_movie_page(url)
+		wiki_scraper.use_page_cache(cache)
+		self.assertEqual(wiki_scraper.parse_movie_page(url), expected)
+		# a page missing from an offline cache is skipped, fetching it again would miss again
+		self.assertIsNone(wiki_scraper.parse_movie_page(self.server.url('/wiki/Movie_1')))
+		self.assertEqual(len(self.server.requests), 2)
+
+	# test only requests that reach the server wait for the request limiter, revalidations included
+	def test_request_limiter(self):
+		waited = []
+		cache = PageCache(self.cache_directory, ttl=3600)
+		url = self.server.url('/wiki/Actor_0')
+		cache.fetch(url, waited.append)
+		cache.fetch(url, waited.append)
+		self.assertEqual((waited, len(self.server.requests)), ([url], 1))
+		# once stale the page is revalidated, which is a request
+		cache.ttl = 0
+		cache.fetch(url, waited.append)
+		self.assertEqual(self.server.statuses[-1][1], 304)
+		self.assertEqual(waited, [url, url])
+		# fetch_page holds back only the requests that miss the cache
+		limiter = wiki_scraper.HostLimiter(0)
+		limiter.wait = waited.append
+		wiki_scraper.use_request_limiter(limiter)
+		try:
+			cache.ttl = 3600
+			wiki_scraper.use_page_cache(cache)
+			wiki_scraper.fetch_page(url)
+			wiki_scraper.fetch_page(self.server.url('/wiki/Movie_0'))
+			wiki_scraper.use_page_cache(None)
+			wiki_scraper.fetch_page(url)
+		finally:
+			wiki_scraper.use_request_limiter(None)
+		self.assertEqual(waited, [url, url, self.server.url('/wiki/Movie_0'), url])
+		self.assertEqual(len(self.server.requests), 4)
+
+	# test least recently used pages are evicted once the bodies exceed max_bytes
+	def test_eviction(self):
+		urls = [self.server.url('/wiki/Actor_%d' % i) for i in xrange(4)]
+		cache = PageCache(self.cache_directory, ttl=3600, max_bytes=1)
+		sizes = [len(cache.fetch(url)) for url in urls]
+		# pages larger than max_bytes are not kept
+		self.assertEqual((cache.size, [cache.lookup(url) for url in urls]), (0, [None] * 4))
+		# room for any three of the pages
+		cache.max_bytes = sum(sizes) - 1
+		for url in urls[:3]:
+			cache.fetch(url)
+		cache.fetch(urls[0])
+		cache.fetch(urls[3])
+		# Actor_1 was the least recently used
+		self.assertEqual([cache.lookup(url) is not None for url in urls], [True, False, True, True])
+		self.assertLessEqual(cache.size, cache.max_bytes)
+		objects = sum(len(files) for _, _, files in os.walk(os.path.join(self.cache_directory, 'objects')))
+		self.assertEqual(objects, 3)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,74 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+import wiki_scraper
+from synthetic_pages import page, write_site
+
+# pages laid out in ways the generated site does not cover
+EDGE_CASES = {
+	# the deathplace is outside the infobox, so its text is only in the full tree
+	'Dead_Actor': page('Dead Actor', '<p><span class="fn org">Dead Actor</span> (born 1930) died in 2010 (aged 80) in '
+						'<span class="deathplace">Paris</span>.</p><h2><span id="Filmography">Filmography</span></h2>'
+						'<div class="div-col columns column-count column-count-2"><ul><li><a href="/wiki/Movie_1" '
+						'title="Movie 1">Movie 1</a></li></ul></div>'),
+	# the filmography columns hold no list, the next list on the page is read instead
+	'Listless_Actor': page('Listless Actor', '<table class="infobox"><tr><td><span class="fn">Listless Actor</span> '
+							'<span class="noprint ForceAgeToShow">(age 41)</span></td></tr></table>'
+							'<div class="div-col columns column-count column-count-3"><p>See below.</p></div>'
+							'<p>Text</p><dl><dd><ul><li><a href="/wiki/Movie_2" title="Movie 2">Movie 2</a></li>'
+							'</ul></dd></dl>'),
+	# cast spread over several lists separated by definition lists
+	'Split_Cast': page('Split Cast', '<table class="infobox vevent"><tr><th class="summary">Split Cast</th></tr>'
+						'<tr><th><div>Release date</div></th><td>1999</td></tr><tr><th>Box office</th><td>$2 million'
+						'</td></tr></table><h2><span id="Cast">Cast</span></h2><ul><li><a href="/wiki/Actor_1" '
+						'title="Actor 1">Actor 1</a></li></ul><dl><dt>Supporting</dt></dl><ul><li><a href="/wiki/'
+						'Actor_2" title="Actor 2">Actor 2</a></li></ul><p>Trailing</p><ul><li><a href="/wiki/Topic" '
+						'title="Topic">Topic</a></li></ul>'),
+}
+
+
+class ParseBackendTests(unittest.TestCase):
+
+	def setUp(self):
+		# pages that fail to parse are expected, keep their warnings out of the test output
+		logging.disable(logging.ERROR)
+		# write a generated site and the edge cases, parsed through file urls
+		self.directory = tempfile.mkdtemp()
+		write_site(self.directory, 30, 30, paragraphs=20)
+		for name, html in EDGE_CASES.iteritems():
+			with open(os.path.join(self.directory, 'wiki', name), 'w') as f:
+				f.write(html)
+		self.urls = ['file://' + os.path.join(self.directory, 'wiki', name)
+					 for name in sorted(os.listdir(os.path.join(self.directory, 'wiki')))]
+
+	def tearDown(self):
+		wiki_scraper.use_parse_backend('strained')
+		shutil.rmtree(self.directory)
+		logging.disable(logging.NOTSET)
+
+	def parse_all(self, backend):
+		wiki_scraper.use_parse_backend(backend)
+		return [(wiki_scraper.parse_actor_page(url), wiki_scraper.parse_movie_page(url)) for url in self.urls]
+
+	# test parsing only the parts of a page the parsers read gives the same results as the full tree
+	def test_strained(self):
+		full = self.parse_all('full')
+		self.assertEqual(self.parse_all('strained'), full)
+		results = dict(zip(self.urls, full))
+		edge_cases = [results['file://' + os.path.join(self.directory, 'wiki', name)] for name in sorted(EDGE_CASES)]
+		self.assertEqual([actor['age'] if actor else movie['actors'] for actor, movie in edge_cases],
+						 [80, 41, ['Actor 1', 'Actor 2']])
+		# every page parses as exactly one kind
+		self.assertTrue(all((actor is None) != (movie is None) for actor, movie in full))
+
+	# test the lxml backend gives the same results, when lxml is installed
+	def test_lxml(self):
+		if wiki_scraper.lxml is None:
+			self.assertRaises(ValueError, wiki_scraper.use_parse_backend, 'lxml')
+			self.skipTest('lxml is not installed')
+		self.assertEqual(self.parse_all('lxml'), self.parse_all('full'))
+
+if __name__ == '__main__':
+	unittest.main()
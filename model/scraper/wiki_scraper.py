@@ -1,7 +1,29 @@
-from bs4 import BeautifulSoup
-import json
+import argparse
+from bs4 import BeautifulSoup, SoupStrainer
+from crawl_state import PersistentCrawlState
+from crawler import Crawler, FetchError, HostLimiter, PipelineCrawler
+import httplib
 import logging
+import multiprocessing
+import socket
 import urllib2
+from page_cache import PageCache
+try:
+	import lxml
+except ImportError:
+	lxml = None
+
+# on-disk cache pages are fetched through, None to always use the network
+page_cache = None
+# HostLimiter spacing out the requests that reach the network, None to send them at once
+request_limiter = None
+# how pages are parsed: 'full' builds the whole tree, 'strained' and 'lxml' only the parts the parse_* helpers read
+PARSE_BACKENDS = ('full', 'strained', 'lxml')
+parse_backend = 'strained'
+# elements the parse_* helpers look for, by class, and the sections found by id
+SPAN_CLASSES = ('fn', 'noprint ForceAgeToShow', 'deathplace')
+FILMOGRAPHY_CLASSES = ('div-col columns column-count column-count-3', 'div-col columns column-count column-count-2')
+SECTION_IDS = ('Cast', 'Filmography')
 
 # refactor
 def parse_actor_page(pageurl):
@@ -9,7 +31,8 @@ def parse_actor_page(pageurl):
 
 	:param pageurl: the wikipedia page to parse
 
-	:return: dictionary containing data on actor, or None if page format was invalid.
+	:return: dictionary containing data on actor, or None if page format was invalid, raises FetchError if the
+	page could not be fetched but may be later.
 
 	"""
 	logging.info('attempt to parse page ' + pageurl + 'as an actor')
@@ -17,6 +40,18 @@ def parse_actor_page(pageurl):
 	soup = load_page(pageurl)
 	if soup == None:
 		return None
+	return parse_actor(soup, pageurl)
+
+def parse_actor(soup, pageurl):
+	""" Attempt to parse actor information from the parsetree of a page.
+
+	:param soup: BeautifulSoup object containing parse of webpage
+
+	:param pageurl: url of page to parse
+
+	:return: dictionary containing data on actor, or None if page format was invalid.
+
+	"""
 	# attempt to retrieve name from page tree
 	name = parse_name_actor(soup,pageurl)
 	if name == None:
@@ -43,15 +78,28 @@ def parse_movie_page(pageurl):
 
 	:param pageurl: the wikipedia page to parse
 
-	:return: dictionary containing data on movie, or None if page format was invalid.
+	:return: dictionary containing data on movie, or None if page format was invalid, raises FetchError if the
+	page could not be fetched but may be later.
 
 	"""
 	logging.info('attempt to parse page ' + pageurl + 'as a movie')
-	movie = {}
 	# attempt to load the wikipedia page and parse with beautifulsoup
 	soup = load_page(pageurl)
 	if soup == None:
 		return None
+	return parse_movie(soup, pageurl)
+
+def parse_movie(soup, pageurl):
+	""" Attempt to parse movie information from the parsetree of a page.
+
+	:param soup: BeautifulSoup object containing parse of webpage
+
+	:param pageurl: url of page to parse
+
+	:return: dictionary containing data on movie, or None if page format was invalid.
+
+	"""
+	movie = {}
 	# attempt to retrieve name from page tree
 	name = parse_name_movie(soup, pageurl)
 	if name == None:
@@ -70,30 +118,185 @@ def parse_movie_page(pageurl):
 	movie['gross'] = gross
 	movie['actors'] = actors
 	movie['actorurls'] = actorurls
+	movie['wiki_page'] = pageurl
 	logging.info('' + pageurl + ' was successfully parsed as a movie')
 	return movie
 
-def load_page(pageurl):
-	""" Helper method to load webpage using urllib2 and parse with beautifulsoup
+def use_page_cache(cache):
+	""" fetch pages through an on-disk cache, an offline PageCache lets the parsers run over saved pages
+
+	:param cache: PageCache to use, or None to always fetch from the network
+
+	"""
+	global page_cache
+	page_cache = cache
+
+def use_request_limiter(limiter):
+	""" space out the requests fetch_page sends to the network, pages served by the page cache are not held back
+
+	:param limiter: HostLimiter to wait on, or None to send requests at once
+
+	"""
+	global request_limiter
+	request_limiter = limiter
+
+def wait_for_request(pageurl):
+	""" block until the request limiter lets a request for pageurl go to the network
+
+	:param pageurl: url about to be requested
+
+	"""
+	if request_limiter is not None:
+		request_limiter.wait(pageurl)
+
+def fetch_page(pageurl):
+	""" Helper method to fetch the HTML of a webpage, through the page cache if one is in use
+
+	:param pageurl: url of webpage to fetch
+
+	:return: the HTML, raises urllib2.HTTPError or urllib2.URLError if the page could not be fetched
+
+	"""
+	if page_cache is not None:
+		return page_cache.fetch(pageurl, wait_for_request)
+	wait_for_request(pageurl)
+	return urllib2.urlopen(pageurl).read()
+
+def use_parse_backend(backend):
+	""" choose how pages are parsed, every backend gives the same results
+
+	:param backend: one of PARSE_BACKENDS, 'lxml' needs lxml installed
+
+	"""
+	global parse_backend
+	if backend not in PARSE_BACKENDS:
+		raise ValueError('parse backend must be one of ' + ', '.join(PARSE_BACKENDS))
+	if backend == 'lxml' and lxml is None:
+		raise ValueError('the lxml backend needs lxml installed')
+	parse_backend = backend
+
+def has_class(attrs, value):
+	""" check an element's class matches value the way findAll matches it
+
+	:param attrs: attributes of the element, class not yet split into a list
+
+	:param value: a class, or the full class attribute
+
+	:return: True if value is the whole class attribute or one of its classes
+
+	"""
+	css_class = attrs.get('class') or ''
+	if isinstance(css_class, list):
+		css_class = ' '.join(css_class)
+	return value == css_class or value in css_class.split()
+
+def is_page_part(name, attrs):
+	""" decide whether an element, with everything in it, is built when parsing only the parts of a page we read
+
+	The parsers follow find_next to the next table, list or definition list, so all of those are kept.
+
+	:param name: tag name of the element
+
+	:param attrs: attributes of the element
+
+	:return: True if the element is kept
+
+	"""
+	if name in ('table', 'ul', 'dl'):
+		return True
+	if name == 'span':
+		return attrs.get('id') in SECTION_IDS or any(has_class(attrs, value) for value in SPAN_CLASSES)
+	return name == 'div' and any(has_class(attrs, value) for value in FILMOGRAPHY_CLASSES)
+
+# only the elements the parse_* helpers read are built
+PAGE_PARTS = SoupStrainer(is_page_part)
+
+def parse_html(html):
+	""" Helper method to parse the HTML of a webpage with the current parse backend
+
+	:param html: the HTML
+
+	:return: BeautifulSoup object containing parse of webpage, with the parts the parse_* helpers read
+
+	"""
+	if parse_backend == 'full':
+		return BeautifulSoup(html, 'html.parser')
+	soup = BeautifulSoup(html, 'lxml' if parse_backend == 'lxml' else 'html.parser', parse_only=PAGE_PARTS)
+	# the age of a dead actor is read from the element around the deathplace, which needs the whole tree
+	# unless it is inside a table or list that was kept
+	death_span = soup.find('span', {'class': 'deathplace'})
+	if death_span != None and death_span.parent is soup:
+		return BeautifulSoup(html, 'lxml' if parse_backend == 'lxml' else 'html.parser')
+	return soup
+
+def read_page(pageurl):
+	""" Helper method to fetch the HTML of a webpage, logging why if it cannot be fetched
 
 	:param pageurl: url of webpage to load
 
-	:return: BeautifulSoup object containing parse of webpage
+	:return: the HTML, or None if there is no such page or the url cannot be fetched, raises FetchError if the server
+	could not be reached or answered with an error it may recover from
 
 	"""
 	# Attempt to load the page
 	try:
-		webpage = urllib2.urlopen(pageurl)
-	# Page could not be loaded (hit quota?)
+		return fetch_page(pageurl)
 	except urllib2.HTTPError, e:
+		# server errors and hitting the quota pass, the page can be fetched later
+		if e.code >= 500 or e.code == 429:
+			logging.warning('' + pageurl + ' could not be fetched, the server answered ' + str(e.code))
+			raise FetchError(pageurl)
 		logging.warning('' + pageurl + ' is not a valid wikipedia page and could not be opened')
 		return None
-	# URL is invalid
 	except urllib2.URLError, e:
-		logging.warning('' + pageurl + ' is not a valid URL and could not be opened')
+		# connection refused, reset or timed out, the server may be reachable later
+		if isinstance(e.reason, socket.error):
+			logging.warning('' + pageurl + ' could not be fetched: ' + str(e.reason))
+			raise FetchError(pageurl)
+		# unknown url type, no host, or not in an offline cache, trying again would fail the same way
+		logging.warning('' + pageurl + ' cannot be fetched: ' + str(e.reason))
+		return None
+	# the connection dropped or timed out while the page was being read
+	except socket.error, e:
+		logging.warning('' + pageurl + ' could not be read: ' + str(e))
+		raise FetchError(pageurl)
+	# malformed url, such as one without a scheme or with a port that is not a number
+	except (httplib.InvalidURL, ValueError), e:
+		logging.warning('' + pageurl + ' is not a valid url: ' + str(e))
+		return None
+
+def load_page(pageurl):
+	""" Helper method to load webpage using urllib2 and parse with beautifulsoup
+
+	:param pageurl: url of webpage to load
+
+	:return: BeautifulSoup object containing parse of webpage, or None if there is no such page, raises FetchError
+	like read_page
+
+	"""
+	webpage = read_page(pageurl)
+	if webpage == None:
 		return None
 	# return beautifulsoup parsetree for the page
-	return BeautifulSoup(webpage,'html.parser')
+	return parse_html(webpage)
+
+def parse_fetched_page(kind, pageurl, html):
+	""" Attempt to parse an actor or movie from a page that was already fetched, run in the parse processes
+
+	:param kind: 'actor' or 'movie'
+
+	:param pageurl: url the page was fetched from
+
+	:param html: the HTML of the page
+
+	:return: dictionary containing data on the actor or movie, or None if page format was invalid.
+
+	"""
+	logging.info('attempt to parse page ' + pageurl + 'as ' + kind)
+	soup = parse_html(html)
+	if kind == 'actor':
+		return parse_actor(soup, pageurl)
+	return parse_movie(soup, pageurl)
 
 def parse_infotable_movie(soup, pageurl):
 	""" Retrieve year and gross from parsetree for a movie
@@ -377,7 +580,8 @@ def parse_name_actor(soup, pageurl):
 		return None
 	return name
 
-def run_scraping(max_actors, max_movies, starting_url):
+def run_scraping(max_actors, max_movies, starting_url, concurrency=8, delay=0.1, cache=None, processes=0,
+				 output='data/actors_and_movies.ndjson', state_file='data/crawl_state.db', resume=False):
 	""" run the scraper until <max_actors> actors and <max_movies> movies have been read starting from starting_url
 
 	:param max_actors: maximum number of actor pages to parse
@@ -386,73 +590,50 @@ def run_scraping(max_actors, max_movies, starting_url):
 
 	:param starting_url: first page to run the scraper on
 
+	:param concurrency: number of pages fetched at once, 0 to fetch and parse one page at a time for debugging
+
+	:param delay: minimum seconds between requests to the same host
+
+	:param cache: PageCache to fetch pages through, or None to fetch every page from the network
+
+	:param processes: number of processes parsing pages while threads fetch them, 0 to parse in the fetching threads
+
+	:param output: NDJSON file parsed actors and movies are appended to as they are found
+
+	:param state_file: SQLite file the frontier and seen pages are checkpointed to
+
+	:param resume: carry on from the last checkpoint in state_file instead of starting a new crawl
+
 	"""
-	actors = []
-	movies = []
-	seen_actors = set() # keep track of actor urls we have already read
-	seen_movies = set() # keep track of movie urls we have already read
-	# attempt to parse starting page as actor
-	actor = parse_actor_page(starting_url)
-	# parsing as actor was successful
-	if actor != None:
-		actors.append(actor)
-		seen_actors.add(starting_url[24:])
-	# parsing as actor was unsuccessful, try as a movie instead
+	use_page_cache(cache)
+	use_request_limiter(HostLimiter(delay))
+	if processes:
+		crawler = PipelineCrawler(read_page, parse_fetched_page, max_actors, max_movies, concurrency, processes)
 	else:
-		logging.warning('' + starting_url + 'was unable to be parsed as an actor, will attempt as a movie')
-		movie = parse_movie_page(starting_url)
-		# if we could not parse as movie either, just end
-		if movie == None:
-			logging.error('' + starting_url + 'was unable to be parsed as a movie as well, application must terminate')
-			return
-		movies.append(movie)
-		seen_movies.add(starting_url[24:])
-
-	baseurl = 'https://en.wikipedia.org' # all URLS in dictionaries are relative, need this.
-	i = 0 # keep track where in actor list we currently are
-	j = 0 # keep track where in movie list we currently are
-	# continue scraping until enough actors and movies found
-	while len(actors) < max_actors or len(movies) < max_movies:
-		# traverse over new actors (since last iteration)
-		for actor in actors[i:]:
-			# if actor exists, attempt to read pages for movies they are in.
-			if actor != None and len(movies) < max_movies + 1:
-				for movieurl in actor['movieurls'][-20:]:
-					# if we already read this movie, skip it
-					if movieurl in seen_movies:
-						continue
-					movie = parse_movie_page(baseurl + movieurl)
-					seen_movies.add(movieurl)
-					# if parsing was successful add it
-					if movie != None:
-						movies.append(movie)
-		# update where in actor list we are
-		i = max(0,len(actors) - 1)
-		# traverse over new movies (since last iteration)
-		for movie in movies[j:]:
-			if movie != None and len(actors) < max_actors +1:
-				for actorurl in movie['actorurls'][:20]:
-					# if we already read this actor, skip it
-					if actorurl in seen_actors:
-						continue
-					actor = parse_actor_page(baseurl + actorurl)
-					seen_actors.add(actorurl)
-					# if parsing was successful, add it
-					if actor != None:
-						actors.append(actor)
-		# update current position in movie list
-		j = max(0,len(movies) - 1)
-
-	# convert python dictionaries to JSON and dump to file
-	with open('data/actors_and_movies7.json', 'w') as f:
-		json.dump({'actors': actors, 'movies': movies}, f)
+		crawler = Crawler(parse_actor_page, parse_movie_page, max_actors, max_movies, concurrency)
+	state = PersistentCrawlState(state_file, output, resume)
+	try:
+		crawler.crawl(starting_url, state)
+	finally:
+		state.close()
+	if state.counts['actor'] < max_actors or state.counts['movie'] < max_movies:
+		logging.warning('ran out of pages to crawl after ' + str(state.counts['actor']) + ' actors and ' +
+						str(state.counts['movie']) + ' movies')
 
 
 def main():
+	parser = argparse.ArgumentParser(description='Scrape actor and movie pages from Wikipedia.')
+	parser.add_argument('--actors', type=int, default=15, help='number of actor pages to parse')
+	parser.add_argument('--movies', type=int, default=15, help='number of movie pages to parse')
+	parser.add_argument('--start', default='https://en.wikipedia.org/wiki/Rogue_One', help='first page to parse')
+	parser.add_argument('--resume', action='store_true', help='carry on from the last checkpoint of an earlier crawl')
+	args = parser.parse_args()
 	# start the logger, set level to lowest possible.
 	logging.basicConfig(filename='logs/scraper.log', level=logging.DEBUG)
 	logging.info('Started running web scraper')
-	run_scraping(15, 15, 'https://en.wikipedia.org/wiki/Rogue_One')
+	# pages fetched in the last week are not requested again
+	run_scraping(args.actors, args.movies, args.start, cache=PageCache('data/page_cache', ttl=7 * 24 * 3600),
+				 processes=multiprocessing.cpu_count(), resume=args.resume)
 	logging.info('Completed running of web scraper')
 
 if __name__ == '__main__':
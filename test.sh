@@ -1,5 +1,20 @@
 # test script to run all tests
 # use chmod u+x test.sh if unable to run
 python test_API.py
+python view/test_query.py
+python view/test_index.py
+python view/test_paging.py
+python view/test_streaming.py
+python view/test_cache.py
+python view/test_store.py
+python view/test_chunked.py
 python model/graph/test_graph.py
 python model/graph/test_node.py
+python model/graph/test_separation.py
+python model/graph/test_csr_graph.py
+python model/graph/test_loader.py
+python model/graph/test_snapshot.py
+python model/scraper/test_crawler.py
+python model/scraper/test_crawl_state.py
+python model/scraper/test_page_cache.py
+python model/scraper/test_wiki_scraper.py
@@ -1,6 +1,7 @@
 from model.graph.graph import Graph
 import app
 import json
+import threading
 import unittest
 
 
@@ -27,6 +28,22 @@ class APITestCase(unittest.TestCase):
 		# compare response data to stored JSON
 		self.assertEqual(data, self.graph_data[0]['Bruce Willis'])
 
+	# test a conditional GET request for an actor
+	def test_get_actor_etag(self):
+		res = self.flask_app.get('/api/actors/Kirstie Alley')
+		etag = res.headers['ETag']
+		# unchanged actor should not be sent again
+		res2 = self.flask_app.get('/api/actors/Kirstie Alley', headers={'If-None-Match': etag})
+		self.assertEqual(res2.status_code, 304)
+		self.assertEqual(res2.data, '')
+		# after an update the old ETag no longer matches
+		self.flask_app.put('/api/actors/Kirstie Alley', data=json.dumps({'age': 70}),
+						   headers={'Content-Type': 'application/json'})
+		res3 = self.flask_app.get('/api/actors/Kirstie Alley', headers={'If-None-Match': etag})
+		self.assertEqual(res3.status_code, 200)
+		self.assertNotEqual(res3.headers['ETag'], etag)
+		self.assertEqual(json.loads(res3.data)['age'], 70)
+
 	# Test an invalid GET request for an actor
 	def test_get_actor_invalid(self):
 		res = self.flask_app.get('/api/actors/afafafafaf')
@@ -127,6 +144,66 @@ class APITestCase(unittest.TestCase):
 		self.assertEqual(data['Abe Vigoda'], self.graph_data[0]['Abe Vigoda'])
 		self.assertEqual(len(data.keys()), 3)
 
+	# Test a valid GET request for movies with a range
+	def test_get_movies_range(self):
+		res = self.flask_app.get('/api/movies/?year between 1990,1994&box_office>100')
+		# request should be successful
+		self.assertEqual(res.status_code, 200)
+		data = json.loads(res.data)
+		self.assertTrue(len(data) > 0)
+		for movie in data.values():
+			self.assertTrue(1990 <= movie['year'] <= 1994 and movie['box_office'] > 100)
+
+	# Test spaces encoded as + are decoded, as browsers send them from forms
+	def test_get_plus_encoded_spaces(self):
+		res = self.flask_app.get('/api/actors/?age+between+60,70&name="Bruce+Willis"')
+		self.assertEqual(res.status_code, 200)
+		data = json.loads(res.data)
+		self.assertEqual(data.keys(), ['Bruce Willis'])
+		plain = json.loads(self.flask_app.get('/api/movies/?year between 1990,1994').data)
+		res = self.flask_app.get('/api/movies/?year+between+1990%2C1994')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(json.loads(res.data), plain)
+
+	# Test a paged GET request for actors
+	def test_get_actors_paged(self):
+		res = self.flask_app.get('/api/actors/?age>50&sort=-age&limit=2&fields=name,age')
+		# request should be successful
+		self.assertEqual(res.status_code, 200)
+		data = json.loads(res.data)
+		self.assertEqual(len(data['results']), 2)
+		self.assertEqual(sorted(data['results'][0].keys()), ['age', 'name'])
+		self.assertTrue(data['results'][0]['age'] >= data['results'][1]['age'])
+		self.assertTrue(data['total'] > 2)
+		res = self.flask_app.get('/api/actors/?age>50&sort=-age&limit=2&cursor=' + data['next'])
+		self.assertEqual(res.status_code, 200)
+		self.assertTrue(json.loads(res.data)['results'][0]['age'] <= data['results'][1]['age'])
+
+	# Test a streamed GET request for actors
+	def test_get_actors_streamed(self):
+		res = self.flask_app.get('/api/actors/?age>80&sort=age&limit=3&stream=ndjson')
+		# request should be successful
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.mimetype, 'application/x-ndjson')
+		ages = [json.loads(line)['age'] for line in res.data.splitlines()]
+		self.assertEqual(ages, sorted(ages))
+		self.assertEqual(len(ages), 3)
+		self.assertTrue(int(res.headers['X-Total-Count']) > 3)
+		self.assertIn('X-Next-Cursor', res.headers)
+
+	# Test a JSON stream is the buffered document, read from the version of the data the request started with
+	def test_get_movies_streamed_json(self):
+		res = self.flask_app.get('/api/movies/?year between 1990,1994&stream=json')
+		self.assertEqual(res.mimetype, 'application/json')
+		self.assertEqual(json.loads(res.data), json.loads(self.flask_app.get('/api/movies/?year between 1990,1994').data))
+		self.flask_app.post('/api/movies/', data=json.dumps({'name': 'Streamed Movie'}),
+							headers={'Content-Type': 'application/json'})
+		res = self.flask_app.get('/api/movies/?name="Streamed Movie"&stream=json', buffered=False)
+		# the body is encoded as it is read, after the movie is deleted
+		self.assertEqual(self.flask_app.delete('/api/movies/Streamed Movie').status_code, 200)
+		self.assertEqual(json.loads(''.join(res.response)), {'Streamed Movie': {'name': 'Streamed Movie'}})
+		res.close()
+
 	# Test a invalid GET request for actors
 	def test_get_actors_invalid(self):
 		res = self.flask_app.get('/api/actors/?name="Unknown Fake Name')
@@ -145,6 +222,140 @@ class APITestCase(unittest.TestCase):
 		data = json.loads(res.data)
 		self.assertEqual(data, {})
 
+	# Test a malformed querystring
+	def test_get_actors_malformed(self):
+		res = self.flask_app.get('/api/actors/?name')
+		# should throw 400
+		self.assertEqual(res.status_code, 400)
+
+	# Test reading many actors in one request
+	def test_bulk_get(self):
+		res = self.flask_app.post('/api/actors/_bulk_get', data=json.dumps(['Kirstie Alley', 'afafafafaf']),
+								  headers={'Content-Type': 'application/json'})
+		self.assertEqual(res.status_code, 200)
+		results = json.loads(res.data)['results']
+		self.assertEqual([result['status'] for result in results], [200, 404])
+		self.assertEqual(results[0]['record']['name'], 'Kirstie Alley')
+		# body must be a list
+		res = self.flask_app.post('/api/actors/_bulk_get', data=json.dumps({'name': 'Kirstie Alley'}),
+								  headers={'Content-Type': 'application/json'})
+		self.assertEqual(res.status_code, 400)
+
+	# Test a batch of writes is applied only when every write is valid
+	def test_bulk_upsert_delete(self):
+		batch = [{'name': 'Bulk Movie 1', 'year': 2001, 'actors': ['Bruce Willis']}, {'name': 'Bulk Movie 2', 'year': 'x'}]
+		res = self.flask_app.post('/api/movies/_bulk_upsert', data=json.dumps(batch),
+								  headers={'Content-Type': 'application/json'})
+		self.assertEqual(res.status_code, 400)
+		self.assertEqual([result['status'] for result in json.loads(res.data)['results']], [201, 400])
+		self.assertEqual(self.flask_app.get('/api/movies/Bulk Movie 1').status_code, 400)
+		# NDJSON body, one new movie and one update
+		batch[1]['year'] = 2002
+		lines = '\n'.join(json.dumps(record) for record in batch + [{'name': 'Ed', 'box_office': 7}])
+		res = self.flask_app.post('/api/movies/_bulk_upsert', data=lines, headers={'Content-Type': 'application/x-ndjson'})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([result['status'] for result in json.loads(res.data)['results']], [201, 201, 200])
+		self.assertEqual(json.loads(self.flask_app.get('/api/movies/Ed').data)['box_office'], 7)
+		res = self.flask_app.get('/api/movies/?name=Bulk Movie&year between 2001,2002&fields=name')
+		self.assertEqual(sorted(json.loads(res.data)), ['Bulk Movie 1', 'Bulk Movie 2'])
+		self.assertIn('Bulk Movie 1', app.graph.name_to_movie_node)
+		# deleting is all or nothing too
+		res = self.flask_app.post('/api/movies/_bulk_delete', data=json.dumps(['Bulk Movie 1', 'Unknown Movie']),
+								  headers={'Content-Type': 'application/json'})
+		self.assertEqual([result['status'] for result in json.loads(res.data)['results']], [200, 404])
+		self.assertEqual(self.flask_app.get('/api/movies/Bulk Movie 1').status_code, 200)
+		res = self.flask_app.post('/api/movies/_bulk_delete', data=json.dumps(['Bulk Movie 1', 'Bulk Movie 2']),
+								  headers={'Content-Type': 'application/json'})
+		self.assertEqual(res.status_code, 200)
+		self.assertNotIn('Bulk Movie 1', app.graph.name_to_movie_node)
+		self.assertEqual(self.flask_app.get('/api/movies/Bulk Movie 2').status_code, 400)
+
+	# Test the separation between two actors
+	def test_get_separation(self):
+		res = self.flask_app.get('/api/actors/Kirstie Alley/separation/John Pankow')
+		# request should be successful
+		self.assertEqual(res.status_code, 200)
+		data = json.loads(res.data)
+		self.assertEqual(data['separation'], 2)
+		self.assertEqual(data['path'][0], 'Kirstie Alley')
+		self.assertEqual(data['path'][-1], 'John Pankow')
+		self.assertEqual(len(data['path']), 5)
+		# unknown actors are bad requests
+		res = self.flask_app.get('/api/actors/Kirstie Alley/separation/afafafafaf')
+		self.assertEqual(res.status_code, 400)
+
+	# Test the co-stars of an actor
+	def test_get_costars(self):
+		res = self.flask_app.get('/api/actors/Bruce Willis/costars')
+		# request should be successful
+		self.assertEqual(res.status_code, 200)
+		data = json.loads(res.data)
+		self.assertEqual(len(data), app.graph.get_actor_connections('Bruce Willis'))
+		self.assertTrue(all(shared > 0 for shared in data.values()))
+
+	# Test writes through the API are visible to graph queries
+	def test_graph_writes(self):
+		self.flask_app.post('/api/actors/', data=json.dumps({'name': 'Graph Actor', 'age': 40}),
+							headers={'Content-Type': 'application/json'})
+		self.flask_app.post('/api/movies/', data=json.dumps({'name': 'Graph Movie', 'actors': ['Graph Actor', 'Kirstie Alley']}),
+							headers={'Content-Type': 'application/json'})
+		res = self.flask_app.get('/api/actors/Graph Actor/costars')
+		self.assertEqual(json.loads(res.data), {'Kirstie Alley': 1})
+		res = self.flask_app.get('/api/actors/Graph Actor/separation/John Pankow')
+		self.assertEqual(json.loads(res.data)['separation'], 3)
+		# wrong types are rejected before anything changes
+		res = self.flask_app.put('/api/actors/Graph Actor', data=json.dumps({'age': 'forty'}),
+								 headers={'Content-Type': 'application/json'})
+		self.assertEqual(res.status_code, 400)
+		self.assertEqual(json.loads(self.flask_app.get('/api/actors/Graph Actor').data)['age'], 40)
+		self.flask_app.delete('/api/movies/Graph Movie')
+		res = self.flask_app.get('/api/actors/Graph Actor/separation/John Pankow')
+		self.assertEqual(json.loads(res.data)['separation'], -1)
+		self.flask_app.delete('/api/actors/Graph Actor')
+		self.assertEqual(self.flask_app.get('/api/actors/Graph Actor/costars').status_code, 400)
+
+	# Test the stats computed from the graph
+	def test_get_stats(self):
+		res = self.flask_app.get('/api/stats/hubs?k=1')
+		self.assertEqual(json.loads(res.data)[0][0], 'Bruce Willis')
+		res = self.flask_app.get('/api/stats/oldest?k=3')
+		self.assertEqual([age for _, age in json.loads(res.data)], [94, 94, 90])
+		res = self.flask_app.get('/api/stats/top_grossing?k=2')
+		self.assertEqual(json.loads(res.data)[0], ['Bruce Willis', 562709189])
+		res = self.flask_app.get('/api/stats/gross_by_age?start=30&end=40')
+		self.assertEqual(json.loads(res.data), {'start': 30, 'end': 40, 'actors': 48, 'total_gross': 3607801})
+		# parameters must be non-negative integers
+		self.assertEqual(self.flask_app.get('/api/stats/hubs?k=x').status_code, 400)
+		self.assertEqual(self.flask_app.get('/api/stats/gross_by_age?start=30').status_code, 400)
+
+	# Test graph queries running alongside writes never see a write half done
+	def test_graph_reads_during_writes(self):
+		statuses = []
+		done = threading.Event()
+
+		def read():
+			client = app.app.test_client()
+			while not done.is_set():
+				for url in ('/api/actors/Bruce Willis/costars', '/api/stats/hubs?k=5', '/api/stats/oldest?k=5',
+							'/api/stats/gross_by_age?start=0&end=99', '/api/actors/Bruce Willis/separation/Kirstie Alley'):
+					statuses.append(client.get(url).status_code)
+		readers = [threading.Thread(target=read) for _ in range(3)]
+		for reader in readers:
+			reader.start()
+		for i in range(100):
+			self.flask_app.post('/api/actors/', data=json.dumps({'name': 'Busy Actor %d' % i, 'age': 5, 'movies': ['Die Hard']}),
+								headers={'Content-Type': 'application/json'})
+			self.flask_app.put('/api/movies/Die Hard', data=json.dumps({'year': 1988 + i % 2}),
+							   headers={'Content-Type': 'application/json'})
+			if i > 0:
+				self.flask_app.delete('/api/actors/Busy Actor %d' % (i - 1))
+		done.set()
+		for reader in readers:
+			reader.join()
+		self.flask_app.delete('/api/actors/Busy Actor 99')
+		self.flask_app.put('/api/movies/Die Hard', data=json.dumps({'year': 1988}), headers={'Content-Type': 'application/json'})
+		self.assertEqual(set(statuses), set([200]))
+
 	# Test a valid PUT request for a movie
 	def test_put_movie_valid(self):
 		res = self.flask_app.put('/api/movies/Pulp Fiction', data=json.dumps({'box_office': 500}),
@@ -1,14 +1,21 @@
 from flask import Blueprint, abort, jsonify, request
 import urllib
+from bulk import add_bulk_routes
+from query import ACTOR_FIELDS
+from store import EntityStore
+from streaming import RecordStream
 from util import filter_actors_helper
 
 
-def construct_actor_blueprint(actor_data):
+def construct_actor_blueprint(actor_data, graph=None):
 	""" Create blueprint to handle API routing for actors
 
 	:param actor_data: JSON data for actors
+	:param graph: Graph to keep in sync with writes, if any
 	:return: blueprint to handle routing for actor requests
 	"""
+	# writes go through the store so the index, cached responses and graph stay in sync
+	actor_store = EntityStore('actor', actor_data, ACTOR_FIELDS, graph)
 	# initialize the blueprint
 	actor_blueprint = Blueprint('actor_blueprint', __name__)
 
@@ -20,26 +27,32 @@ def construct_actor_blueprint(actor_data):
 		:return: JSON data for requested actor
 		"""
 		# attempt to lookup actor
-		actor = actor_data.get(actor_name)
+		actor = actor_store.snapshot.data.get(actor_name)
 		if actor is None:
 			# custom error handler defined in app.py
 			abort(400)
-		return jsonify(actor), 200
+		return actor_store.responses.response(actor_name, actor)
 
 	@actor_blueprint.route('/api/actors/', methods=['GET'])
 	def get_actors():
 		""" handle GET request for all actors satisfying query
 
 		:return: JSON for actors satisfying query
+, stream=json sends the same document as it is encoded and stream=ndjson
+			sends only the records, one per line, with the total and next cursor in the X-Total-Count and X-Next-Cursor headers
 		"""
 		# parse the querystring
 		query = request.query_string
-		query = urllib.unquote(query)
+		query = urllib.unquote_plus(query)
+		# the whole request, streamed responses included, reads one version of the data
+		snapshot = actor_store.snapshot
 		# apply the filter defined in query string
-		movies = filter_actors_helper(query, actor_data)
+		movies = filter_actors_helper(query, snapshot.data, snapshot.index)
 		if movies is None:
 			# custom error handler defined in app.py
 			abort(400)
+		if isinstance(movies, RecordStream):
+			return movies.response()
 		return jsonify(movies), 200
 
 	@actor_blueprint.route('/api/actors/<string:actor_name>', methods=['PUT'])
@@ -49,19 +62,14 @@ def construct_actor_blueprint(actor_data):
 		:param actor_name: actor to update info for
 		:return: JSON with updated info. for actor
 		"""
-		# lookup the actor
-		actor = actor_data.get(actor_name)
 		update = request.json
-		# if actor doesn't exist or invalid data, throw 400
-		if update is None or actor is None:
+		if not isinstance(update, dict):
+			abort(400)
+		# perform the update, if actor doesn't exist or invalid data, throw 400
+		try:
+			actor = actor_store.update(actor_name, update)
+		except (KeyError, ValueError):
 			abort(400)
-		# check all keys are valid before updating anything
-		for key in update.keys():
-			if key not in actor.keys():
-				abort(400)
-		# perform the update
-		for key in update.keys():
-			actor[key] = update[key]
 		return jsonify(actor), 200
 
 	@actor_blueprint.route('/api/actors/', methods=['POST'])
@@ -73,17 +81,14 @@ def construct_actor_blueprint(actor_data):
 		# grab JSON data to use for new actor
 		new_actor = request.json
 		# must have valid data
-		if new_actor is None:
+		if not isinstance(new_actor, dict):
 			abort(400)
-		# name key must exist and be unique
-		actor_name = new_actor.get("name")
-		if actor_name is None or actor_name in actor_data.keys():
+		# add the data to stored JSON list, name key must exist and be unique
+		try:
+			actor = actor_store.add(new_actor)
+		except ValueError:
 			abort(400)
-		actor_data[actor_name] = {}
-		# add the data to stored JSON list
-		for key in new_actor.keys():
-			actor_data[actor_name][key] = new_actor[key]
-		return jsonify(actor_data[actor_name]), 201
+		return jsonify(actor), 201
 
 	@actor_blueprint.route('/api/actors/<string:actor_name>', methods=['DELETE'])
 	def delete_actor(actor_name):
@@ -92,13 +97,17 @@ def construct_actor_blueprint(actor_data):
 		:param actor_name: name of actor to delete
 		:return: JSON indicating if deletion failed or succeeded
 		"""
-		# attempt to pop actor from JSON list
-		actor = actor_data.pop(actor_name, None)
-		# if pop failed, actor did not exist
-		if actor is None:
+		# attempt to remove actor from JSON list
+		try:
+			actor_store.remove(actor_name)
+		except KeyError:
+			# actor did not exist
 			abort(400)
 		return jsonify({'status': "Deletion of " + actor_name + " was successful"}), 200
 
+	# routes for reading and writing many actors in one request
+	add_bulk_routes(actor_blueprint, '/api/actors/', actor_store)
+
 	# return blueprint to main app
 	return actor_blueprint
 
@@ -0,0 +1,67 @@
+import json
+from flask import abort, jsonify, request
+
+
+def read_batch():
+	""" read the items of a bulk request, a JSON array or NDJSON with one item per line
+
+	:return: list of items, 400 if the body cannot be read
+	"""
+	if request.mimetype == 'application/x-ndjson':
+		try:
+			return [json.loads(line) for line in request.get_data().splitlines() if line.strip()]
+		except ValueError:
+			abort(400)
+	items = request.get_json(silent=True)
+	if not isinstance(items, list):
+		# custom error handler defined in app.py
+		abort(400)
+	return items
+
+
+def add_bulk_routes(blueprint, prefix, store):
+	""" register the _bulk_get, _bulk_upsert and _bulk_delete routes of an entity blueprint
+
+	:param blueprint: actor or movie blueprint
+	:param prefix: URL the routes go under, such as /api/actors/
+	:param store: EntityStore the blueprint serves
+	"""
+
+	@blueprint.route(prefix + '_bulk_get', methods=['POST'])
+	def bulk_get():
+		""" handle POST request for many records by name
+
+		:return: JSON with the status, and record if found, of each name
+		"""
+		results = []
+		data = store.snapshot.data
+		for name in read_batch():
+			record = data.get(name) if isinstance(name, basestring) else None
+			if record is None:
+				results.append({'name': name, 'status': 404})
+			else:
+				results.append({'name': name, 'status': 200, 'record': record})
+		return jsonify({'results': results}), 200
+
+	@blueprint.route(prefix + '_bulk_upsert', methods=['POST'])
+	def bulk_upsert():
+		""" handle POST request to add or update many records, applied only if every record is valid
+
+		:return: JSON with the status of each record, 400 if the batch was not applied
+		"""
+		# existing records are updated, the rest are added
+		writes = [('upsert', record.get('name') if isinstance(record, dict) else None, record) for record in read_batch()]
+		applied, statuses = store.write_batch(writes)
+		results = [{'name': name, 'status': status} for (_, name, _), status in zip(writes, statuses)]
+		return jsonify({'applied': applied, 'results': results}), 200 if applied else 400
+
+	@blueprint.route(prefix + '_bulk_delete', methods=['POST'])
+	def bulk_delete():
+		""" handle POST request to delete many records by name, applied only if every name exists
+
+		:return: JSON with the status of each name, 400 if the batch was not applied
+		"""
+		writes = [('remove', name, None) for name in read_batch()]
+		applied, statuses = store.write_batch(writes)
+		results = [{'name': name, 'status': status} for (_, name, _), status in zip(writes, statuses)]
+		return jsonify({'applied': applied, 'results': results}), 200 if applied else 400
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import Response, jsonify, request
+
+
+class ResponseCache(object):
+	""" LRU cache of encoded single-record responses with their ETags, dropped when a record changes
+
+	Records are replaced rather than changed by writes, so an entry is only used for the record it was encoded from.
+
+	"""
+
+	def __init__(self, size=10000):
+		""" Constructor.
+
+		:param size: number of encoded records to keep
+		"""
+		self.size = size
+		# key -> (record, encoded body, etag)
+		self.entries = OrderedDict()
+		# guards entries, held only while they are looked up or changed and never while encoding
+		self.lock = threading.Lock()
+
+	def get(self, key, record):
+		""" get the encoded body and ETag for a record, encoding it on a miss
+
+		:param key: key of the record in data
+		:param record: the record
+		:return: (body, etag)
+		"""
+		with self.lock:
+			entry = self.entries.pop(key, None)
+			if entry is not None and entry[0] is record:
+				# most recently used entries are kept at the end
+				self.entries[key] = entry
+				return entry[1:]
+		# encode the same way jsonify does, so cached and uncached responses are identical
+		body = jsonify(record).get_data()
+		entry = record, body, hashlib.sha1(body).hexdigest()
+		with self.lock:
+			if len(self.entries) >= self.size:
+				self.entries.popitem(last=False)
+			self.entries[key] = entry
+		return entry[1:]
+
+	def invalidate(self, key):
+		""" drop the cached response for a record that changed or was deleted
+
+		:param key: key of the record in data
+		"""
+		with self.lock:
+			self.entries.pop(key, None)
+
+	def response(self, key, record):
+		""" make the response for a record, 304 if the request's If-None-Match has its current ETag
+
+		:param key: key of the record in data
+		:param record: the record
+		:return: the flask Response
+		"""
+		body, etag = self.get(key, record)
+		response = Response(body, mimetype='application/json')
+		response.set_etag(etag)
+		return response.make_conditional(request)
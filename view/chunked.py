@@ -0,0 +1,185 @@
+from collections import Mapping
+
+
+class Chunks(object):
+	""" Items split into buckets by key hash, copies share the buckets until they write to them
+
+	A copy costs one reference per bucket and a write copies only the bucket it changes. The number of buckets is kept
+	near the square root of the number of keys, so both stay small next to copying every item.
+	"""
+	# dict or set, the type of each bucket
+	bucket_type = None
+
+	def __init__(self):
+		""" Constructor.
+
+		"""
+		self.buckets = [self.bucket_type()]
+		# owners[i] is the token of the copy allowed to change buckets[i] in place
+		self.token = object()
+		self.owners = [self.token]
+		self.size = 0
+
+	def copy(self):
+		""" make a copy that shares the buckets of this one until either writes to them
+
+		:return: the copy
+		"""
+		chunks = self.__class__()
+		chunks.buckets = list(self.buckets)
+		chunks.owners = list(self.owners)
+		chunks.size = self.size
+		# neither one owns the shared buckets any more
+		self.token = object()
+		return chunks
+
+	def bucket(self, key):
+		""" get the bucket a key belongs in
+
+		:param key: the key
+		:return: position of the bucket
+		"""
+		return hash(key) & (len(self.buckets) - 1)
+
+	def own(self, i):
+		""" get a bucket to change, copying it first if it may be shared with a copy
+
+		:param i: position of the bucket
+		:return: the bucket
+		"""
+		if self.owners[i] is not self.token:
+			self.buckets[i] = self.bucket_type(self.buckets[i])
+			self.owners[i] = self.token
+		return self.buckets[i]
+
+	def grow(self, move):
+		""" double the number of buckets once they average more keys than there are buckets
+
+		:param move: function putting a key from one bucket in another, called with the bucket, the key and the new
+			bucket of the key
+		"""
+		if self.size <= len(self.buckets) * len(self.buckets):
+			return
+		buckets = [self.bucket_type() for _ in xrange(2 * len(self.buckets))]
+		mask = len(buckets) - 1
+		for bucket in self.buckets:
+			for key in bucket:
+				move(bucket, key, buckets[hash(key) & mask])
+		self.buckets = buckets
+		self.owners = [self.token] * len(buckets)
+
+	def __contains__(self, key):
+		return key in self.buckets[self.bucket(key)]
+
+	def __iter__(self):
+		for bucket in self.buckets:
+			for key in bucket:
+				yield key
+
+	def __len__(self):
+		return self.size
+
+
+class ChunkedMap(Chunks, Mapping):
+	""" A dictionary made of Chunks
+
+	"""
+	bucket_type = dict
+
+	def __init__(self, items=()):
+		""" Constructor.
+
+		:param items: dictionary or (key, value) pairs to start with
+		"""
+		Chunks.__init__(self)
+		for key, value in items.iteritems() if isinstance(items, Mapping) else items:
+			self[key] = value
+
+	def __getitem__(self, key):
+		return self.buckets[self.bucket(key)][key]
+
+	def get(self, key, default=None):
+		return self.buckets[self.bucket(key)].get(key, default)
+
+	def iteritems(self):
+		for bucket in self.buckets:
+			for item in bucket.iteritems():
+				yield item
+
+	def __setitem__(self, key, value):
+		bucket = self.own(self.bucket(key))
+		if key not in bucket:
+			self.size += 1
+		bucket[key] = value
+		self.grow(move_item)
+
+	def __delitem__(self, key):
+		i = self.bucket(key)
+		if key not in self.buckets[i]:
+			raise KeyError(key)
+		del self.own(i)[key]
+		self.size -= 1
+
+	def pop(self, key, default=None):
+		""" remove a key
+
+		:param key: the key
+		:param default: returned if key is not in the map
+		:return: the value of key
+		"""
+		i = self.bucket(key)
+		if key not in self.buckets[i]:
+			return default
+		self.size -= 1
+		return self.own(i).pop(key)
+
+
+class ChunkedSet(Chunks):
+	""" A set made of Chunks
+
+	"""
+	bucket_type = set
+
+	def __init__(self, keys=()):
+		""" Constructor.
+
+		:param keys: keys to start with
+		"""
+		Chunks.__init__(self)
+		for key in keys:
+			self.add(key)
+
+	def add(self, key):
+		""" add a key
+
+		:param key: the key
+		"""
+		i = self.bucket(key)
+		if key not in self.buckets[i]:
+			self.own(i).add(key)
+			self.size += 1
+			self.grow(move_key)
+
+	def discard(self, key):
+		""" remove a key if it is in the set
+
+		:param key: the key
+		"""
+		i = self.bucket(key)
+		if key in self.buckets[i]:
+			self.own(i).remove(key)
+			self.size -= 1
+
+
+def move_item(bucket, key, to):
+	""" put a key and its value from one dict bucket in another
+
+	"""
+	to[key] = bucket[key]
+
+
+def move_key(bucket, key, to):
+	""" put a key from one set bucket in another
+
+	"""
+	to.add(key)
@@ -0,0 +1,116 @@
+from flask import Blueprint, abort, jsonify, request
+
+
+def construct_graph_blueprint(graph):
+	""" Create blueprint to handle API routing for questions answered by the graph
+
+	Every request holds the graph's lock for reading while it queries the graph, so writes are never seen half done.
+	Graph reads are serialized against writes: a read waits for the write in progress and for waiting writes, and a
+	write waits for the reads in progress. Derived state a read builds on first use is built once, under the graph's
+	build lock.
+
+	:param graph: Graph of actors and movies
+	:return: blueprint to handle routing for graph requests
+	"""
+	# initialize the blueprint
+	graph_blueprint = Blueprint('graph_blueprint', __name__)
+
+	def get_actor_node(actor_name):
+		""" look up an actor node, 400 if there is no such actor
+
+		:param actor_name: name of the actor
+		:return: the ActorNode
+		"""
+		actor_node = graph.name_to_actor_node.get(actor_name)
+		if actor_node is None:
+			# custom error handler defined in app.py
+			abort(400)
+		return actor_node
+
+	def get_int_arg(name, default=None):
+		""" read a non-negative integer from the querystring, 400 if it is invalid or missing
+
+		:param name: name of the querystring param
+		:param default: value when the param is not given
+		:return: the integer
+		"""
+		value = request.args.get(name)
+		if value is None and default is not None:
+			return default
+		if value is None or not value.isdigit():
+			abort(400)
+		return int(value)
+
+	@graph_blueprint.route('/api/actors/<string:actor_name>/separation/<string:other_name>', methods=['GET'])
+	def get_separation(actor_name, other_name):
+		""" handle GET request for the degrees of separation between two actors
+
+		:param actor_name: actor to start from
+		:param other_name: actor to reach
+		:return: JSON with the separation and the path of actors and movies, -1 and null if not connected
+		"""
+		with graph.lock.reading():
+			separation, path = graph.bidirectional_bfs(get_actor_node(actor_name), get_actor_node(other_name),
+													   return_path=True)
+		return jsonify({'actor': actor_name, 'other': other_name, 'separation': separation, 'path': path}), 200
+
+	@graph_blueprint.route('/api/actors/<string:actor_name>/costars', methods=['GET'])
+	def get_costars(actor_name):
+		""" handle GET request for the actors an actor has worked with
+
+		:param actor_name: actor to look-up
+		:return: JSON mapping each co-star to the number of movies they share
+		"""
+		with graph.lock.reading():
+			costars = graph.get_costars().get(get_actor_node(actor_name), {})
+			costars = dict((node.name, shared) for node, shared in costars.iteritems())
+		return jsonify(costars), 200
+
+	@graph_blueprint.route('/api/stats/hubs', methods=['GET'])
+	def get_hubs():
+		""" handle GET request for the k actors with the most connections
+
+		:return: JSON list of [actor, connections], most connected first
+		"""
+		k = get_int_arg('k', 10)
+		with graph.lock.reading():
+			hubs = graph.get_hub_actors(k)
+		return jsonify(hubs[::-1]), 200
+
+	@graph_blueprint.route('/api/stats/oldest', methods=['GET'])
+	def get_oldest():
+		""" handle GET request for the k oldest actors
+
+		:return: JSON list of [actor, age], oldest first
+		"""
+		k = get_int_arg('k', 10)
+		with graph.lock.reading():
+			oldest = graph.get_oldest_X_actors(k)
+		return jsonify(oldest[::-1]), 200
+
+	@graph_blueprint.route('/api/stats/top_grossing', methods=['GET'])
+	def get_top_grossing():
+		""" handle GET request for the k top grossing actors
+
+		:return: JSON list of [actor, total gross], highest first
+		"""
+		k = get_int_arg('k', 10)
+		with graph.lock.reading():
+			top_grossing = graph.get_top_X_grossing_actors(k)
+		return jsonify(top_grossing[::-1]), 200
+
+	@graph_blueprint.route('/api/stats/gross_by_age', methods=['GET'])
+	def get_gross_by_age():
+		""" handle GET request for the total gross of actors in an age band
+
+		:return: JSON with the number of actors and their total gross
+		"""
+		start = get_int_arg('start')
+		end = get_int_arg('end')
+		with graph.lock.reading():
+			actors = graph.get_actors_in_age_group(start, end)
+			total_gross = graph.get_gross_for_age_group(start, end)
+		return jsonify({'start': start, 'end': end, 'actors': actors, 'total_gross': total_gross}), 200
+
+	# return blueprint to main app
+	return graph_blueprint
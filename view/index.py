@@ -0,0 +1,349 @@
+from bisect import bisect_left, bisect_right
+from chunked import ChunkedMap, ChunkedSet
+from query import is_number
+
+# length of the substrings indexed for name queries
+NGRAM = 3
+# values in each chunk of a SortedIndex, chunks are split when they grow to twice this, and the size at which a key
+# set becomes a ChunkedSet
+CHUNK = 256
+
+
+def ngrams(s):
+	""" get the distinct substrings of length NGRAM in s
+
+	:param s: string to split
+	:return: set of substrings
+	"""
+	return set(s[i:i + NGRAM] for i in xrange(len(s) - NGRAM + 1))
+
+
+class SortedIndex(object):
+	""" Values of a numeric field in sorted order with the key of each record, for range queries
+
+	The values are kept in chunks, copies share the chunks until they write to them so a write copies only one chunk.
+	"""
+
+	def __init__(self):
+		""" Constructor.
+
+		"""
+		# values[i] is a sorted chunk of values, keys[i][j] is the record holding values[i][j]
+		self.values = []
+		self.keys = []
+		# the largest value of each chunk
+		self.maxes = []
+		# owners[i] is the token of the index allowed to change chunk i in place
+		self.token = object()
+		self.owners = []
+		self.size = 0
+
+	def copy(self):
+		""" make a SortedIndex that shares the chunks of this one until either writes to them
+
+		:return: the SortedIndex
+		"""
+		sorted_index = SortedIndex()
+		sorted_index.values = list(self.values)
+		sorted_index.keys = list(self.keys)
+		sorted_index.maxes = list(self.maxes)
+		sorted_index.owners = list(self.owners)
+		sorted_index.size = self.size
+		# neither index owns the shared chunks any more
+		self.token = object()
+		return sorted_index
+
+	def own(self, i):
+		""" copy a chunk before changing it if it may be shared with another index
+
+		:param i: position of the chunk
+		"""
+		if self.owners[i] is not self.token:
+			self.values[i] = list(self.values[i])
+			self.keys[i] = list(self.keys[i])
+			self.owners[i] = self.token
+
+	def add(self, value, key):
+		""" add a record's value
+
+		:param value: value of the field
+		:param key: key of the record
+		"""
+		self.size += 1
+		if not self.values:
+			self.values.append([value])
+			self.keys.append([key])
+			self.maxes.append(value)
+			self.owners.append(self.token)
+			return
+		i = min(bisect_right(self.maxes, value), len(self.values) - 1)
+		self.own(i)
+		values, keys = self.values[i], self.keys[i]
+		j = bisect_right(values, value)
+		values.insert(j, value)
+		keys.insert(j, key)
+		self.maxes[i] = values[-1]
+		if len(values) > 2 * CHUNK:
+			# split the chunk in two
+			self.values[i:i + 1] = [values[:CHUNK], values[CHUNK:]]
+			self.keys[i:i + 1] = [keys[:CHUNK], keys[CHUNK:]]
+			self.maxes[i:i + 1] = [values[CHUNK - 1], values[-1]]
+			self.owners[i:i + 1] = [self.token, self.token]
+
+	def remove(self, value, key):
+		""" remove a record's value
+
+		:param value: value of the field when it was added
+		:param key: key of the record
+		"""
+		# equal values can run across several chunks
+		for i in xrange(bisect_left(self.maxes, value), len(self.values)):
+			values = self.values[i]
+			lo = bisect_left(values, value)
+			hi = bisect_right(values, value, lo)
+			if key in self.keys[i][lo:hi]:
+				self.own(i)
+				j = self.keys[i].index(key, lo, hi)
+				del self.values[i][j]
+				del self.keys[i][j]
+				self.size -= 1
+				if self.values[i]:
+					self.maxes[i] = self.values[i][-1]
+				else:
+					del self.values[i], self.keys[i], self.maxes[i], self.owners[i]
+				return
+			if hi < len(values):
+				break
+		raise ValueError('%r is not in the index' % (key,))
+
+	def locate(self, value, after):
+		""" find where a value is, or belongs
+
+		:param value: value to find
+		:param after: True for the position after values equal to value, False for the position before them
+		:return: (chunk, position in the chunk)
+		"""
+		find = bisect_right if after else bisect_left
+		i = find(self.maxes, value)
+		if i == len(self.values):
+			return i, 0
+		return i, find(self.values[i], value)
+
+	def span(self, bounds):
+		""" find the values within bounds
+
+		:param bounds: (low, high, include low, include high), None for no bound
+		:return: list of (chunk, start, end) slices of the chunks
+		"""
+		low, high, include_low, include_high = bounds
+		start = (0, 0)
+		if low is not None:
+			start = self.locate(low, not include_low)
+		end = (len(self.values), 0)
+		if high is not None:
+			end = self.locate(high, include_high)
+		slices = []
+		for i in xrange(start[0], min(end[0] + 1, len(self.values))):
+			lo = start[1] if i == start[0] else 0
+			hi = end[1] if i == end[0] else len(self.values[i])
+			if lo < hi:
+				slices.append((i, lo, hi))
+		return slices
+
+	def count(self, bounds):
+		""" count the values within bounds
+
+		:param bounds: (low, high, include low, include high)
+		:return: number of values
+		"""
+		return sum(hi - lo for _, lo, hi in self.span(bounds))
+
+	def lookup(self, bounds):
+		""" find the records with values within bounds
+
+		:param bounds: (low, high, include low, include high)
+		:return: set of keys
+		"""
+		found = set()
+		for i, lo, hi in self.span(bounds):
+			found.update(self.keys[i][lo:hi])
+		return found
+
+	def all_keys(self):
+		""" get the records with a value
+
+		:return: set of keys
+		"""
+		found = set()
+		for keys in self.keys:
+			found.update(keys)
+		return found
+
+	def __len__(self):
+		return self.size
+
+
+class EntityIndex(object):
+	""" Inverted indexes over actor or movie records, updated as records are added, changed and removed
+
+	"""
+
+	def __init__(self, data, fields):
+		""" Constructor.
+
+		:param data: JSON data for actors or movies
+		:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+		"""
+		self.fields = fields
+		# param -> indexed value (or substring of a name) -> set of keys, a ChunkedSet once it is large
+		self.postings = dict((param, ChunkedMap()) for param in fields)
+		# param -> SortedIndex for numeric fields
+		self.sorted = dict((param, SortedIndex()) for param, kind in fields.iteritems() if kind == 'number')
+		# key -> {param: value} as indexed, so removal does not depend on the current record
+		self.indexed = ChunkedMap()
+		# (param, entry) of the key sets this index may change, None if none are shared with another index
+		self.owned = None
+		for key, record in data.iteritems():
+			self.add(key, record)
+
+	def copy(self):
+		""" make an index that can be changed without affecting this one, maps and key sets are shared until changed
+
+		:return: the EntityIndex
+		"""
+		index = EntityIndex({}, self.fields)
+		index.postings = dict((param, postings.copy()) for param, postings in self.postings.iteritems())
+		index.sorted = dict((param, sorted_index.copy()) for param, sorted_index in self.sorted.iteritems())
+		index.indexed = self.indexed.copy()
+		index.owned = set()
+		# this index can no longer change the sets it shares with the copy either
+		self.owned = set()
+		return index
+
+	def keys_for(self, param, entry):
+		""" get the key set of an entry to change, copying it first if it may be shared with another index
+
+		:param param: param of the entry
+		:param entry: indexed value (or substring of a name)
+		:return: set or ChunkedSet of keys, empty if the entry was not indexed
+		"""
+		postings = self.postings[param]
+		keys = postings.get(entry)
+		if keys is None or (self.owned is not None and (param, entry) not in self.owned):
+			keys = postings[entry] = keys.copy() if isinstance(keys, ChunkedSet) else set(keys or ())
+			if self.owned is not None:
+				self.owned.add((param, entry))
+		if len(keys) >= CHUNK and not isinstance(keys, ChunkedSet):
+			# large sets are shared in chunks so a write does not copy all of them
+			keys = postings[entry] = ChunkedSet(keys)
+		return keys
+
+	def add(self, key, record):
+		""" index a record
+
+		:param key: key of the record in data
+		:param record: the record
+		"""
+		values = {}
+		for param, kind in self.fields.iteritems():
+			value = record.get(param)
+			if kind == 'substring' and isinstance(value, basestring):
+				values[param] = value
+				entries = ngrams(value)
+			elif kind == 'member' and isinstance(value, list):
+				entries = set(item for item in value if isinstance(item, basestring))
+				values[param] = entries
+			elif kind == 'number' and is_number(value):
+				values[param] = value
+				entries = (value,)
+				self.sorted[param].add(value, key)
+			else:
+				continue
+			for entry in entries:
+				self.keys_for(param, entry).add(key)
+		self.indexed[key] = values
+
+	def remove(self, key):
+		""" drop a record from the index
+
+		:param key: key of the record in data
+		"""
+		values = self.indexed.pop(key, None)
+		if values is None:
+			return
+		for param, value in values.iteritems():
+			kind = self.fields[param]
+			if kind == 'substring':
+				entries = ngrams(value)
+			elif kind == 'member':
+				entries = value
+			else:
+				entries = (value,)
+				self.sorted[param].remove(value, key)
+			for entry in entries:
+				keys = self.keys_for(param, entry)
+				keys.discard(key)
+				if not keys:
+					del self.postings[param][entry]
+
+	def update(self, key, record):
+		""" re-index a record after it changed
+
+		:param key: key of the record in data
+		:param record: the record
+		"""
+		self.remove(key)
+		self.add(key, record)
+
+	def ngram_postings(self, condition):
+		""" get the key sets for the substrings of a name query, smallest first
+
+		:param condition: Condition on a substring field, at least NGRAM long
+		:return: list of sets of keys, empty if some substring is not indexed
+		"""
+		postings = self.postings[condition.param]
+		found = [postings.get(entry) for entry in ngrams(condition.value)]
+		if None in found:
+			return []
+		return sorted(found, key=len)
+
+	def count(self, condition):
+		""" estimate the number of records matching a Condition, an upper bound
+
+		:param condition: the Condition
+		:return: number of candidate records
+		"""
+		if condition.kind == 'substring':
+			if len(condition.value) < NGRAM:
+				return len(self.indexed)
+			found = self.ngram_postings(condition)
+			return len(found[0]) if found else 0
+		if condition.kind == 'number' and condition.op == '!=':
+			return len(self.sorted[condition.param]) - len(self.postings[condition.param].get(condition.value, ()))
+		if condition.kind == 'number' and condition.op != '=':
+			return self.sorted[condition.param].count(condition.value)
+		return len(self.postings[condition.param].get(condition.value, ()))
+
+	def lookup(self, condition):
+		""" find the records matching a Condition
+
+		:param condition: the Condition
+		:return: set or ChunkedSet of keys, must not be modified
+		"""
+		if condition.kind == 'substring':
+			value = condition.value
+			if len(value) < NGRAM:
+				# too short to use the index
+				candidates = self.indexed
+			else:
+				found = self.ngram_postings(condition)
+				if not found:
+					return set()
+				candidates = found[0]
+			# check value appears in full in each candidate
+			return set(key for key in candidates if value in self.indexed[key].get(condition.param, ()))
+		if condition.kind == 'number' and condition.op == '!=':
+			return self.sorted[condition.param].all_keys().difference(self.postings[condition.param].get(condition.value, ()))
+		if condition.kind == 'number' and condition.op != '=':
+			return self.sorted[condition.param].lookup(condition.value)
+		return self.postings[condition.param].get(condition.value, set())
@@ -1,14 +1,21 @@
 from flask import Blueprint, abort, jsonify, request
+from bulk import add_bulk_routes
+from query import MOVIE_FIELDS
+from store import EntityStore
+from streaming import RecordStream
 from util import filter_movies_helper
 import urllib
 
-def construct_movie_blueprint(movie_data):
+def construct_movie_blueprint(movie_data, graph=None):
 	""" Create blueprint to handle API routing for movies
 
 	:param movie_data: JSON data for movies
+	:param graph: Graph to keep in sync with writes, if any
 	:return: blueprint to handle movie routing for app
 	"""
 
+	# writes go through the store so the index, cached responses and graph stay in sync
+	movie_store = EntityStore('movie', movie_data, MOVIE_FIELDS, graph)
 	# initialize the blueprint
 	movie_blueprint = Blueprint('movie_blueprint', __name__)
 
@@ -19,27 +26,33 @@ def construct_movie_blueprint(movie_data):
 		:param movie_name: name of movie to lookup
 		:return: JSON data for movie, or 400 Error if lookup fails
 		"""
-		movie = movie_data.get(movie_name)
+		movie = movie_store.snapshot.data.get(movie_name)
 		# check that movie is in data set
 		if movie is None:
 			# custom error handler defined in app.py
 			abort(400)
-		return jsonify(movie), 200
+		return movie_store.responses.response(movie_name, movie)
 
 	@movie_blueprint .route('/api/movies/', methods=['GET'])
 	def get_movies():
 		""" handle GET request for all movies meeting filter criteria
 
 		:return: JSON data for all movies remaining after filter application
+, stream=json sends the same document as it is encoded and stream=ndjson
+			sends only the records, one per line, with the total and next cursor in the X-Total-Count and X-Next-Cursor headers
 		"""
 		# get raw text of query_string
 		query = request.query_string
-		query = urllib.unquote(query)
+		query = urllib.unquote_plus(query)
+		# the whole request, streamed responses included, reads one version of the data
+		snapshot = movie_store.snapshot
 		# apply filter defined by query string
-		movies = filter_movies_helper(query, movie_data)
+		movies = filter_movies_helper(query, snapshot.data, snapshot.index)
 		if movies is None:
 			# custom error handler defined in app.py
 			abort(400)
+		if isinstance(movies, RecordStream):
+			return movies.response()
 		return jsonify(movies), 200
 
 	@movie_blueprint .route('/api/movies/<string:movie_name>', methods=['PUT'])
@@ -49,21 +62,17 @@ def construct_movie_blueprint(movie_data):
 		:param movie_name: name of movie to update
 		:return: the new JSON data for given movie
 		"""
-		# look up selected movie
-		movie = movie_data.get(movie_name)
 		# grab data to update
 		update = request.json
-		if update is None or movie is None:
+		if not isinstance(update, dict):
+			# custom error handler defined in app.py
+			abort(400)
+		# perform the update, keys in update data must already exist in the movie
+		try:
+			movie = movie_store.update(movie_name, update)
+		except (KeyError, ValueError):
 			# custom error handler defined in app.py
 			abort(400)
-		# check all keys in update data are valid before updating anything
-		for key in update.keys():
-			if key not in movie.keys():
-				# custom error handler defined in app.py
-				abort(400)
-		# perform the update
-		for key in update.keys():
-			movie[key] = update[key]
 		return jsonify(movie), 200
 
 	@movie_blueprint .route('/api/movies/', methods=['POST'])
@@ -74,20 +83,16 @@ def construct_movie_blueprint(movie_data):
 		"""
 		# grab JSON data for movie to add
 		new_movie = request.json
-		if new_movie is None:
+		if not isinstance(new_movie, dict):
 			# custom error handler defined in app.py
 			abort(400)
-		# name key must exist and be unique
-		movie_name = new_movie.get("name")
-		# if name already exists cannot add this movie.
-		if movie_name is None or movie_name in movie_data.keys():
+		# add the new data to stored JSON, name key must exist and be unique
+		try:
+			movie = movie_store.add(new_movie)
+		except ValueError:
 			abort(400)
-		movie_data[movie_name] = {}
-		# add the new data to stored JSON
-		for key in new_movie.keys():
-			movie_data[movie_name][key] = new_movie[key]
 		# use 201 HTTP code for created
-		return jsonify(movie_data[movie_name]), 201
+		return jsonify(movie), 201
 
 	@movie_blueprint .route('/api/movies/<string:movie_name>', methods=['DELETE'])
 	def delete_movie(movie_name):
@@ -96,14 +101,17 @@ def construct_movie_blueprint(movie_data):
 		:param movie_name: movie to delete
 		:return: JSON indicating if delete was successful or not
 		"""
-		# attempt to pop the specified movie from data
-		movie = movie_data.pop(movie_name, None)
-		# if pop failed, movie not found
-		if movie is None:
-			# custom error handler in app.py
+		# attempt to remove the specified movie from data
+		try:
+			movie_store.remove(movie_name)
+		except KeyError:
+			# movie not found, custom error handler in app.py
 			abort(400)
 		return jsonify({'status': "Deletion of " + movie_name + " was successful"}), 200
 
+	# routes for reading and writing many movies in one request
+	add_bulk_routes(movie_blueprint, '/api/movies/', movie_store)
+
 	# return blueprint to
 	return movie_blueprint
 
@@ -0,0 +1,155 @@
+import base64
+import heapq
+import json
+from query import is_number
+
+# querystring params that control the response instead of filtering records
+OPTIONS = ('limit', 'offset', 'cursor', 'fields', 'sort', 'stream')
+# formats a response can be streamed in
+STREAM_FORMATS = ('json', 'ndjson')
+
+
+def split_options(query):
+	""" separate paging, sorting and projection params from the filter clauses of a query
+
+	:param query: query passed by user in querystring
+	:return: (filter query, dictionary of options), raises ValueError if an option is malformed
+	"""
+	clauses = []
+	options = {}
+	for part in query.split('&') if query else []:
+		param, _, value = part.partition('=')
+		if param not in OPTIONS:
+			clauses.append(part)
+			continue
+		if param in options or '|' in value:
+			raise ValueError('%s can only be given once, outside of | clauses' % param)
+		if param in ('limit', 'offset') and not value.isdigit():
+			raise ValueError('%s must be a non-negative integer' % param)
+		if param == 'stream' and value not in STREAM_FORMATS:
+			raise ValueError('stream must be one of %s' % ', '.join(STREAM_FORMATS))
+		options[param] = int(value) if param in ('limit', 'offset') else value
+	return '&'.join(clauses), options
+
+
+def is_paged(options):
+	""" check whether a response should be a page of results rather than a dictionary
+
+	:param options: options from split_options
+	:return: True if the results are paged or sorted
+	"""
+	return any(option in options for option in ('limit', 'offset', 'cursor', 'sort'))
+
+
+def sort_key_function(sort, fields):
+	""" get the function giving each record its place in the results
+
+	:param sort: field to sort by, prefixed with - for descending order, or None to sort by key
+	:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+	:return: function of (key, record), records missing the field come last in either order
+	"""
+	if sort is None:
+		return lambda key, record: (key,)
+	param = sort.lstrip('-')
+	kind = fields.get(param)
+	if kind == 'number':
+		valid = is_number
+	elif kind == 'substring':
+		valid = lambda value: isinstance(value, basestring)
+	else:
+		raise ValueError('cannot sort by %s' % param)
+	# descending results are taken from the largest keys
+	present, missing = (1, 0) if sort.startswith('-') else (0, 1)
+
+	def sort_key(key, record):
+		value = record.get(param)
+		if valid(value):
+			return present, value, key
+		return missing, None, key
+	return sort_key
+
+
+def encode_cursor(sort, last):
+	""" make an opaque cursor pointing after a result
+
+	:param sort: the sort option the results were ordered by
+	:param last: sort key of the last result returned
+	:return: cursor string
+	"""
+	return base64.urlsafe_b64encode(json.dumps([sort, list(last)]))
+
+
+def decode_cursor(cursor, sort):
+	""" read a cursor made by encode_cursor
+
+	:param cursor: cursor string passed by user
+	:param sort: the sort option of this request, must match the cursor's
+	:return: sort key of the last result already returned, raises ValueError if cursor is invalid
+	"""
+	try:
+		cursor_sort, last = json.loads(base64.urlsafe_b64decode(str(cursor)))
+	except (TypeError, ValueError):
+		raise ValueError('invalid cursor')
+	if cursor_sort != sort:
+		raise ValueError('cursor was made for a different sort')
+	return tuple(last)
+
+
+def project(record, fields):
+	""" keep only the requested fields of a record
+
+	:param record: the record
+	:param fields: comma separated field names, or None for all fields
+	:return: the record or a copy with the selected fields
+	"""
+	if fields is None:
+		return record
+	return dict((field, record[field]) for field in fields.split(',') if field in record)
+
+
+def select_page(keys, data, options, fields):
+	""" order and page a set of matching keys, using top-k selection instead of sorting every match
+
+	:param keys: keys of the records matching the filter
+	:param data: JSON data for actors or movies
+	:param options: options from split_options
+	:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+	:return: (keys of the page in order, cursor for the next page or None)
+	"""
+	sort = options.get('sort')
+	sort_key = sort_key_function(sort, fields)
+	descending = sort is not None and sort.startswith('-')
+	entries = ((sort_key(key, data[key]), key) for key in keys)
+	if 'cursor' in options:
+		last = decode_cursor(options['cursor'], sort)
+		if descending:
+			entries = (entry for entry in entries if entry[0] < last)
+		else:
+			entries = (entry for entry in entries if entry[0] > last)
+	offset = options.get('offset', 0)
+	limit = options.get('limit')
+	if limit is None:
+		selected = sorted(entries, reverse=descending)
+	else:
+		# one extra result tells whether there is a next page
+		select = heapq.nlargest if descending else heapq.nsmallest
+		selected = select(offset + limit + 1, entries)
+	results = selected[offset:offset + limit] if limit is not None else selected[offset:]
+	next_cursor = None
+	if limit is not None and len(selected) > offset + limit and results:
+		next_cursor = encode_cursor(sort, results[-1][0])
+	return [key for _, key in results], next_cursor
+
+
+def page(keys, data, options, fields):
+	""" build the response for a page of matching records
+
+	:param keys: keys of the records matching the filter
+	:param data: JSON data for actors or movies
+	:param options: options from split_options
+	:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+	:return: dictionary with the page of results, the total number of matches and the cursor for the next page
+	"""
+	results, next_cursor = select_page(keys, data, options, fields)
+	return {'results': [project(data[key], options.get('fields')) for key in results],
+			'total': len(keys), 'next': next_cursor}
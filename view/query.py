@@ -0,0 +1,293 @@
+import re
+import threading
+from collections import OrderedDict
+
+# fields that can be filtered on for each kind of record, and how values are matched
+ACTOR_FIELDS = {'name': 'substring', 'movies': 'member', 'age': 'number', 'total_gross': 'number'}
+MOVIE_FIELDS = {'name': 'substring', 'actors': 'member', 'year': 'number', 'box_office': 'number'}
+# rough share of records one filter of each kind matches, used to order conjunctions
+SELECTIVITY = {'number': 0.01, 'member': 0.05, 'substring': 0.5}
+# same for the comparison operators, which only apply to numeric fields
+RANGE_SELECTIVITY = {'<': 0.3, '<=': 0.3, '>': 0.3, '>=': 0.3, 'between': 0.1, '!=': 1.0}
+# param, operator and value of a clause, two character operators are tried first
+CLAUSE = re.compile(r'^([^=<>!]*?)(<=|>=|!=|=|<|>| between )(.*)$')
+
+
+class Filter(object):
+	""" leaf of a query, matches records where param compares to value with op
+
+	"""
+	__slots__ = ('param', 'op', 'value')
+
+	def __init__(self, param, value, op='='):
+		self.param = param
+		self.op = op
+		self.value = value
+
+
+class Or(object):
+	""" matches records matching any of its clauses
+
+	"""
+	__slots__ = ('clauses',)
+
+	def __init__(self, clauses):
+		self.clauses = clauses
+
+
+class And(object):
+	""" matches records matching all of its clauses
+
+	"""
+	__slots__ = ('clauses',)
+
+	def __init__(self, clauses):
+		self.clauses = clauses
+
+
+class Condition(object):
+	""" compiled Filter, with the value converted to the type stored in the field
+
+	"""
+	__slots__ = ('kind', 'param', 'op', 'value', 'selectivity', 'predicate')
+
+	def __init__(self, kind, param, op, value, selectivity, predicate):
+		self.kind = kind
+		self.param = param
+		self.op = op
+		self.value = value
+		self.selectivity = selectivity
+		self.predicate = predicate
+
+
+class QueryPlan(object):
+	""" compiled query, a conjunction of clauses ordered from most to least selective
+
+	"""
+
+	def __init__(self, clauses):
+		""" Constructor.
+
+		:param clauses: list of (predicate, conditions) for each Or, or None if the query can match nothing
+		"""
+		self.clauses = clauses
+
+	def execute(self, data, index=None):
+		""" find the keys of the records matching the query
+
+		:param data: JSON data for actors or movies
+		:param index: EntityIndex over data, if any
+		:return: set of matching keys
+		"""
+		if self.clauses is None:
+			return set()
+		clauses = self.clauses
+		if index is None:
+			predicate = clauses[0][0]
+			keys = set(key for key, record in data.iteritems() if predicate(record))
+		else:
+			# start from the clause with the fewest indexed matches
+			clauses = sorted(clauses, key=lambda clause: sum(index.count(c) for c in clause[1]))
+			keys = set()
+			for condition in clauses[0][1]:
+				keys.update(index.lookup(condition))
+		# the remaining clauses only check records that are still candidates
+		for predicate, _ in clauses[1:]:
+			if not keys:
+				break
+			keys = set(key for key in keys if predicate(data[key]))
+		return keys
+
+
+class PlanCache(object):
+	""" LRU cache of compiled plans keyed by normalized query string
+
+	"""
+
+	def __init__(self, fields, size=256):
+		""" Constructor.
+
+		:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+		:param size: number of plans to keep
+		"""
+		self.fields = fields
+		self.size = size
+		self.plans = OrderedDict()
+		# guards plans, held only while they are looked up or changed and never while compiling
+		self.lock = threading.Lock()
+
+	def get_plan(self, query):
+		""" get the plan for a query, parsing and compiling it on a miss
+
+		:param query: query passed by user in querystring
+		:return: the QueryPlan, raises ValueError if query is malformed
+		"""
+		key = normalize_query(query)
+		with self.lock:
+			plan = self.plans.pop(key, None)
+			if plan is not None:
+				# most recently used plans are kept at the end
+				self.plans[key] = plan
+				return plan
+		plan = compile_query(parse_query(query), self.fields)
+		with self.lock:
+			if len(self.plans) >= self.size:
+				self.plans.popitem(last=False)
+			self.plans[key] = plan
+		return plan
+
+
+def normalize_query(query):
+	""" put the clauses of a query in a canonical order, queries that differ only in clause order share a plan
+
+	:param query: query passed by user in querystring
+	:return: normalized query string
+	"""
+	return '&'.join(sorted(set('|'.join(sorted(set(part.split('|')))) for part in query.split('&'))))
+
+
+def parse_query(query):
+	""" parse a query into an And of Ors of Filters (& binds looser than |)
+
+	:param query: query passed by user in querystring
+	:return: root of the query AST, raises ValueError if query is malformed
+	"""
+	if isinstance(query, str):
+		query = query.decode('utf-8')
+	return And([Or([parse_filter(clause) for clause in part.split('|')]) for part in query.split('&')])
+
+
+def parse_filter(clause):
+	""" parse a single clause, param=value or a comparison such as age<30, age!=30 or year between 1990,1999
+
+	:param clause: text of the clause
+	:return: the Filter, raises ValueError if clause is malformed
+	"""
+	match = CLAUSE.match(clause)
+	if match is None or '=' in match.group(3):
+		raise ValueError('expected param=value, found %r' % clause)
+	param, op, value = match.groups()
+	# strip quotes around value
+	if value[:1] == '"':
+		value = value[1:-1]
+	return Filter(param, value, op.strip())
+
+
+def is_number(value):
+	""" check a value is numeric, bools are not
+
+	:param value: value of a field
+	:return: True if value is a number
+	"""
+	return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+def parse_bounds(op, value):
+	""" get the inclusive or exclusive bounds for a comparison
+
+	:param op: comparison operator
+	:param value: value the field is compared to
+	:return: (low, high, include low, include high), None for no bound, or None if value is not a number
+	"""
+	numbers = value.split(',') if op == 'between' else [value]
+	if len(numbers) != (2 if op == 'between' else 1) or not all(number.isdigit() for number in numbers):
+		return None
+	numbers = [int(number) for number in numbers]
+	if op == 'between':
+		return numbers[0], numbers[1], True, True
+	if op in ('<', '<='):
+		return None, numbers[0], False, op == '<='
+	return numbers[0], None, op == '>=', False
+
+
+def in_bounds(value, bounds):
+	""" check a value lies within bounds
+
+	:param value: value of a field
+	:param bounds: (low, high, include low, include high) from parse_bounds
+	:return: True if value is a number within bounds
+	"""
+	low, high, include_low, include_high = bounds
+	if not is_number(value):
+		return False
+	if low is not None and (value < low or (value == low and not include_low)):
+		return False
+	if high is not None and (value > high or (value == high and not include_high)):
+		return False
+	return True
+
+
+def compile_filter(node, fields):
+	""" compile a Filter into a Condition
+
+	:param node: the Filter
+	:param fields: fields that can be filtered on
+	:return: the Condition, or None if nothing can match
+	"""
+	kind = fields.get(node.param)
+	param = node.param
+	op = node.op
+	value = node.value
+	if op != '=' and kind in ('substring', 'member'):
+		raise ValueError('%s can only be compared with =' % param)
+	if kind == 'substring':
+		# longer substrings match fewer names
+		return Condition(kind, param, op, value, SELECTIVITY[kind] / max(len(value), 1),
+						 lambda record: value in record.get(param, u''))
+	if kind == 'member':
+		return Condition(kind, param, op, value, SELECTIVITY[kind], lambda record: value in record.get(param, ()))
+	if kind == 'number' and op in ('=', '!=') and value.isdigit():
+		number = int(value)
+		if op == '=':
+			return Condition(kind, param, op, number, SELECTIVITY[kind], lambda record: record.get(param) == number)
+		return Condition(kind, param, op, number, RANGE_SELECTIVITY[op],
+						 lambda record: is_number(record.get(param)) and record.get(param) != number)
+	if kind == 'number' and op not in ('=', '!='):
+		bounds = parse_bounds(op, value)
+		if bounds is not None:
+			return Condition(kind, param, op, bounds, RANGE_SELECTIVITY[op],
+							 lambda record: in_bounds(record.get(param), bounds))
+	# unknown parameters and non-numeric values for numeric fields match nothing
+	return None
+
+
+def compile_clause(node, fields):
+	""" compile an Or of Filters
+
+	:param node: the Or
+	:param fields: fields that can be filtered on
+	:return: (estimated selectivity, predicate, conditions), or None if nothing can match
+	"""
+	conditions = [condition for condition in (compile_filter(clause, fields) for clause in node.clauses)
+				  if condition is not None]
+	if not conditions:
+		return None
+	estimate = min(1.0, sum(condition.selectivity for condition in conditions))
+	if len(conditions) == 1:
+		return estimate, conditions[0].predicate, conditions
+	predicates = [condition.predicate for condition in conditions]
+	return estimate, lambda record: any(predicate(record) for predicate in predicates), conditions
+
+
+def compile_query(node, fields):
+	""" compile a query AST into a plan, most selective clauses first
+
+	:param node: the And at the root of the AST
+	:param fields: fields that can be filtered on
+	:return: the QueryPlan
+	"""
+	compiled = [compile_clause(clause, fields) for clause in node.clauses]
+	if None in compiled:
+		return QueryPlan(None)
+	compiled.sort(key=lambda clause: clause[0])
+	return QueryPlan([(predicate, conditions) for _, predicate, conditions in compiled])
+
+
+def select(keys, data):
+	""" build the response dictionary for a set of keys
+
+	:param keys: keys of the records to return
+	:param data: JSON data for actors or movies
+	:return: dictionary of the selected records
+	"""
+	return dict((key, data[key]) for key in keys)
@@ -0,0 +1,200 @@
+import threading
+from contextlib import contextmanager
+from cache import ResponseCache
+from chunked import ChunkedMap
+from index import EntityIndex
+
+
+class Snapshot(object):
+	""" one version of the records and their index, never changed once published so readers need no lock
+
+	"""
+	__slots__ = ('version', 'data', 'index')
+
+	def __init__(self, version, data, index):
+		self.version = version
+		self.data = data
+		self.index = index
+
+	def copy(self):
+		""" start the next version, sharing the records and index entries until they are written
+
+		:return: the Snapshot
+		"""
+		return Snapshot(self.version + 1, self.data.copy(), self.index.copy())
+
+
+class EntityStore(object):
+	""" Actor or movie records served by the API, with the index, cached responses and Graph kept in step on writes
+
+	Requests read the current snapshot and keep using it, writers build the next snapshot and publish it when done.
+	"""
+
+	def __init__(self, kind, data, fields, graph=None):
+		""" Constructor.
+
+		:param kind: 'actor' or 'movie'
+		:param data: JSON data for actors or movies
+		:param fields: fields that can be filtered on, ACTOR_FIELDS or MOVIE_FIELDS
+		:param graph: Graph to apply writes to under its lock, or None if only the JSON data is served
+		"""
+		self.kind = kind
+		self.graph = graph
+		# index the data for filter queries
+		self.snapshot = Snapshot(0, ChunkedMap(data), EntityIndex(data, fields))
+		# encoded responses for single record lookups
+		self.responses = ResponseCache()
+		# only one write at a time, reads never wait for it
+		self.write_lock = threading.Lock()
+
+	@contextmanager
+	def graph_writes(self):
+		""" hold the graph's lock for writing, if there is a graph, so graph queries wait until a write is done
+
+		"""
+		if self.graph is None:
+			yield
+		else:
+			# the other store writes to the same graph
+			with self.graph.lock.writing():
+				yield
+
+	def check(self, action, key, record=None):
+		""" check a write can be applied, without changing anything
+
+		:param action: 'add', 'update' or 'remove'
+		:param key: key of the record, the name of a new record for 'add'
+		:param record: the new record for 'add', the fields to change for 'update'
+		:return: raises KeyError if there is no record to update or remove and ValueError if the write is invalid
+		"""
+		data = self.snapshot.data
+		if action == 'add':
+			if key is None or key in data:
+				raise ValueError('record needs a new name')
+		elif key not in data:
+			raise KeyError(key)
+		elif action == 'update':
+			# all keys must already be fields of the record
+			for field in record:
+				if field not in data[key]:
+					raise ValueError('%s is not a field of %s' % (field, key))
+		if self.graph is not None and action != 'remove':
+			getattr(self.graph, 'check_' + self.kind)(record, key if action == 'update' else None)
+
+	def apply(self, snapshot, action, key, record=None):
+		""" apply a checked write to the graph and an unpublished snapshot's data, its index is left to reindex
+
+		:param snapshot: the next Snapshot, from Snapshot.copy
+		:param action: 'add', 'update' or 'remove'
+		:param key: key of the record
+		:param record: the new record for 'add', the fields to change for 'update'
+		"""
+		if self.graph is not None:
+			graph_write = getattr(self.graph, '%s_%s' % (action, self.kind))
+			if action == 'add':
+				graph_write(record)
+			elif action == 'update':
+				graph_write(key, record)
+			else:
+				graph_write(key)
+		if action == 'add':
+			snapshot.data[key] = dict(record)
+		elif action == 'update':
+			# published records are never changed, readers may hold them
+			updated = dict(snapshot.data[key])
+			updated.update(record)
+			snapshot.data[key] = updated
+		else:
+			del snapshot.data[key]
+
+	def publish(self, snapshot, keys):
+		""" bring a snapshot's index up to date after writes and make it the current snapshot
+
+		:param snapshot: the next Snapshot, with the writes applied
+		:param keys: keys of the records that were written
+		"""
+		for key in keys:
+			record = snapshot.data.get(key)
+			if record is None:
+				snapshot.index.remove(key)
+			else:
+				snapshot.index.update(key, record)
+		# requests that start from here on see the writes
+		self.snapshot = snapshot
+		for key in keys:
+			self.responses.invalidate(key)
+
+	def write(self, action, key, record=None):
+		""" check and apply a single write
+
+		:param action: 'add', 'update' or 'remove'
+		:param key: key of the record
+		:param record: the new record for 'add', the fields to change for 'update'
+		:return: the record as stored, or as it was before removal
+		"""
+		with self.write_lock, self.graph_writes():
+			self.check(action, key, record)
+			snapshot = self.snapshot.copy()
+			removed = snapshot.data.get(key)
+			self.apply(snapshot, action, key, record)
+			self.publish(snapshot, [key])
+		return removed if action == 'remove' else snapshot.data[key]
+
+	def add(self, record):
+		""" add a new record, stored as given while its graph node gets defaults for missing fields
+
+		:param record: the new record, must have a new name
+		:return: the stored record, raises ValueError if record is invalid
+		"""
+		return self.write('add', record.get('name'), record)
+
+	def update(self, key, changes):
+		""" change fields of a record, all fields must already exist
+
+		:param key: key of the record
+		:param changes: dictionary of fields to change
+		:return: the updated record, raises KeyError if there is no such record and ValueError if changes are invalid
+		"""
+		return self.write('update', key, changes)
+
+	def remove(self, key):
+		""" remove a record
+
+		:param key: key of the record
+		:return: the removed record, raises KeyError if there is no such record
+		"""
+		return self.write('remove', key)
+
+	def write_batch(self, writes):
+		""" check a batch of writes and apply all of them, or none if any is invalid
+
+		:param writes: list of (action, key, record), 'upsert' updates the record if it exists and adds it otherwise
+		:return: (True if the batch was applied, list of HTTP status for each write)
+		"""
+		with self.write_lock, self.graph_writes():
+			data = self.snapshot.data
+			# decide upserts under the lock, so no other write can add the record in between
+			writes = [('update' if isinstance(key, basestring) and key in data else 'add', key, record) if action == 'upsert' else (action, key, record)
+					  for action, key, record in writes]
+			statuses = []
+			seen = set()
+			for action, key, record in writes:
+				try:
+					# a record can only be written once per batch
+					if key in seen or (action != 'remove' and not isinstance(record, dict)):
+						raise ValueError('invalid write')
+					seen.add(key)
+					self.check(action, key, record)
+					statuses.append(201 if action == 'add' else 200)
+				except KeyError:
+					statuses.append(404)
+				except (TypeError, ValueError):
+					statuses.append(400)
+			if any(status >= 400 for status in statuses):
+				return False, statuses
+			snapshot = self.snapshot.copy()
+			for action, key, record in writes:
+				self.apply(snapshot, action, key, record)
+			# the whole batch becomes visible at once
+			self.publish(snapshot, seen)
+		return True, statuses
@@ -0,0 +1,83 @@
+import json
+from flask import Response
+from paging import project
+
+# bytes to collect before handing a chunk of the response to the server
+CHUNK_SIZE = 1 << 16
+MIMETYPES = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+class RecordStream(object):
+	""" Matching records to be encoded one at a time as the response is sent, instead of as one document
+
+	A 'json' stream is the same document the buffered response would be: a dictionary keyed by name, or the results,
+	total and next cursor of a page. An 'ndjson' stream is only the records, one per line.
+	"""
+
+	def __init__(self, keys, data, fields, format, total, next_cursor=None, paged=False):
+		""" Constructor.
+
+		:param keys: keys of the records to send, in order
+		:param data: JSON data for actors or movies, a version that does not change while the records are sent
+		:param fields: comma separated fields to keep, or None for all fields
+		:param format: 'json' for the buffered response's document, 'ndjson' for one record per line
+		:param total: number of records matching the query
+		:param next_cursor: cursor for the next page, if the records are a page
+		:param paged: whether the records are a page, sent as a list of results rather than keyed by name
+		"""
+		self.keys = keys
+		self.data = data
+		self.fields = fields
+		self.format = format
+		self.total = total
+		self.next_cursor = next_cursor
+		self.paged = paged
+
+	def records(self):
+		""" iterate over the records, all read from the version of the data the query ran against
+
+		:return: iterator of (key, record)
+		"""
+		for key in self.keys:
+			yield key, project(self.data[key], self.fields)
+
+	def document(self):
+		""" the text around and between the encoded records
+
+		:return: (text before the records, function encoding one record, separator, text after the records)
+		"""
+		if self.format == 'ndjson':
+			return '', lambda key, record: json.dumps(record) + '\n', '', ''
+		if self.paged:
+			end = '], "total": %d, "next": %s}\n' % (self.total, json.dumps(self.next_cursor))
+			return '{"results": [', lambda key, record: json.dumps(record), ',\n', end
+		return '{', lambda key, record: json.dumps(key) + ': ' + json.dumps(record), ',\n', '}\n'
+
+	def chunks(self):
+		""" encode the records a chunk at a time
+
+		:return: iterator of strings making up the response body
+		"""
+		start, encode, separator, end = self.document()
+		buf = [start]
+		size = 0
+		for i, (key, record) in enumerate(self.records()):
+			text = (separator if i > 0 else '') + encode(key, record)
+			buf.append(text)
+			size += len(text)
+			if size >= CHUNK_SIZE:
+				yield ''.join(buf)
+				buf = []
+				size = 0
+		buf.append(end)
+		yield ''.join(buf)
+
+	def response(self):
+		""" make a streamed response, paging details go in headers since the body is only records
+
+		:return: the flask Response
+		"""
+		headers = {'X-Total-Count': str(self.total)}
+		if self.next_cursor is not None:
+			headers['X-Next-Cursor'] = self.next_cursor
+		return Response(self.chunks(), mimetype=MIMETYPES[self.format], headers=headers)
@@ -0,0 +1,39 @@
+import unittest
+from flask import Flask
+from cache import ResponseCache
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+	def setUp(self):
+		# responses can only be encoded inside a request
+		self.app = Flask(__name__)
+		self.context = self.app.test_request_context('/')
+		self.context.push()
+
+	def tearDown(self):
+		self.context.pop()
+
+	# test encoded records are reused until invalidated
+	def test_invalidate(self):
+		cache = ResponseCache()
+		record = {'name': 'Bruce Willis', 'age': 61}
+		body, etag = cache.get('Bruce Willis', record)
+		record['age'] = 62
+		self.assertEqual(cache.get('Bruce Willis', record), (body, etag))
+		cache.invalidate('Bruce Willis')
+		body2, etag2 = cache.get('Bruce Willis', record)
+		self.assertIn('62', body2)
+		self.assertNotEqual(etag, etag2)
+
+	# test least recently used records are dropped
+	def test_eviction(self):
+		cache = ResponseCache(size=2)
+		cache.get('a', {'name': 'a'})
+		cache.get('b', {'name': 'b'})
+		cache.get('a', {'name': 'a'})
+		cache.get('c', {'name': 'c'})
+		self.assertEqual(list(cache.entries), ['a', 'c'])
+
+if __name__ == '__main__':
+	unittest.main()
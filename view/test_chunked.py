@@ -0,0 +1,52 @@
+import random
+import unittest
+from chunked import ChunkedMap, ChunkedSet
+
+
+class ChunkedMapTests(unittest.TestCase):
+
+	# test the map behaves like a dictionary as it grows and shrinks
+	def test_matches_dict(self):
+		rng = random.Random(7)
+		chunked_map = ChunkedMap()
+		expected = {}
+		for _ in xrange(5000):
+			key = rng.randrange(2000)
+			if rng.random() < 0.3:
+				self.assertEqual(chunked_map.pop(key), expected.pop(key, None))
+			else:
+				chunked_map[key] = expected[key] = rng.random()
+		self.assertEqual(len(chunked_map), len(expected))
+		self.assertEqual(dict(chunked_map.iteritems()), expected)
+		self.assertEqual(sorted(chunked_map), sorted(expected))
+		self.assertRaises(KeyError, chunked_map.__delitem__, 'missing')
+		self.assertGreater(len(chunked_map.buckets), 1)
+
+	# test copies share buckets until written and never see each other's writes
+	def test_copy(self):
+		chunked_map = ChunkedMap((str(i), i) for i in xrange(10000))
+		copy = chunked_map.copy()
+		copy['1'] = -1
+		del copy['2']
+		chunked_map['3'] = -3
+		self.assertEqual((chunked_map['1'], chunked_map['2'], chunked_map['3']), (1, 2, -3))
+		self.assertEqual((copy['1'], '2' in copy, copy['3']), (-1, False, 3))
+		self.assertEqual((len(chunked_map), len(copy)), (10000, 9999))
+		# only the buckets written to were copied
+		shared = sum(1 for a, b in zip(chunked_map.buckets, copy.buckets) if a is b)
+		self.assertGreaterEqual(shared, len(copy.buckets) - 3)
+
+	# test a set copy keeps its own keys
+	def test_set_copy(self):
+		chunked_set = ChunkedSet(xrange(1000))
+		copy = chunked_set.copy()
+		copy.discard(1)
+		copy.discard(5000)
+		copy.add(1000)
+		chunked_set.add(-1)
+		self.assertEqual(set(chunked_set), set(xrange(-1, 1000)))
+		self.assertEqual(set(copy), set(xrange(1001)) - set([1]))
+		self.assertEqual((len(chunked_set), len(copy)), (1001, 1000))
+
+if __name__ == '__main__':
+	unittest.main()
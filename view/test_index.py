@@ -0,0 +1,91 @@
+import json
+import random
+import unittest
+from index import EntityIndex, SortedIndex
+from query import ACTOR_FIELDS, MOVIE_FIELDS, compile_query, parse_query
+from util import filter_actors_helper, filter_movies_helper
+
+
+class IndexTests(unittest.TestCase):
+
+	def setUp(self):
+		# load actor and movie data from JSON file and index it
+		with open('model/data/data.json') as f:
+			self.actor_data, self.movie_data = json.load(f)
+		self.actor_index = EntityIndex(self.actor_data, ACTOR_FIELDS)
+		self.movie_index = EntityIndex(self.movie_data, MOVIE_FIELDS)
+
+	# test indexed queries match scanning the data
+	def test_indexed_queries(self):
+		queries = ['name=Bruce', 'name=ill', 'name=e&age=50', 'movies=Pulp Fiction|name=Wil', 'age=94|name="Bruce Willis']
+		for query in queries:
+			self.assertEqual(filter_actors_helper(query, self.actor_data, self.actor_index),
+							 filter_actors_helper(query, self.actor_data))
+		queries = ['name=Die Hard', 'year=1994&actors=Bruce Willis', 'name=ie|box_office=24', 'year=x']
+		for query in queries:
+			self.assertEqual(filter_movies_helper(query, self.movie_data, self.movie_index),
+							 filter_movies_helper(query, self.movie_data))
+
+	# test range queries through the sorted indexes match scanning the data
+	def test_indexed_comparisons(self):
+		queries = ['age<30', 'age<=30', 'age>80&total_gross>0', 'age!=61', 'age between 30,40|name=Bruce', 'age between 40,30']
+		for query in queries:
+			self.assertEqual(filter_actors_helper(query, self.actor_data, self.actor_index),
+							 filter_actors_helper(query, self.actor_data))
+		condition = compile_query(parse_query('year between 1990,1999'), MOVIE_FIELDS).clauses[0][1][0]
+		matches = [name for name, movie in self.movie_data.iteritems() if 1990 <= movie['year'] <= 1999]
+		self.assertEqual(self.movie_index.count(condition), len(matches))
+
+	# test counts reflect the size of the posting lists
+	def test_count(self):
+		condition = compile_query(parse_query('year=1994'), MOVIE_FIELDS).clauses[0][1][0]
+		matches = [name for name, movie in self.movie_data.iteritems() if movie['year'] == 1994]
+		self.assertEqual(self.movie_index.count(condition), len(matches))
+		condition = compile_query(parse_query('name=Zzz'), MOVIE_FIELDS).clauses[0][1][0]
+		self.assertEqual(self.movie_index.count(condition), 0)
+
+	# test the index follows records as they are added, changed and removed
+	def test_incremental_updates(self):
+		actor = self.actor_data['Bruce Willis']
+		actor['age'] = 200
+		actor['movies'] = actor['movies'] + ['New Movie']
+		self.actor_index.update('Bruce Willis', actor)
+		self.assertEqual(filter_actors_helper('age=200', self.actor_data, self.actor_index).keys(), ['Bruce Willis'])
+		self.assertNotIn('Bruce Willis', filter_actors_helper('age=61', self.actor_data, self.actor_index))
+		self.assertEqual(filter_actors_helper('movies=New Movie', self.actor_data, self.actor_index).keys(),
+						 ['Bruce Willis'])
+		self.actor_data['Zed Zed'] = {'name': 'Zed Zed', 'age': 'unknown'}
+		self.actor_index.add('Zed Zed', self.actor_data['Zed Zed'])
+		self.assertEqual(filter_actors_helper('name=Zed', self.actor_data, self.actor_index).keys(), ['Zed Zed'])
+		self.assertEqual(filter_actors_helper('age>199', self.actor_data, self.actor_index).keys(), ['Bruce Willis'])
+		del self.actor_data['Bruce Willis']
+		self.actor_index.remove('Bruce Willis')
+		self.assertEqual(filter_actors_helper('name=Bruce W', self.actor_data, self.actor_index), {})
+		self.assertNotIn('New Movie', self.actor_index.postings['movies'])
+
+	# test a sorted index split into many chunks, and its copies, match a sorted list
+	def test_sorted_chunks(self):
+		rng = random.Random(3)
+		sorted_index = SortedIndex()
+		expected = []
+		for i in xrange(3000):
+			value = rng.randrange(100)
+			sorted_index.add(value, i)
+			expected.append((value, i))
+		copy = sorted_index.copy()
+		for value, i in expected[::2]:
+			copy.remove(value, i)
+		self.assertRaises(ValueError, copy.remove, expected[0][0], expected[0][1])
+		self.assertGreater(len(sorted_index.values), 2)
+		for index, items in ((sorted_index, expected), (copy, expected[1::2])):
+			self.assertEqual(len(index), len(items))
+			self.assertEqual(index.all_keys(), set(i for _, i in items))
+			for bounds in [(10, 20, True, False), (10, 20, False, True), (None, 50, True, True), (99, None, False, True), (30, 5, True, True)]:
+				low, high, include_low, include_high = bounds
+				keys = set(i for value, i in items if (low is None or value > low or include_low and value == low) and
+						   (high is None or value < high or include_high and value == high))
+				self.assertEqual(index.lookup(bounds), keys)
+				self.assertEqual(index.count(bounds), len(keys))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,73 @@
+import json
+import unittest
+from index import EntityIndex
+from paging import split_options
+from query import ACTOR_FIELDS
+from util import filter_actors_helper
+
+
+class PagingTests(unittest.TestCase):
+
+	def setUp(self):
+		# load actor data from JSON file and index it
+		with open('model/data/data.json') as f:
+			self.actor_data = json.load(f)[0]
+		self.actor_index = EntityIndex(self.actor_data, ACTOR_FIELDS)
+
+	def walk(self, query):
+		""" follow next cursors from the first page to the last
+
+		:param query: query for the first page
+		:return: names of all results in order
+		"""
+		names = []
+		cursor = None
+		while True:
+			page = filter_actors_helper(query + ('&cursor=' + cursor if cursor else ''), self.actor_data, self.actor_index)
+			names.extend(actor['name'] for actor in page['results'])
+			cursor = page['next']
+			if cursor is None:
+				return names
+
+	# test options are separated from filter clauses
+	def test_split_options(self):
+		self.assertEqual(split_options('name=a|age=3&limit=5&sort=-age'), ('name=a|age=3', {'limit': 5, 'sort': '-age'}))
+		self.assertEqual(split_options(''), ('', {}))
+		for query in ('limit=a', 'limit=1&limit=2', 'offset=-1'):
+			with self.assertRaises(ValueError):
+				split_options(query)
+		self.assertIsNone(filter_actors_helper('sort=movies', self.actor_data))
+		self.assertIsNone(filter_actors_helper('limit=2&cursor=abc', self.actor_data))
+
+	# test limit and offset select from the sorted matches
+	def test_limit_offset(self):
+		by_age = sorted(self.actor_data.values(), key=lambda actor: (actor['age'], actor['name']))
+		page = filter_actors_helper('age>30&sort=age&limit=5&offset=3', self.actor_data, self.actor_index)
+		matches = [actor for actor in by_age if actor['age'] > 30]
+		self.assertEqual(page['results'], matches[3:8])
+		self.assertEqual(page['total'], len(matches))
+		self.assertIsNotNone(page['next'])
+		page = filter_actors_helper('sort=-age&limit=3', self.actor_data)
+		self.assertEqual([actor['age'] for actor in page['results']], [actor['age'] for actor in by_age[::-1][:3]])
+		page = filter_actors_helper('name=Bruce Willis&limit=5', self.actor_data)
+		self.assertEqual(([actor['name'] for actor in page['results']], page['next']), (['Bruce Willis'], None))
+
+	# test following cursors visits every match once, in order
+	def test_cursor(self):
+		self.assertEqual(self.walk('limit=7'), sorted(self.actor_data))
+		names = self.walk('age<50&sort=-total_gross&limit=10')
+		expected = sorted((actor for actor in self.actor_data.values() if actor['age'] < 50),
+						  key=lambda actor: (-actor['total_gross'], actor['name']))
+		self.assertEqual(len(names), len(expected))
+		self.assertEqual([self.actor_data[name]['total_gross'] for name in names],
+						 [actor['total_gross'] for actor in expected])
+
+	# test fields keeps only the requested fields
+	def test_fields(self):
+		result = filter_actors_helper('name=Bruce Willis&fields=name,age', self.actor_data)
+		self.assertEqual(result, {'Bruce Willis': {'name': 'Bruce Willis', 'age': 61}})
+		page = filter_actors_helper('sort=name&limit=1&fields=age', self.actor_data)
+		self.assertEqual(page['results'], [{'age': self.actor_data[min(self.actor_data)]['age']}])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,87 @@
+import json
+import unittest
+from query import ACTOR_FIELDS, MOVIE_FIELDS, PlanCache, compile_query, normalize_query, parse_query
+from util import filter_actors_helper, filter_movies_helper
+
+
+class QueryTests(unittest.TestCase):
+
+	def setUp(self):
+		# load actor and movie data from JSON file
+		with open('model/data/data.json') as f:
+			self.actor_data, self.movie_data = json.load(f)
+
+	# test & binds looser than |
+	def test_parse_query(self):
+		root = parse_query('name="Pulp Fiction"|box_office=24&actors=John Travolta')
+		self.assertEqual(len(root.clauses), 2)
+		first, second = root.clauses
+		self.assertEqual([(f.param, f.value) for f in first.clauses], [('name', 'Pulp Fiction'), ('box_office', '24')])
+		self.assertEqual([(f.param, f.value) for f in second.clauses], [('actors', 'John Travolta')])
+		with self.assertRaises(ValueError):
+			parse_query('name')
+		with self.assertRaises(ValueError):
+			parse_query('age=1=2')
+
+	# test comparison operators are parsed and checked against the field type
+	def test_parse_comparisons(self):
+		for clause, op, value in [('age<30', '<', '30'), ('age<=30', '<=', '30'), ('age>=30', '>=', '30'),
+								  ('age>30', '>', '30'), ('age!=30', '!=', '30'),
+								  ('year between 1990,1999', 'between', '1990,1999'), ('name=a<b', '=', 'a<b')]:
+			node = parse_query(clause).clauses[0].clauses[0]
+			self.assertEqual((node.param, node.op, node.value), (clause[:clause.index(op[0])].strip(), op, value))
+		with self.assertRaises(ValueError):
+			compile_query(parse_query('name<30'), ACTOR_FIELDS)
+		with self.assertRaises(ValueError):
+			parse_query('age<=3=0')
+		# non-numeric bounds match nothing
+		self.assertEqual(filter_movies_helper('year between 1990', self.movie_data), {})
+		self.assertEqual(filter_movies_helper('year<abc', self.movie_data), {})
+
+	# test comparisons select the same records as checking each one
+	def test_comparisons(self):
+		result = filter_movies_helper('year between 1990,1994&box_office>=100', self.movie_data)
+		expected = dict((name, movie) for name, movie in self.movie_data.iteritems()
+						if 1990 <= movie['year'] <= 1994 and movie['box_office'] >= 100)
+		self.assertEqual(result, expected)
+		self.assertTrue(len(result) > 0)
+		result = filter_actors_helper('age<30|age>90&age!=94', self.actor_data)
+		expected = dict((name, actor) for name, actor in self.actor_data.iteritems()
+						if (actor['age'] < 30 or actor['age'] > 90) and actor['age'] != 94)
+		self.assertEqual(result, expected)
+
+	# test conjunctions are ordered from most to least selective
+	def test_plan_order(self):
+		plan = compile_query(parse_query('name=e&age=50'), ACTOR_FIELDS)
+		self.assertEqual(len(plan.clauses), 2)
+		self.assertTrue(plan.clauses[0][0]({'age': 50}))
+		# a clause on an unknown param matches nothing
+		plan = compile_query(parse_query('name=e&stuff=1'), ACTOR_FIELDS)
+		self.assertEqual(plan.execute(self.actor_data), set())
+
+	# test queries give the same results as filtering each clause separately
+	def test_execute(self):
+		result = filter_movies_helper('actors=Bruce Willis&year=1994|year=1995', self.movie_data)
+		expected = dict((name, movie) for name, movie in self.movie_data.iteritems()
+						if 'Bruce Willis' in movie['actors'] and movie['year'] in (1994, 1995))
+		self.assertEqual(result, expected)
+		self.assertTrue(len(result) > 0)
+		result = filter_actors_helper('name=Bruce|age=94', self.actor_data)
+		self.assertEqual(sorted(result), ['Abe Vigoda', 'Bruce Dern', 'Bruce Willis', 'Steven Hill'])
+		self.assertEqual(filter_actors_helper('', self.actor_data), self.actor_data)
+
+	# test plans are cached by normalized query and least recently used plans are dropped
+	def test_plan_cache(self):
+		self.assertEqual(normalize_query('b=1|a=2&c=3'), normalize_query('c=3&a=2|b=1'))
+		cache = PlanCache(MOVIE_FIELDS, size=2)
+		plan = cache.get_plan('year=1994&name=Pulp')
+		self.assertIs(cache.get_plan('name=Pulp&year=1994'), plan)
+		cache.get_plan('year=1995')
+		cache.get_plan('year=1994&name=Pulp')
+		cache.get_plan('year=1996')
+		self.assertEqual(len(cache.plans), 2)
+		self.assertIs(cache.get_plan('year=1994&name=Pulp'), plan)
+		self.assertNotIn(normalize_query('year=1995'), cache.plans)
+
+if __name__ == '__main__':
+	unittest.main()
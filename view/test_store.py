@@ -0,0 +1,87 @@
+import json
+import threading
+import unittest
+from query import ACTOR_FIELDS
+from store import EntityStore
+from util import filter_actors_helper
+
+
+class StoreTests(unittest.TestCase):
+
+	def setUp(self):
+		# load actor data from JSON file, the store indexes it
+		with open('model/data/data.json') as f:
+			self.actor_data = json.load(f)[0]
+		self.store = EntityStore('actor', self.actor_data, ACTOR_FIELDS)
+
+	# test a snapshot taken before writes keeps its records and index
+	def test_pinned_snapshot(self):
+		snapshot = self.store.snapshot
+		willis = snapshot.data['Bruce Willis']
+		self.store.update('Bruce Willis', {'age': 200})
+		self.store.add({'name': 'Zed Zed', 'age': 200})
+		self.store.remove('Abe Vigoda')
+		self.assertEqual(self.store.snapshot.version, snapshot.version + 3)
+		# the old snapshot is unchanged
+		self.assertIs(snapshot.data['Bruce Willis'], willis)
+		self.assertEqual(willis['age'], 61)
+		self.assertNotIn('Zed Zed', snapshot.data)
+		self.assertIn('Abe Vigoda', snapshot.data)
+		self.assertEqual(filter_actors_helper('age=200', snapshot.data, snapshot.index), {})
+		self.assertIn('Bruce Willis', filter_actors_helper('age=61', snapshot.data, snapshot.index))
+		self.assertIn('Abe Vigoda', filter_actors_helper('name=Vigoda', snapshot.data, snapshot.index))
+		# the new one has the writes, and its index matches scanning its data
+		current = self.store.snapshot
+		for query in ['age=200', 'age=61', 'name=Vigoda', 'name=Zed', 'age>150|name=Bruce']:
+			self.assertEqual(filter_actors_helper(query, current.data, current.index),
+							 filter_actors_helper(query, current.data))
+		self.assertEqual(sorted(filter_actors_helper('age=200', current.data, current.index)), ['Bruce Willis', 'Zed Zed'])
+
+	# test a write copies only the parts of the records and index it changes
+	def test_write_shares_snapshot(self):
+		snapshot = self.store.snapshot
+		self.store.update('Bruce Willis', {'age': 200})
+		current = self.store.snapshot
+		buckets = zip(snapshot.data.buckets, current.data.buckets)
+		self.assertEqual(sum(1 for a, b in buckets if a is not b), 1)
+		buckets = zip(snapshot.index.indexed.buckets, current.index.indexed.buckets)
+		self.assertEqual(sum(1 for a, b in buckets if a is not b), 1)
+		chunks = zip(snapshot.index.sorted['age'].values, current.index.sorted['age'].values)
+		self.assertLessEqual(sum(1 for a, b in chunks if a is not b), 2)
+
+	# test a rejected batch does not publish a new snapshot
+	def test_rejected_batch(self):
+		snapshot = self.store.snapshot
+		applied, statuses = self.store.write_batch([('upsert', 'Bruce Willis', {'age': 62}), ('remove', 'Nobody', None)])
+		self.assertFalse(applied)
+		self.assertEqual(statuses, [200, 404])
+		self.assertIs(self.store.snapshot, snapshot)
+
+	# test readers see whole versions while a writer keeps publishing
+	def test_concurrent_reads(self):
+		errors = []
+		done = threading.Event()
+
+		def read():
+			try:
+				while not done.is_set():
+					snapshot = self.store.snapshot
+					# every batch adds or removes both records, a reader never sees just one
+					found = filter_actors_helper('name=Zed Zed', snapshot.data, snapshot.index)
+					self.assertIn(len(found), (0, 2))
+					self.assertEqual(len(found), len([key for key in snapshot.data if 'Zed Zed' in key]))
+			except Exception as e:
+				errors.append(e)
+		readers = [threading.Thread(target=read) for _ in range(4)]
+		for reader in readers:
+			reader.start()
+		for _ in range(200):
+			self.store.write_batch([('add', 'Zed Zed 1', {'name': 'Zed Zed 1'}), ('add', 'Zed Zed 2', {'name': 'Zed Zed 2'})])
+			self.store.write_batch([('remove', 'Zed Zed 1', None), ('remove', 'Zed Zed 2', None)])
+		done.set()
+		for reader in readers:
+			reader.join()
+		self.assertEqual(errors, [])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+import streaming
+from streaming import RecordStream
+from util import filter_movies_helper
+
+
+class StreamingTests(unittest.TestCase):
+
+	def setUp(self):
+		# load movie data from JSON file
+		with open('model/data/data.json') as f:
+			self.movie_data = json.load(f)[1]
+
+	# test a JSON stream decodes to the same document as the buffered response
+	def test_json_stream(self):
+		stream = filter_movies_helper('year>1990&stream=json', self.movie_data)
+		self.assertIsInstance(stream, RecordStream)
+		expected = filter_movies_helper('year>1990', self.movie_data)
+		self.assertEqual(json.loads(''.join(stream.chunks())), expected)
+		self.assertEqual(stream.total, len(expected))
+		empty = filter_movies_helper('year>3000&stream=json', self.movie_data)
+		self.assertEqual(json.loads(''.join(empty.chunks())), {})
+		for query in ('sort=-box_office&limit=5&fields=name,box_office', 'year>3000&limit=5'):
+			stream = filter_movies_helper(query + '&stream=json', self.movie_data)
+			self.assertEqual(json.loads(''.join(stream.chunks())), filter_movies_helper(query, self.movie_data))
+
+	# test an NDJSON stream holds one record per line, in page order
+	def test_ndjson_stream(self):
+		stream = filter_movies_helper('sort=-box_office&limit=5&fields=name,box_office&stream=ndjson', self.movie_data)
+		page = filter_movies_helper('sort=-box_office&limit=5&fields=name,box_office', self.movie_data)
+		lines = ''.join(stream.chunks()).splitlines()
+		self.assertEqual(len(lines), 5)
+		self.assertEqual([json.loads(line) for line in lines], page['results'])
+		self.assertEqual(stream.next_cursor, page['next'])
+		self.assertIsNone(filter_movies_helper('stream=xml', self.movie_data))
+
+	# test records are sent in several chunks
+	def test_chunks(self):
+		chunk_size = streaming.CHUNK_SIZE
+		streaming.CHUNK_SIZE = 1024
+		try:
+			chunks = list(filter_movies_helper('sort=name&stream=json', self.movie_data).chunks())
+		finally:
+			streaming.CHUNK_SIZE = chunk_size
+		self.assertTrue(len(chunks) > 2)
+		records = json.loads(''.join(chunks))['results']
+		self.assertEqual(sorted(record['name'] for record in records), sorted(self.movie_data))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,3 +1,12 @@
+from paging import is_paged, page, project, select_page, split_options
+from query import ACTOR_FIELDS, MOVIE_FIELDS, And, Filter, Or, PlanCache, compile_query, select
+from streaming import RecordStream
+
+# compiled plans for recent queries, shared by all requests
+movie_plans = PlanCache(MOVIE_FIELDS)
+actor_plans = PlanCache(ACTOR_FIELDS)
+
+
 def apply_filter_movies(param, val, movie_data):
 	""" Apply the filter to movie_data
 
@@ -6,20 +15,9 @@ def apply_filter_movies(param, val, movie_data):
 	:param movie_data: JSON data for movies
 	:return: entries in JSON data that satisfy filter.
 	"""
+	plan = compile_query(And([Or([Filter(param, val)])]), MOVIE_FIELDS)
 	# create a fresh dictionary, do not want to delete data in main copy
-	filtered_data = {}
-	# iterate over all entires and check if parameter is satisfied
-	for movie_name, movie in movie_data.iteritems():
-		if param == 'name' and val in movie['name']:
-			filtered_data[movie_name] = movie
-		elif param == 'actors' and val in movie['actors']:
-			filtered_data[movie_name] = movie
-		elif param == 'year' and val.isdigit() and int(val) == movie['year']:
-			filtered_data[movie_name] = movie
-		elif param == 'box_office' and val.isdigit() and int(val) == movie['box_office']:
-			filtered_data[movie_name] = movie
-	# return dictionary with results
-	return filtered_data
+	return select(plan.execute(movie_data), movie_data)
 
 
 def apply_filter_actors(param, val, actor_data):
@@ -30,86 +28,60 @@ def apply_filter_actors(param, val, actor_data):
 		:param movie_data: JSON data for actors
 		:return: entries in JSON data that satisfy filter.
 	"""
+	plan = compile_query(And([Or([Filter(param, val)])]), ACTOR_FIELDS)
 	# create a fresh dictionary, do not want to delete data in main copy
-	filtered_data = {}
-	# iterate over all entires and check if parameter is satisfied
-	for actor_name, actor in actor_data.iteritems():
-		if param == 'name' and val in actor['name']:
-			filtered_data[actor_name] = actor
-		elif param == 'movies' and val in actor['movies']:
-			filtered_data[actor_name] = actor
-		elif param == 'age' and val.isdigit() and int(val) == actor['age']:
-			filtered_data[actor_name] = actor
-		elif param == 'total_gross' and val.isdigit() and int(val) == actor['total_gross']:
-			filtered_data[actor_name] = actor
-	# return dictionary with results
-	return filtered_data
-
-
-def filter_movies_helper(query, movie_data):
+	return select(plan.execute(actor_data), actor_data)
+
+
+def run_query(query, data, index, plans):
+	""" apply a query, including its paging, sorting and projection options, to data
+
+	:param query: query passed by user in querystring
+	:param data: JSON data for actors or movies
+	:param index: EntityIndex over data, or None to scan data
+	:param plans: PlanCache for this kind of record
+	:return: dictionary of matching records, a page of them if paging or sorting was asked for, or a
+		RecordStream if streaming was asked for
+	"""
+	query, options = split_options(query)
+	# no filter clauses matches every record
+	keys = plans.get_plan(query).execute(data, index) if query else set(data)
+	if 'stream' in options:
+		next_cursor = None
+		ordered = keys
+		paged = is_paged(options)
+		if paged:
+			ordered, next_cursor = select_page(keys, data, options, plans.fields)
+		return RecordStream(ordered, data, options.get('fields'), options['stream'], len(keys), next_cursor, paged)
+	if is_paged(options):
+		return page(keys, data, options, plans.fields)
+	fields = options.get('fields')
+	return dict((key, project(data[key], fields)) for key in keys)
+
+
+def filter_movies_helper(query, movie_data, movie_index=None):
 	""" apply query to movie_data
 
 	:param query: query passed by user in querystring
 	:param movie_data: JSON data for movies
-	:return: filtered JSON data
+	:param movie_index: EntityIndex over movie_data, scans movie_data if not given
+	:return: filtered JSON data, or None if query is malformed
 	"""
-	# a recursive query had no results, return None
-	if movie_data is None:
+	try:
+		return run_query(query, movie_data, movie_index, movie_plans)
+	except ValueError:
 		return None
-	# if boolean operations exist in query, handle each clause recursively (& takes precedence)
-	if '&' in query:
-		# split into 2 clauses along &
-		query1, query2 = query.split('&', 1)
-		# apply first query
-		temp_data = filter_movies_helper(query1, movie_data)
-		# apply second query to data returned by first query
-		return filter_movies_helper(query2, temp_data)
-	elif '|' in query:
-		# split into 2 clauses along |
-		query1, query2 = query.split('|', 1)
-		# apply first query
-		temp_data = filter_movies_helper(query1, movie_data)
-		if temp_data is None:
-			temp_data = {}
-		# apply second query to data and union with result of first query
-		return dict(filter_movies_helper(query2, movie_data), **temp_data)
-	# base case, just apply the query to single clause
-	else:
-		param, val = query.split('=')
-		if val[0] == '"' or val[0] == '"':
-			val = val[1:-1]
-		# pass to apply filter helper
-		return apply_filter_movies(param, val, movie_data)
-
-
-def filter_actors_helper(query, actor_data):
+
+
+def filter_actors_helper(query, actor_data, actor_index=None):
 	""" apply query to actor_data
 
 		:param query: query passed by user in querystring
 		:param actor_data: JSON data for actors
-		:return: filtered JSON data
+		:param actor_index: EntityIndex over actor_data, scans actor_data if not given
+		:return: filtered JSON data, or None if query is malformed
 	"""
-	# a recursive query had no results, return None
-	if actor_data is None:
+	try:
+		return run_query(query, actor_data, actor_index, actor_plans)
+	except ValueError:
 		return None
-	# if boolean operations exist in query, handle each clause recursively (& takes precedence)
-	if '&' in query:
-		query1, query2 = query.split('&', 1)
-		# apply first query
-		temp_data = filter_actors_helper(query1, actor_data)
-		# apply second query to data returned by first query
-		return filter_actors_helper(query2, temp_data)
-	elif '|' in query:
-		query1, query2 = query.split('|', 1)
-		# apply first query
-		temp_data = filter_actors_helper(query1, actor_data)
-		if temp_data is None:
-			return None
-		# apply second query to data and union with result of first query
-		return dict(filter_actors_helper(query2, actor_data), **temp_data)
-	else:
-		param, val = query.split('=')
-		if val[0] == '"' or val[0] == '"':
-			val = val[1:-1]
-		# pass to apply filter helper
-		return apply_filter_actors(param, val, actor_data)